@@ -0,0 +1,313 @@
+# app/bench/forecast_backtest.py
+"""
+수요예측 구성별 rolling-origin 백테스트 — 정확도(MAPE/RMSE)와 비용(학습 시간/예측 지연/모델 크기) 비교
+실행 (itda-backend 디렉터리에서):
+    python -m app.bench.forecast_backtest
+    python -m app.bench.forecast_backtest --folds 4 --horizon 7 --target-mape 15 --json backtest.json
+    python -m app.bench.forecast_backtest --synthetic 10 20 120 --workers 4
+분할: 마지막 folds × horizon일을 horizon일 구간으로 나눠, 구간마다 그 시작일 이전 행만으로 학습 → 구간 예측.
+      구간 안에서는 매일 전날까지의 실제값을 쓰는 1일 앞 예측 (서비스에서 매일 저녁 다음 날을 예측하는 것과 같음)
+구성: 그룹별 앙상블 구성원 조합(rf/hgb/xgb), 공용 모델(pooled), 규칙 기반(rule) — 모두 같은 (그룹, 구간) 집합에서 평가
+      (어느 그룹별 구성이든 학습 행이 부족한 (그룹, 구간)은 전부 제외)
+지표: MAPE(실제값 > 0인 행), RMSE — 버퍼(×1.1 등)를 붙이기 전 점 예측값 기준
+      train_s = 배포 전체(모든 그룹) 재학습 1회 시간 (1스레드, 구간 평균) / latency_ms = 1행 예측 호출 중앙값
+      size_mb = 모든 그룹 모델 pickle 크기 합 (구간 평균)
+그룹(+ 공용 모델 구간)별로 spawn 프로세스 풀에서 병렬, 각 작업 1스레드 — 결과는 작업 순서대로 모으므로
+정확도 지표는 --workers와 무관하게 같음 (시간 지표만 실행마다 다름).
+--target-mape/--target-rmse를 주면 목표를 만족하는 구성 중 --cost 기준 가장 싼 것을 고르고 배포 환경변수를 출력
+(없으면 종료코드 1).
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import multiprocessing as mp
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..services import forecast
+from ..services.forecast import POOLED_FEATURES, _MLForecaster
+from ..services.rule_forecast import WeekdayBaseline
+
+_BASE_DIR = Path(__file__).resolve().parent.parent
+_LATENCY_CALLS = 5  # 구간마다 1행 예측 지연 측정 횟수
+
+
+def _configs(xgb_ok: bool) -> Dict[str, Dict]:
+    members = [("rf", "hgb", "xgb"), ("hgb", "xgb"), ("rf", "hgb"), ("rf",), ("hgb",), ("xgb",)]
+    out = {"+".join(m): {"kind": "per_group", "members": m} for m in members if xgb_ok or "xgb" not in m}
+    out["pooled"] = {"kind": "pooled"}
+    out["rule"] = {"kind": "rule"}
+    return out
+
+
+def deploy_env(name: str, cfg: Dict) -> Dict[str, str]:
+    """구성 → 배포 환경변수 (services.forecast가 읽는 값)"""
+    if cfg["kind"] == "per_group":
+        return {"ITDA_FORECAST_MODEL": "per_group", "ITDA_FORECAST_MEMBERS": ",".join(cfg["members"])}
+    return {"ITDA_FORECAST_MODEL": cfg["kind"]}
+
+
+def _cutoffs(last_day: int, folds: int, horizon: int) -> List[int]:
+    """구간 시작일 서수 — 마지막 folds × horizon일을 시간순으로"""
+    return [last_day - horizon * (folds - i) + 1 for i in range(folds)]
+
+
+def _latency_ms(fn, rows: int) -> float:
+    calls = []
+    for i in range(min(rows, _LATENCY_CALLS)):
+        t0 = time.perf_counter()
+        fn(i)
+        calls.append((time.perf_counter() - t0) * 1e3)
+    return statistics.median(calls) if calls else 0.0
+
+
+# ---------------- 작업 (자식 프로세스) ----------------
+def _group_task(key: Tuple[int, int], X, y, days: np.ndarray, raw_days: np.ndarray, raw_qty: np.ndarray,
+                cutoffs: Sequence[int], horizon: int, configs: Dict[str, Dict]) -> List[Dict]:
+    """그룹 하나의 모든 구간 × (그룹별/규칙) 구성 — 학습 행이 부족한 구간은 제외"""
+    out: List[Dict] = []
+    yv = y.to_numpy(dtype=np.float64)
+    for fold, c in enumerate(cutoffs):
+        tr = days < c
+        te = (days >= c) & (days < c + horizon)
+        if tr.sum() < 20 or not te.any():
+            continue
+        X_tr, y_tr, X_te = X[tr], y[tr], X[te]
+        for name, cfg in configs.items():
+            if cfg["kind"] == "per_group":
+                t0 = time.perf_counter()
+                models, _sigma = _MLForecaster._fit(X_tr, y_tr, n_jobs=1, members=cfg["members"])
+                train_s = time.perf_counter() - t0
+                pred, _ = _MLForecaster._ensemble_predict(models, X_te, fast=True)
+                lat = _latency_ms(lambda i: _MLForecaster._ensemble_predict(models, X_te.iloc[[i]], fast=True), len(X_te))
+                size = len(pickle.dumps(models, protocol=pickle.HIGHEST_PROTOCOL))
+            elif cfg["kind"] == "rule":
+                eng = WeekdayBaseline()
+                before = raw_days < c
+                t0 = time.perf_counter()
+                eng.update([key[0]] * int(before.sum()), [key[1]] * int(before.sum()), raw_days[before], raw_qty[before])
+                train_s = time.perf_counter() - t0
+                pred, calls = [], []
+                for d in days[te].tolist():
+                    t0 = time.perf_counter()
+                    base, _sd, _src = eng.predict([key], dt.date.fromordinal(d))
+                    calls.append((time.perf_counter() - t0) * 1e3)
+                    pred.append(float(base[0]))
+                    same = raw_days == d  # 예측 후 그날 실제값 반영 (다음 날은 전날까지 아는 상태)
+                    eng.update([key[0]] * int(same.sum()), [key[1]] * int(same.sum()), raw_days[same], raw_qty[same])
+                lat = statistics.median(calls[:_LATENCY_CALLS])
+                size = eng._wd.nbytes + eng._all.nbytes
+            else:
+                continue
+            out.append({"config": name, "key": key, "fold": fold, "y": yv[te].tolist(),
+                        "pred": np.maximum(0.0, np.asarray(pred, dtype=np.float64)).tolist(),
+                        "train_s": train_s, "latency_ms": lat, "size_b": size})
+    return out
+
+
+def _pooled_task(X, y, cutoff_epoch: int, horizon: int, fold: int) -> Dict:
+    """
+    공용 모델 한 구간 — 학습 행의 타깃 인코딩(enc_*)은 이미 그 날 이전 판매만으로 계산됨,
+    검증 행은 배포 예측처럼 학습 구간 전체 평균으로 다시 계산 (검증 구간 값이 새지 않도록)
+    """
+    day = X.index.get_level_values("day").to_numpy()
+    vid = X.index.get_level_values("village_id").to_numpy()
+    pid = X.index.get_level_values("product_id").to_numpy()
+    tr = day < cutoff_epoch
+    te = (day >= cutoff_epoch) & (day < cutoff_epoch + horizon)
+    X = X.copy()
+    yv = y.to_numpy(dtype=np.float64)
+    glob = float(yv[tr].mean())
+    by_v = {k: float(yv[tr][vid[tr] == k].mean()) for k in np.unique(vid[tr])}
+    by_p = {k: float(yv[tr][pid[tr] == k].mean()) for k in np.unique(pid[tr])}
+    pair_tr = list(zip(vid[tr].tolist(), pid[tr].tolist()))
+    sums: Dict[Tuple[int, int], List[float]] = {}
+    for k, q in zip(pair_tr, yv[tr].tolist()):
+        s = sums.setdefault(k, [0.0, 0.0])
+        s[0] += q
+        s[1] += 1
+    ev = np.array([by_v.get(v, glob) for v in vid.tolist()])
+    ep = np.array([by_p.get(p, glob) for p in pid.tolist()])
+    evp = np.array([sums[k][0] / sums[k][1] if k in sums else max(0.0, a + b - glob)
+                    for k, a, b in zip(zip(vid.tolist(), pid.tolist()), ev.tolist(), ep.tolist())])
+    for col, vals in (("enc_village", ev), ("enc_product", ep), ("enc_pair", evp)):
+        X.loc[te, col] = vals[te]
+    X_te = X[te]
+    t0 = time.perf_counter()
+    models, _sigma = _MLForecaster._fit_pooled(X[tr], y[tr], 1)
+    train_s = time.perf_counter() - t0
+    pred, _ = _MLForecaster._ensemble_predict(models, X_te[POOLED_FEATURES], fast=True)
+    lat = _latency_ms(lambda i: _MLForecaster._ensemble_predict(models, X_te.iloc[[i]][POOLED_FEATURES], fast=True), len(X_te))
+    models.pop("group_sigma", None)
+    return {"config": "pooled", "fold": fold, "keys": list(zip(vid[te].tolist(), pid[te].tolist())),
+            "y": yv[te].tolist(), "pred": np.maximum(0.0, pred).tolist(), "train_s": train_s,
+            "latency_ms": lat, "size_b": len(pickle.dumps(models, protocol=pickle.HIGHEST_PROTOCOL))}
+
+
+def _call(task):
+    fn, args = task
+    return fn(*args)
+
+
+# ---------------- 집계/선택 ----------------
+def _metrics(y: np.ndarray, p: np.ndarray) -> Tuple[float, float]:
+    pos = y > 0
+    mape = float(np.mean(np.abs(y[pos] - p[pos]) / y[pos]) * 100.0) if pos.any() else float("nan")
+    rmse = float(np.sqrt(np.mean((y - p) ** 2))) if len(y) else float("nan")
+    return mape, rmse
+
+
+def summarize(records: List[Dict], configs: Dict[str, Dict], folds: int) -> List[Dict]:
+    out = []
+    for name in configs:
+        recs = [r for r in records if r["config"] == name]
+        if not recs:
+            continue
+        y = np.concatenate([np.asarray(r["y"]) for r in recs])
+        p = np.concatenate([np.asarray(r["pred"]) for r in recs])
+        mape, rmse = _metrics(y, p)
+        n_folds = len({r["fold"] for r in recs}) or folds
+        out.append({
+            "config": name,
+            "points": int(len(y)),
+            "mape": round(mape, 3),
+            "rmse": round(rmse, 4),
+            "train_s": round(sum(r["train_s"] for r in recs) / n_folds, 4),
+            "latency_ms": round(statistics.median(r["latency_ms"] for r in recs), 4),
+            "size_mb": round(sum(r["size_b"] for r in recs) / n_folds / 1e6, 4),
+            "env": deploy_env(name, configs[name]),
+        })
+    return out
+
+
+def pick(summary: List[Dict], target_mape: Optional[float] = None, target_rmse: Optional[float] = None,
+         cost: str = "train_s") -> Optional[Dict]:
+    """목표 정확도를 만족하는 구성 중 cost가 가장 작은 것 (같으면 나머지 비용, 그다음 정확도 순)"""
+    others = [c for c in ("train_s", "latency_ms", "size_mb") if c != cost]
+    ok = [s for s in summary
+          if (target_mape is None or s["mape"] <= target_mape) and (target_rmse is None or s["rmse"] <= target_rmse)]
+    if not ok:
+        return None
+    return min(ok, key=lambda s: (s[cost], s[others[0]], s[others[1]], s["mape"]))
+
+
+# ---------------- 실행 ----------------
+def _prepare(base: Path, folds: int, horizon: int, configs: Dict[str, Dict]):
+    """(작업 목록, 그룹 수) — 작업 = 그룹별 1개 + 공용 모델 구간별 1개"""
+    ml = _MLForecaster(base, store=None, mode="per_group")
+    last = int(ml._index.last_days(ml.groups()).max())
+    cutoffs = _cutoffs(last, folds, horizon)
+    per_group = {k: v for k, v in configs.items() if v["kind"] in ("per_group", "rule")}
+    tasks = []
+    groups = 0
+    for key in ml.groups():
+        try:
+            X, y = ml._training_data(*key)
+        except ValueError:
+            continue  # 서비스에서도 규칙 기반만 쓰는 그룹
+        groups += 1
+        g = ml._group(*key)
+        days = np.fromiter((d.toordinal() for d in g.loc[X.index, "date"]), dtype=np.int64, count=len(X))
+        raw_days = np.fromiter((d.toordinal() for d in g["date"]), dtype=np.int64, count=len(g))
+        tasks.append((_group_task, (key, X, y, days, raw_days, g["qty"].to_numpy(dtype=np.float64),
+                                    cutoffs, horizon, per_group)))
+    if "pooled" in configs:
+        X, y = ml._pooled_training_data()
+        epoch = dt.date(1970, 1, 1).toordinal()
+        tasks += [(_pooled_task, (X, y, c - epoch, horizon, fold)) for fold, c in enumerate(cutoffs)]
+    return tasks, groups, cutoffs
+
+
+def run(base: Path, folds: int, horizon: int, workers: int, configs: Dict[str, Dict]) -> Tuple[List[Dict], int, List[int]]:
+    tasks, groups, cutoffs = _prepare(base, folds, horizon, configs)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            results = list(pool.map(_call, tasks, chunksize=1))
+    else:
+        results = [_call(t) for t in tasks]
+    records: List[Dict] = []
+    pooled: List[Dict] = []
+    for res in results:
+        if isinstance(res, dict):
+            pooled.append(res)
+        else:
+            records += res
+    # 공용 모델은 그룹별 구성과 같은 (그룹, 구간) 행만 평가
+    eligible = {(tuple(r["key"]), r["fold"]) for r in records}
+    for res in pooled:
+        keep = np.array([(k, res["fold"]) in eligible for k in res["keys"]], dtype=bool)
+        records.append({**res, "y": np.asarray(res["y"])[keep].tolist(), "pred": np.asarray(res["pred"])[keep].tolist()})
+    return records, groups, cutoffs
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="rolling-origin forecast backtest")
+    ap.add_argument("--csv", type=Path, default=_BASE_DIR / "seed" / "seed_sales.csv", help="판매 CSV")
+    ap.add_argument("--synthetic", type=int, nargs=3, metavar=("VILLAGES", "PRODUCTS", "DAYS"), default=None,
+                    help="CSV 대신 합성 이력 (forecast_bench와 같은 생성기)")
+    ap.add_argument("--folds", type=int, default=4)
+    ap.add_argument("--horizon", type=int, default=7, help="구간 길이(일)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--configs", nargs="+", default=None, help="평가할 구성 이름 (기본 전체)")
+    ap.add_argument("--target-mape", type=float, default=None)
+    ap.add_argument("--target-rmse", type=float, default=None)
+    ap.add_argument("--cost", choices=["train_s", "latency_ms", "size_mb"], default="train_s")
+    ap.add_argument("--json", type=Path, default=None, help="결과/선택을 JSON으로 저장")
+    args = ap.parse_args(argv)
+
+    forecast._import_ml()
+    configs = _configs(forecast._XGB_OK)
+    if args.configs:
+        configs = {k: v for k, v in configs.items() if k in args.configs}
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        if args.synthetic:
+            from .forecast_bench import _write_history
+            _write_history(base, *args.synthetic)
+        else:
+            (base / "seed").mkdir()
+            shutil.copy(args.csv, base / "seed" / "seed_sales.csv")
+        records, groups, cutoffs = run(base, args.folds, args.horizon, max(1, args.workers), configs)
+
+    summary = summarize(records, configs, args.folds)
+    first = dt.date.fromordinal(cutoffs[0])
+    last = dt.date.fromordinal(cutoffs[-1] + args.horizon - 1)
+    print(f"groups={groups} folds={args.folds}x{args.horizon}d test={first}..{last}")
+    print(f"{'config':>11} {'points':>7} {'mape_%':>7} {'rmse':>7} {'train_s':>8} {'latency_ms':>11} {'size_mb':>8}")
+    for s in summary:
+        print(f"{s['config']:>11} {s['points']:>7} {s['mape']:>7.2f} {s['rmse']:>7.3f} {s['train_s']:>8.2f} "
+              f"{s['latency_ms']:>11.3f} {s['size_mb']:>8.3f}")
+
+    choice = None
+    if args.target_mape is not None or args.target_rmse is not None:
+        choice = pick(summary, args.target_mape, args.target_rmse, args.cost)
+        if choice is None:
+            print("no configuration meets the target")
+        else:
+            env = " ".join(f"{k}={v}" for k, v in choice["env"].items())
+            print(f"cheapest by {args.cost}: {choice['config']}  ->  {env}")
+    if args.json:
+        args.json.write_text(json.dumps({
+            "folds": args.folds, "horizon": args.horizon, "groups": groups,
+            "test_start": first.isoformat(), "test_end": last.isoformat(),
+            "summary": summary, "choice": choice,
+            "target": {"mape": args.target_mape, "rmse": args.target_rmse, "cost": args.cost},
+        }, indent=2, ensure_ascii=False))
+    if (args.target_mape is not None or args.target_rmse is not None) and choice is None:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# app/bench/forecast_bench.py
+"""
+수요예측 처리량 벤치마크 — 쌍별 predict_one 반복 vs predict_batch
+실행:
+    python -m app.bench.forecast_bench
+    python -m app.bench.forecast_bench --villages 30 --products 200 --days 90 --loop-sample 300
+합성 판매 이력(임시 디렉터리)으로 예측기를 만들고, 학습은 --train-groups개 그룹만 실제로 한 뒤
+나머지 그룹은 그 모델의 사본을 씀 (예측 경로만 측정, 모델 저장소 사용 안 함).
+--mode pooled면 공용 모델 하나를 학습 (사본 없음).
+predict_one 반복은 오래 걸리므로 --loop-sample개 쌍만 재고 items/sec로 비교.
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..services.forecast import FORECAST_MODEL, _MLForecaster
+
+
+def _write_history(base: Path, villages: int, products: int, days: int, seed: int = 7) -> dt.date:
+    rng = np.random.default_rng(seed)
+    last = dt.date(2025, 8, 31)
+    dates = pd.date_range(end=pd.Timestamp(last), periods=days, freq="D")
+    vid, pid, ts = np.meshgrid(np.arange(1, villages + 1), np.arange(101, 101 + products), dates, indexing="ij")
+    n = vid.size
+    dow = pd.DatetimeIndex(ts.ravel()).weekday.to_numpy()
+    base_qty = 15 + (pid.ravel() % 7) * 2 + np.where(np.isin(dow, (1, 4)), 4, 0)
+    df = pd.DataFrame({
+        "ts": ts.ravel(),
+        "village_id": vid.ravel(),
+        "product_id": pid.ravel(),
+        "qty": np.maximum(0, np.round(base_qty * rng.uniform(0.8, 1.2, n))).astype(int),
+        "price": 3000,
+        "temp": np.round(rng.normal(20, 5, n), 1),
+        "rain": (rng.random(n) < 0.2).astype(int),
+    })
+    (base / "seed").mkdir(parents=True, exist_ok=True)
+    df.to_csv(base / "seed" / "seed_sales.csv", index=False)
+    return last + dt.timedelta(days=1)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="forecast throughput benchmark")
+    ap.add_argument("--villages", type=int, default=30)
+    ap.add_argument("--products", type=int, default=200)
+    ap.add_argument("--days", type=int, default=60)
+    ap.add_argument("--train-groups", type=int, default=3, help="실제로 학습할 그룹 수 (나머지는 사본)")
+    ap.add_argument("--loop-sample", type=int, default=200, help="predict_one 반복으로 잴 쌍 수")
+    ap.add_argument("--mode", choices=("per_group", "pooled"),
+                    default=FORECAST_MODEL if FORECAST_MODEL in ("per_group", "pooled") else "per_group")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = _write_history(Path(tmp), args.villages, args.products, args.days)
+        t0 = time.perf_counter()
+        ml = _MLForecaster(Path(tmp), store=None, mode=args.mode)
+        load_ms = (time.perf_counter() - t0) * 1e3
+        pairs = ml.groups()
+        t0 = time.perf_counter()
+        trained = ml.training_keys()[: max(1, args.train_groups)]
+        for vid, pid in trained:
+            ml._ensure_model(vid, pid)
+        train_s = time.perf_counter() - t0
+        if ml.mode == "per_group":
+            for i, key in enumerate(pairs):
+                src = trained[i % len(trained)]
+                ml._models[key] = dict(ml._models[src])  # 그룹별 모델 묶음 (공용 모델 아님)
+                ml._sigmas[key] = ml._sigmas[src]
+
+        sample = pairs[:: max(1, len(pairs) // max(1, args.loop_sample))][: args.loop_sample]
+        t0 = time.perf_counter()
+        loop_items = [ml.predict_one(v, p, target) for v, p in sample]
+        loop_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch_items = ml.predict_batch(pairs, target)
+        batch_s = time.perf_counter() - t0
+
+        by_key = {(it.village_id, it.product_id): it for it in batch_items if it is not None}
+        mismatch = sum(
+            1 for it in loop_items
+            if (it.qty, it.conf_low, it.conf_high) != (lambda b: (b.qty, b.conf_low, b.conf_high))(by_key[(it.village_id, it.product_id)])
+        )
+
+    print(f"history rows : {len(pairs) * args.days} ({len(pairs)} groups, load {load_ms:.0f} ms, train {train_s:.1f} s for {len(trained)} groups)")
+    print(f"{'path':>12} {'items':>7} {'seconds':>9} {'items/s':>10}")
+    print(f"{'predict_one':>12} {len(sample):>7} {loop_s:>9.3f} {len(sample) / loop_s:>10.1f}")
+    print(f"{'batch':>12} {len(pairs):>7} {batch_s:>9.3f} {len(pairs) / batch_s:>10.1f}")
+    print(f"speedup x{(len(pairs) / batch_s) / (len(sample) / loop_s):.1f}, mismatched items: {mismatch}/{len(sample)}")
+    return 1 if mismatch else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
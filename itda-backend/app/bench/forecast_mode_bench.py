@@ -0,0 +1,100 @@
+# app/bench/forecast_mode_bench.py
+"""
+그룹별 앙상블(per_group) vs 공용 모델(pooled) — 학습 시간/모델 메모리/예측 지연 비교
+실행:
+    python -m app.bench.forecast_mode_bench
+    python -m app.bench.forecast_mode_bench --groups 1000 10000 --days 45 --request 300
+per_group 학습은 --train-sample개 그룹만 실제로 돌리고 그룹 수만큼 선형 외삽 (표에 "~" 표시),
+예측은 나머지 그룹에 학습된 모델 사본을 붙여 측정 (전체 그룹 예측은 --predict-sample개로 외삽).
+pooled는 전체 이력으로 실제 학습/예측.
+model_mb = 직렬화(joblib) 크기 — 상주 메모리의 근사치
+"""
+from __future__ import annotations
+import argparse
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+
+from ..services.forecast import _MLForecaster
+from .forecast_bench import _write_history
+
+
+def _size_mb(obj) -> float:
+    buf = io.BytesIO()
+    joblib.dump(obj, buf)
+    return buf.tell() / 1e6
+
+
+def _split(groups: int):
+    """groups ≈ 마을 × 상품 (마을 최대 100)"""
+    villages = min(100, max(1, groups // 100)) if groups >= 100 else 1
+    return villages, max(1, groups // villages)
+
+
+def _per_group(ml: _MLForecaster, pairs, target, args):
+    trained = pairs[: args.train_sample]
+    t0 = time.perf_counter()
+    for key in trained:
+        ml._ensure_model(*key)
+    train_s = (time.perf_counter() - t0) / len(trained) * len(pairs)
+    model_mb = sum(_size_mb(ml._models[k]) for k in trained) / len(trained) * len(pairs)
+    for i, key in enumerate(pairs):
+        src = trained[i % len(trained)]
+        ml._models[key] = dict(ml._models[src])
+        ml._sigmas[key] = ml._sigmas[src]
+    req = pairs[: args.request]
+    t0 = time.perf_counter()
+    ml.predict_batch(req, target)
+    req_ms = (time.perf_counter() - t0) * 1e3
+    sample = pairs[: args.predict_sample]
+    t0 = time.perf_counter()
+    ml.predict_batch(sample, target)
+    rate = len(sample) / (time.perf_counter() - t0)
+    return train_s, model_mb, req_ms, rate, True
+
+
+def _pooled(ml: _MLForecaster, pairs, target, args):
+    t0 = time.perf_counter()
+    ml.pretrain_all()
+    train_s = time.perf_counter() - t0
+    model_mb = _size_mb(ml._models[(0, 0)])
+    req = pairs[: args.request]
+    t0 = time.perf_counter()
+    ml.predict_batch(req, target)
+    req_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    ml.predict_batch(pairs, target)
+    rate = len(pairs) / (time.perf_counter() - t0)
+    return train_s, model_mb, req_ms, rate, False
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="per-group vs pooled forecast model benchmark")
+    ap.add_argument("--groups", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--days", type=int, default=45)
+    ap.add_argument("--request", type=int, default=300, help="요청 한 건의 (마을, 상품) 쌍 수")
+    ap.add_argument("--train-sample", type=int, default=3)
+    ap.add_argument("--predict-sample", type=int, default=300)
+    args = ap.parse_args(argv)
+
+    print(f"{'groups':>7} {'mode':>10} {'train_s':>9} {'model_mb':>10} {'request_ms':>11} {'items/s':>9}")
+    for groups in args.groups:
+        villages, products = _split(groups)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = _write_history(Path(tmp), villages, products, args.days)
+            for mode, run in (("per_group", _per_group), ("pooled", _pooled)):
+                ml = _MLForecaster(Path(tmp), store=None, mode=mode)
+                pairs = ml.groups()
+                train_s, model_mb, req_ms, rate, est = run(ml, pairs, target, args)
+                mark = "~" if est else " "
+                print(f"{len(pairs):>7} {mode:>10} {mark}{train_s:>8.1f} {mark}{model_mb:>9.1f} "
+                      f"{req_ms:>11.1f} {rate:>9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# app/bench/matrix_bench.py
+"""
+거리 행렬 생성 시간 벤치마크
+실행:
+    python -m app.bench.matrix_bench
+    python -m app.bench.matrix_bench --sizes 50 500 5000 --repeat 5
+비교:
+    - numpy : services.matrix.route_matrix (브로드캐스트 + 대칭 절반)
+    - scalar: 기존 방식 (haversine_km 이중 루프, 큰 n은 시간이 오래 걸려 기본 생략)
+"""
+from __future__ import annotations
+import argparse
+import time
+from typing import List
+
+import numpy as np
+
+from ..services.geo import haversine_km
+from ..services.matrix import route_matrix
+
+
+def _random_points(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    # 전남 영광/함평 일대 (데모 차량 좌표 부근)
+    lats = 35.20 + rng.random(n) * 0.30
+    lons = 126.35 + rng.random(n) * 0.35
+    return lats, lons
+
+
+def _scalar_matrix(start, lats, lons) -> List[List[float]]:
+    pts = [start] + list(zip(lats.tolist(), lons.tolist()))
+    m = len(pts)
+    D = [[0.0] * m for _ in range(m)]
+    for i in range(m):
+        for j in range(m):
+            if i != j:
+                D[i][j] = haversine_km(pts[i][0], pts[i][1], pts[j][0], pts[j][1])
+    return D
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="distance matrix build benchmark")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scalar-max", type=int, default=500, help="scalar 비교를 수행할 최대 n")
+    args = ap.parse_args(argv)
+
+    start = (35.281, 126.502)
+    print(f"{'stops':>7} {'numpy_ms':>10} {'scalar_ms':>11} {'speedup':>8}")
+    for n in args.sizes:
+        lats, lons = _random_points(n)
+        t_np = _best_of(lambda: route_matrix(start, lats, lons), args.repeat)
+        if n <= args.scalar_max:
+            D_ref = np.asarray(_scalar_matrix(start, lats, lons))
+            assert np.allclose(route_matrix(start, lats, lons), D_ref, atol=1e-9)
+            t_sc = _best_of(lambda: _scalar_matrix(start, lats, lons), 1)
+            print(f"{n:>7} {t_np * 1e3:>10.2f} {t_sc * 1e3:>11.1f} {t_sc / t_np:>7.0f}x")
+        else:
+            print(f"{n:>7} {t_np * 1e3:>10.2f} {'-':>11} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# app/bench/solver_bench.py
+"""
+경로 풀이 엔진(services.solver) 벤치마크 — 배포 전 품질/속도 회귀 확인용
+실행:
+    python -m app.bench.solver_bench
+    python -m app.bench.solver_bench --sizes 5 15 200 1000 --kinds random --repeat 1
+    python -m app.bench.solver_bench --refs app/bench/solver_refs.json --update-refs
+    python -m app.bench.solver_bench --max-gap 3.0      # 기준 대비 3% 초과 시 종료코드 1
+인스턴스: 시드 고정 random(균등) / clustered(가우시안 군집), 5 ~ 5000 정류장
+측정: 전략별 wall time, tracemalloc 최대 메모리, 경로 길이, 기준해 대비 gap(%)
+기준해(reference):
+    - n <= exact_max_n() : Held–Karp 최적해
+    - 그 외 : refs 파일의 최선값과 이번 실행 최선값(anytime 긴 예산 포함) 중 작은 값
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..services.matrix import route_matrix
+from ..services.solver import LARGE_N, solve
+from ..services.tsp import exact_max_n
+
+START = (35.281, 126.502)
+
+
+def _instance(kind: str, n: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed * 100_003 + n)
+    if kind == "clustered":
+        # 마을 군락: 군집 중심 주변에 몰린 정류장
+        k = max(1, n // 25)
+        c_lat = 35.20 + rng.random(k) * 0.30
+        c_lon = 126.35 + rng.random(k) * 0.35
+        which = rng.integers(0, k, n)
+        lats = c_lat[which] + rng.normal(0, 0.01, n)
+        lons = c_lon[which] + rng.normal(0, 0.01, n)
+    else:
+        lats = 35.20 + rng.random(n) * 0.30
+        lons = 126.35 + rng.random(n) * 0.35
+    return lats, lons
+
+
+def _strategies(n: int, budget: float) -> List[Tuple[str, Optional[float]]]:
+    out: List[Tuple[str, Optional[float]]] = []
+    if n <= exact_max_n():
+        out.append(("exact", None))
+    out.append(("greedy_ls", None))
+    if n > exact_max_n():
+        out.append(("anytime", budget))
+    if n >= max(200, LARGE_N // 10):
+        out.append(("cluster", None))
+    return out
+
+
+def _run(strategy: str, budget: Optional[float], lats, lons, D) -> Tuple[float, float, float]:
+    """(wall ms, 최대 메모리 MB, 경로 길이) — 행렬 생성은 제외"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    res = solve(START, lats, lons, D, strategy=strategy, time_budget_s=budget, parallel=False)
+    wall = (time.perf_counter() - t0) * 1e3
+    _cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return wall, peak / 1e6, float(res["cost"])
+
+
+def _load_refs(path: Optional[Path]) -> Dict[str, float]:
+    if path and path.exists():
+        return json.loads(path.read_text())
+    return {}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="route solver benchmark")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 15, 50, 200, 1000, 5000])
+    ap.add_argument("--kinds", nargs="+", default=["random", "clustered"], choices=["random", "clustered"])
+    ap.add_argument("--seeds", type=int, nargs="+", default=[1])
+    ap.add_argument("--budget", type=float, default=2.0, help="anytime 전략 시간 예산(초)")
+    ap.add_argument("--ref-budget", type=float, default=10.0, help="기준해 탐색용 anytime 예산(초), 0이면 생략")
+    ap.add_argument("--refs", type=Path, default=None, help="기준해 JSON (key -> 최선 길이)")
+    ap.add_argument("--update-refs", action="store_true", help="더 좋은 해를 refs 파일에 기록")
+    ap.add_argument("--max-gap", type=float, default=None, help="gap(%) 상한 — 초과 시 종료코드 1")
+    args = ap.parse_args(argv)
+
+    refs = _load_refs(args.refs)
+    worst = 0.0
+    print(f"{'kind':>9} {'stops':>6} {'seed':>4} {'strategy':>10} {'wall_ms':>9} {'peak_mb':>8} {'length':>10} {'gap_%':>7}")
+    for kind in args.kinds:
+        for n in args.sizes:
+            for seed in args.seeds:
+                lats, lons = _instance(kind, n, seed)
+                D = route_matrix(START, lats, lons)
+                rows = [(name, *_run(name, budget, lats, lons, D)) for name, budget in _strategies(n, args.budget)]
+                key = f"{kind}:{n}:{seed}"
+                best = min(r[3] for r in rows)
+                if n > exact_max_n() and args.ref_budget > 0:
+                    best = min(best, _run("anytime", args.ref_budget, lats, lons, D)[2])
+                if n <= exact_max_n():
+                    ref = next(r[3] for r in rows if r[0] == "exact")
+                else:
+                    ref = min(best, refs.get(key, np.inf))
+                refs[key] = ref
+                for name, wall, peak, length in rows:
+                    gap = (length / ref - 1.0) * 100.0 if ref > 0 else 0.0
+                    worst = max(worst, gap)
+                    print(f"{kind:>9} {n:>6} {seed:>4} {name:>10} {wall:>9.1f} {peak:>8.2f} {length:>10.2f} {gap:>7.2f}")
+
+    if args.refs and args.update_refs:
+        args.refs.write_text(json.dumps(refs, indent=2, sort_keys=True))
+    if args.max_gap is not None and worst > args.max_gap:
+        print(f"FAIL: worst gap {worst:.2f}% > {args.max_gap}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# app/bench/startup_bench.py
+"""
+API 기동 시간 벤치마크 — `import app.main` 시간과 서버 실행 후 첫 /healthz 응답까지 시간
+실행 (itda-backend 디렉터리에서):
+    python -m app.bench.startup_bench
+    python -m app.bench.startup_bench --runs 5 --max-import-s 1.5 --max-healthz-s 3
+매 측정은 새 인터프리터(하위 프로세스)에서 — 이미 로드된 모듈/바이트코드 캐시 외 공유 없음.
+import 직후 무거운 ML/과학 라이브러리(--forbid)가 올라와 있으면 실패 (지연 import 회귀 확인, 종료코드 1).
+서버는 uvicorn으로 띄우고, 모델 저장소/DB는 임시 디렉터리 (warm-up 학습·판매 이력 적재가 실제 저장소를 건드리지 않도록)
+판매 이력 적재(최초 1회)는 측정 전에 미리 — 반복 기동 시간만 측정
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_ROOT = Path(__file__).resolve().parent.parent.parent  # itda-backend
+_HEAVY = ["pandas", "sklearn", "xgboost", "scipy", "ortools"]
+
+_IMPORT_CODE = """
+import json, sys, time
+t = time.perf_counter()
+import app.main
+dt = time.perf_counter() - t
+print(json.dumps({"import_s": dt, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+_PREPARE_CODE = """
+from app.db import create_db_and_tables
+from app.services import sales_store
+create_db_and_tables()
+sales_store.ensure_ready()
+"""
+
+
+def _env(tmp: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    env["ITDA_MODEL_DIR"] = tmp
+    env["ITDA_DB_PATH"] = str(Path(tmp) / "itda.db")
+    return env
+
+
+def _import_once(env: Dict[str, str], forbid: List[str]) -> Dict:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_CODE % (forbid,)], cwd=_ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _healthz_once(env: Dict[str, str], timeout_s: float) -> Optional[float]:
+    """서버 프로세스 시작 → /healthz 200까지 초 (timeout이면 None)"""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/healthz"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=_ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - t0 < timeout_s:
+            if proc.poll() is not None:
+                return None
+            try:
+                with urllib.request.urlopen(url, timeout=0.5) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.01)
+        return None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="API startup benchmark")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--no-server", action="store_true", help="import 시간만 측정")
+    ap.add_argument("--timeout", type=float, default=60.0, help="서버 1회 기동 대기 상한(초)")
+    ap.add_argument("--forbid", nargs="*", default=_HEAVY, help="import 직후 로드되면 안 되는 모듈")
+    ap.add_argument("--max-import-s", type=float, default=None, help="import 중앙값 상한 — 초과 시 종료코드 1")
+    ap.add_argument("--max-healthz-s", type=float, default=None, help="첫 /healthz 중앙값 상한 — 초과 시 종료코드 1")
+    args = ap.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(tmp)
+        subprocess.run([sys.executable, "-c", _PREPARE_CODE], cwd=_ROOT, env=env, check=True)  # 표 생성 + 판매 이력 적재
+        _import_once(env, args.forbid)  # 바이트코드 캐시 준비 (측정 제외)
+        runs = [_import_once(env, args.forbid) for _ in range(args.runs)]
+        imp = [r["import_s"] for r in runs]
+        loaded = sorted({m for r in runs for m in r["loaded"]})
+        print(f"{'metric':>12} {'median_s':>9} {'min_s':>7} {'max_s':>7}")
+        print(f"{'import':>12} {statistics.median(imp):>9.3f} {min(imp):>7.3f} {max(imp):>7.3f}")
+        if loaded:
+            print(f"FAIL: heavy modules loaded at import: {', '.join(loaded)}")
+            failed = True
+        if args.max_import_s is not None and statistics.median(imp) > args.max_import_s:
+            print(f"FAIL: import {statistics.median(imp):.3f}s > {args.max_import_s}s")
+            failed = True
+
+        if not args.no_server:
+            hz = [_healthz_once(env, args.timeout) for _ in range(args.runs)]
+            ok = [t for t in hz if t is not None]
+            if len(ok) < len(hz):
+                print(f"FAIL: server did not answer /healthz in {args.timeout}s ({len(hz) - len(ok)} runs)")
+                failed = True
+            if ok:
+                print(f"{'healthz':>12} {statistics.median(ok):>9.3f} {min(ok):>7.3f} {max(ok):>7.3f}")
+                if args.max_healthz_s is not None and statistics.median(ok) > args.max_healthz_s:
+                    print(f"FAIL: first /healthz {statistics.median(ok):.3f}s > {args.max_healthz_s}s")
+                    failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
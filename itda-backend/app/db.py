@@ -1,11 +1,12 @@
 # app/db.py
 from __future__ import annotations
 from pathlib import Path
+import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 BASE_DIR = Path(__file__).resolve().parent
-DB_PATH = BASE_DIR / "itda.db"
+DB_PATH = Path(os.getenv("ITDA_DB_PATH", str(BASE_DIR / "itda.db")))
 DATABASE_URL = f"sqlite:///{DB_PATH.as_posix()}"
 
 engine = create_engine(
@@ -8,6 +8,7 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from .db import create_db_and_tables
+from .services import sales_store, train_scheduler
 
 from .routers import route, demand, care, alerts, inventory, sales, analytics
 from .routers import vehicles
@@ -41,6 +42,14 @@ app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 def on_startup() -> None:
     # SQLite 테이블 생성 (모델 기준으로 자동 생성)
     create_db_and_tables()
+    # 판매 이력 표가 비어 있으면 seed CSV 일괄 적재 (최초 1회)
+    sales_store.ensure_ready()
+    # 수요예측 모델 백그라운드 warm-up (준비 전에는 규칙 기반 예측)
+    train_scheduler.start_background()
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    train_scheduler.shutdown()
 
 @app.get("/")
 def root():
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Integer, String, DateTime, ForeignKey
+from sqlalchemy import Integer, String, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 
@@ -39,3 +39,21 @@ class AlertResolved(Base):
     __tablename__ = "alerts_resolved"
     id: Mapped[str] = mapped_column(String(32), primary_key=True)  # 알림 ID(md5 10자리여도 열로 32)
     resolved_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class Sale(Base):
+    """판매 이력 (마을 × 상품 × 시각) — 예측/매출 요약/분석/알림이 모두 이 표를 읽음"""
+    __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_ts", "ts"),
+        Index("ix_sales_village_ts", "village_id", "ts"),
+        Index("ix_sales_product_ts", "product_id", "ts"),
+        {"sqlite_autoincrement": True},  # 삭제 후에도 id 재사용 안 함 (version()이 데이터 교체를 알아채도록)
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    ts: Mapped[datetime] = mapped_column(DateTime)
+    village_id: Mapped[int] = mapped_column(Integer)
+    product_id: Mapped[int] = mapped_column(Integer)
+    qty: Mapped[int] = mapped_column(Integer, default=0)
+    price: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    temp: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rain: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
@@ -6,7 +6,6 @@ from typing import List, Dict, Any
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-import pandas as pd
 from pathlib import Path
 from sqlalchemy.orm import Session
 
@@ -14,10 +13,9 @@ from sqlalchemy.orm import Session
 from ..services import forecast
 from ..db import get_db
 from ..models import Customer
+from ..services.sales_store import sales_frame
 
-# --- CSV 파일 경로 설정 ---
 BASE_DIR = Path(__file__).resolve().parent.parent
-SALES_CSV = BASE_DIR / "seed/seed_sales.csv"
 
 router = APIRouter()
 
@@ -50,12 +48,10 @@ def _alerts_from_care(now: datetime, db: Session) -> List[Dict[str, Any]]:
                 })
             
     # --- 2. AI 기반 패턴 분석 알림 (지능형 안전망) ---
-    if not SALES_CSV.exists():
+    sales_df = sales_frame()
+    if sales_df.empty:
         return out
 
-    sales_df = pd.read_csv(SALES_CSV)
-    sales_df['ts'] = pd.to_datetime(sales_df['ts'])
-
     village_customer_map = {}
     for c in customers:
         if c.village_id not in village_customer_map:
@@ -64,7 +60,7 @@ def _alerts_from_care(now: datetime, db: Session) -> List[Dict[str, Any]]:
 
     village_visits = sales_df.drop_duplicates(subset=['ts', 'village_id']).sort_values('ts')
     
-    for village_id, group in village_visits.groupby('village_id'):
+    for village_id, group in village_visits.groupby('village_id', observed=True):
         if len(group) < 3: continue
             
         intervals = group['ts'].diff().dt.days.dropna()
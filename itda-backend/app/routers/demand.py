@@ -1,11 +1,14 @@
 # app/routers/demand.py
-from typing import List
+from typing import List, Optional
 import datetime as dt
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field, conint
 
-from ..services.forecast import forecast
+from ..services.forecast import HORIZON_MAX_DAYS, forecast, forecast_horizon
+from ..services.forecast_cache import get_forecast_cache
+from ..services.train_scheduler import QueueFull, get_scheduler
+from .sales import IngestReq, ingest as sales_ingest
 
 router = APIRouter()
 
@@ -56,3 +59,96 @@ def forecast_api(req: ForecastReq):
             for it in items
         ],
     }
+
+
+class HorizonReq(BaseModel):
+    start: dt.date = Field(..., description="예측 시작일, 예: 2025-08-20")
+    days: conint(ge=1, le=HORIZON_MAX_DAYS) = 7
+    villages: List[conint(ge=1)]
+    products: List[conint(ge=1)]
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {"start": "2025-08-20", "days": 7, "villages": [1, 2], "products": [101, 102]}
+        },
+    }
+
+
+@router.post("/forecast/horizon")
+def forecast_horizon_api(req: HorizonReq):
+    """
+    start부터 days일 예측을 한 번에 — 쌍마다 dates와 같은 순서의 qty/conf_low/conf_high 배열
+    """
+    try:
+        return forecast_horizon(req.start.isoformat(), req.days, req.villages, req.products)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"forecast error: {e}")
+
+
+@router.get("/forecast-cache")
+def forecast_cache_stats():
+    """예측 결과 캐시 적중률/메모리 사용량"""
+    return get_forecast_cache().stats()
+
+
+# ====== 모델 학습 작업 (services.train_scheduler) ======
+class TrainReq(BaseModel):
+    # 비우면 전체 (village_id, product_id) 그룹
+    villages: Optional[List[conint(ge=1)]] = None
+    products: Optional[List[conint(ge=1)]] = None
+    force: bool = False  # 저장소에 같은 데이터로 학습된 모델이 있어도 다시 학습
+
+
+def _scheduler():
+    sched = get_scheduler()
+    if sched is None:
+        raise HTTPException(status_code=503, detail="ML forecaster unavailable")
+    return sched
+
+
+@router.post("/train", status_code=202)
+def train_start(req: TrainReq):
+    sched = _scheduler()
+    groups = [
+        (v, p) for v, p in sched.ml.groups()
+        if (req.villages is None or v in req.villages) and (req.products is None or p in req.products)
+    ]
+    if not groups:
+        raise HTTPException(status_code=422, detail="no sales history for the requested groups")
+    try:
+        job = sched.submit(groups, force=req.force)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict()
+
+
+@router.get("/train")
+def train_status():
+    sched = _scheduler()
+    return {"scheduler": sched.info(), "jobs": [j.to_dict() for j in reversed(sched.jobs())]}
+
+
+@router.get("/train/{job_id}")
+def train_job(job_id: str):
+    job = _scheduler().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_dict()
+
+
+@router.delete("/train/{job_id}")
+def train_cancel(job_id: str):
+    sched = _scheduler()
+    job = sched.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    if job.status not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"job already {job.status}")
+    return sched.cancel(job_id).to_dict()
+
+
+# ====== 판매 데이터 적재 (이전 경로) ======
+@router.post("/ingest", deprecated=True)
+def ingest(req: IngestReq):
+    """/sales/ingest의 이전 경로 — 기존 클라이언트 호환용 (같은 처리, 같은 응답)"""
+    return sales_ingest(req)
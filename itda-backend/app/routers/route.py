@@ -1,11 +1,36 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from math import radians, sin, cos, asin, sqrt
-from typing import List, Optional, Tuple, Dict
-
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..models import InventoryItem
+from ..services.batch import RouteProblem, solve_batch
+from ..services.cluster import FULL_MATRIX_MAX_N
+from ..services.fleet import FleetStop, FleetVehicle, solve_fleet
+from ..services.geo import SpatialIndex
+from ..services.local_search import path_legs
+from ..services.matrix_cache import cached_route_matrix, get_cache
+from ..services.repair import repair_route
+from ..services.roadnet import get_network, road_route_matrices, symmetric
+from ..services.solver import LARGE_N, itinerary, priority_weights, select_stops, solve
+from ..services.tsp import (  # noqa: F401  (기존 import 경로 유지)
+    exact_max_n,
+    solve_open_path,
+    tsp_anytime,
+    tsp_greedy_2opt,
+    tsp_open_path_exact,
+)
 
 router = APIRouter()
 
@@ -15,209 +40,444 @@ class VillageIn(BaseModel):
     id: int
     lat: float
     lon: float
-    priority: Optional[float] = None  # 현재 로직에선 경로에 영향 없음(확장 여지)
+    priority: Optional[float] = None  # 0~1, max_stops 선택/구성 순서에 반영 (services.solver)
 
 
 class VehicleIn(BaseModel):
     start_lat: float
     start_lon: float
-    max_stops: Optional[int] = None  # 상한 지정 시 앞에서 자름
+    max_stops: Optional[int] = None  # 상한 지정 시 우선순위 높은 순(같으면 입력 순)으로 남김
 
 
 class RouteReq(BaseModel):
     villages: List[VillageIn]
     vehicle: VehicleIn
+    mode: Literal["auto", "large"] = "auto"  # large: 군집 분할 풀이 강제 (auto는 LARGE_N 이상일 때)
+    cluster_size: Optional[int] = Field(None, ge=2)  # 군집당 목표 마을 수
+    cluster_method: Literal["kmeans", "sweep"] = "kmeans"
+    # road: 도로망 이동시간 — 도로망이 없으면 422, 군집 분할(large) 풀이는 haversine으로 풀고 warning 표시
+    metric: Literal["haversine", "road"] = "haversine"
+    strategy: Literal["auto", "exact", "greedy_ls", "anytime", "cluster"] = "auto"
+    time_budget_s: Optional[float] = Field(None, gt=0, le=60)  # 주면 auto가 anytime 탐색 선택
+
+
+class StreamRouteReq(BaseModel):
+    villages: List[VillageIn]
+    vehicle: VehicleIn
+    time_budget_s: float = Field(5.0, gt=0, le=60)
+    min_interval_ms: float = Field(200.0, ge=0)  # 개선 해 전송 최소 간격
+
+
+class RouteStopIn(BaseModel):
+    """/optimize 응답의 ordered_stops 항목 (그 외 필드는 무시)"""
+    village_id: int
+    lat: float
+    lon: float
+
+
+class RepairReq(BaseModel):
+    vehicle: VehicleIn  # 차량 현재 위치 (max_stops 무시)
+    ordered_stops: List[RouteStopIn]  # 아직 방문하지 않은 정류장, 현재 순서
+    insert: List[VillageIn] = []
+    remove: List[int] = []  # 취소할 village_id
+    max_span: Optional[int] = Field(None, ge=1)  # 국소 개선 허용 이동 폭 (정류장 수)
+
+
+BATCH_MAX_PROBLEMS = int(os.getenv("ITDA_BATCH_MAX", "100"))
+
 
+class BatchRouteReq(BaseModel):
+    problems: List[RouteReq] = Field(..., min_length=1, max_length=BATCH_MAX_PROBLEMS)
+    parallel: bool = True  # False면 요청 스레드에서 직렬 풀이
 
-# ====== Geo utils ======
-def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Kilometers"""
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    return 2 * R * asin(sqrt(a))
 
+class FleetVehicleIn(BaseModel):
+    id: int
+    start_lat: Optional[float] = None  # 미지정 시 /vehicles 현재 위치
+    start_lon: Optional[float] = None
+    capacity: Optional[int] = None  # 미지정 시 InventoryItem 적재량 합계
+    max_shift_min: float = Field(480.0, gt=0)
+
+
+class FleetReq(BaseModel):
+    villages: List[VillageIn]
+    vehicles: List[FleetVehicleIn] = []  # 비우면 운행 차량 전체
+    date: Optional[str] = None  # 수요 예측 기준일 (기본: 오늘)
+    demand: Optional[Dict[int, int]] = None  # village_id -> 수요, 지정 시 예측 생략
+    service_min: float = Field(10.0, ge=0)  # 마을당 체류시간
+    time_limit_s: float = Field(5.0, gt=0, le=60)
 
+
+# ====== Distance matrix ======
 def build_dist_matrix(
     start: Tuple[float, float], villages: List[VillageIn]
-) -> List[List[float]]:
+) -> np.ndarray:
     """
     D[0][j+1] : start -> village j
     D[i+1][j+1] : village i -> village j
+    (n+1)×(n+1) float64 배열 — 마을-마을 블록은 디스크 캐시, 출발지 행만 새로 계산
     """
-    n = len(villages)
-    D = [[0.0] * (n + 1) for _ in range(n + 1)]
-    for j in range(n):
-        d = haversine(start[0], start[1], villages[j].lat, villages[j].lon)
-        D[0][j + 1] = D[j + 1][0] = d
-    for i in range(n):
-        for j in range(n):
-            if i == j:
-                continue
-            D[i + 1][j + 1] = haversine(
-                villages[i].lat, villages[i].lon, villages[j].lat, villages[j].lon
-            )
-    return D
+    return cached_route_matrix(
+        start, [v.id for v in villages], [v.lat for v in villages], [v.lon for v in villages]
+    )
 
 
-# ====== TSP solver (open path: start -> visit all -> stop) ======
-def tsp_open_path_exact(D: List[List[float]]) -> Tuple[float, List[int]]:
-    """
-    Held–Karp DP (open path).
-    - Nodes: 1..n (villages), 0 = start only.
-    - Minimize cost: start(0) -> ... -> end(any)
-    Returns (min_cost, order of villages as indices 1..n).
-    NOTE: O(n^2 2^n) — n<=14 권장.
-    """
-    n = len(D) - 1  # number of villages
-    if n == 0:
-        return 0.0, []
-    if n == 1:
-        return float(D[0][1]), [1]
-
-    # dp[mask][j] = (cost, prev) :
-    #   start(0)에서 시작, mask(1..n 비트) 방문 상태로 j(1..n)에서 끝났을 때 최소 비용과 이전 노드
-    dp: List[Dict[int, Tuple[float, Optional[int]]]] = [dict() for _ in range(1 << n)]
-
-    # 초기: start -> j
-    for j in range(1, n + 1):
-        mask = 1 << (j - 1)
-        dp[mask][j] = (float(D[0][j]), 0)
-
-    # 전개: 존재하는 상태만 확장
-    for mask in range(1 << n):
-        for j, (cost_j, _prev) in list(dp[mask].items()):
-            # j에서 방문 안 한 k로 확장
-            for k in range(1, n + 1):
-                if mask & (1 << (k - 1)):
-                    continue
-                nmask = mask | (1 << (k - 1))
-                new_cost = cost_j + float(D[j][k])
-                if (k not in dp[nmask]) or (new_cost < dp[nmask][k][0]):
-                    dp[nmask][k] = (new_cost, j)
-
-    full = (1 << n) - 1
-    if not dp[full]:
-        raise ValueError("DP table empty at full mask")
-
-    # 끝점 선택(열린 경로)
-    end = min(dp[full].keys(), key=lambda j: dp[full][j][0])
-    best_cost = dp[full][end][0]
-
-    # 경로 복원 (항상 실제로 존재하는 상태만 추적)
-    order_rev: List[int] = []
-    mask = full
-    j = end
-    while True:
-        order_rev.append(j)
-        _cost, prev = dp[mask][j]
-        if prev == 0:
-            break
-        mask ^= 1 << (j - 1)
-        j = prev  # prev는 1..n
-
-    order = list(reversed(order_rev))  # indices 1..n
-    return best_cost, order
-
-
-def tsp_greedy_2opt(D: List[List[float]]) -> Tuple[float, List[int]]:
-    """
-    Fallback for 큰 n. Greedy + 2-opt 개선. Indices in 1..n.
-    """
-    n = len(D) - 1
-    if n == 0:
-        return 0.0, []
-
-    # greedy from start(0)
-    unvisited = set(range(1, n + 1))
-    order: List[int] = []
-    curr = 0
-    while unvisited:
-        nxt = min(unvisited, key=lambda j: D[curr][j])
-        order.append(nxt)
-        unvisited.remove(nxt)
-        curr = nxt
-
-    def route_cost(ordr: List[int]) -> float:
-        if not ordr:
-            return 0.0
-        cost = D[0][ordr[0]]
-        for a, b in zip(ordr[:-1], ordr[1:]):
-            cost += D[a][b]
-        return cost
-
-    improved = True
-    while improved:
-        improved = False
-        for i in range(len(order) - 2):
-            for j in range(i + 2, len(order)):
-                new_order = order[:]
-                new_order[i + 1 : j + 1] = reversed(new_order[i + 1 : j + 1])
-                if route_cost(new_order) + 1e-9 < route_cost(order):
-                    order = new_order
-                    improved = True
-    return route_cost(order), order
-
-
-AVG_SPEED_KMPH = 35.0  # 간단 추정 속도
+AVG_SPEED_KMPH = 35.0  # 간단 추정 속도 (geo.travel_minutes 기본값과 같음)
+NO_ROADNET = "metric=road requires a road network (ITDA_ROADNET_DIR) and none is loaded"
+# 군집 분할 풀이는 군집/전역 개선 모두 좌표 기반 (도로 행렬은 n²라 large 규모에선 만들지 않음)
+ROAD_LARGE_WARNING = "metric=road is not supported on the large (cluster) path; route ordered by haversine distance"
+
+
+def _request_villages(req) -> List[VillageIn]:
+    return select_stops(req.villages, req.vehicle.max_stops)
+
+
+def _is_large(req: RouteReq, n: int) -> bool:
+    """mode="large"는 strategy와 무관하게 군집 분할, 그 외엔 strategy 우선"""
+    if req.mode == "large":
+        return True
+    if req.strategy != "auto":
+        return req.strategy == "cluster"
+    return n >= LARGE_N
+
+
+def _strategy(req: RouteReq, n: int) -> str:
+    return "cluster" if _is_large(req, n) else req.strategy
 
 
 @router.post("/optimize")
 def optimize(req: RouteReq):
-    villages = req.villages[:]
-    if req.vehicle.max_stops:
-        villages = villages[: max(0, req.vehicle.max_stops)]
-
+    villages = _request_villages(req)
     start = (req.vehicle.start_lat, req.vehicle.start_lon)
-    D = build_dist_matrix(start, villages)
-
     n = len(villages)
-    # 정확해(<=14)는 DP 사용, 실패 시 폴백
-    if n <= 14:
-        try:
-            total_km, order_idx = tsp_open_path_exact(D)
-        except Exception:
-            total_km, order_idx = tsp_greedy_2opt(D)
-    else:
-        total_km, order_idx = tsp_greedy_2opt(D)
-
-    # build response
-    # order_idx: e.g. [3,1,2] meaning visit villages[2] -> villages[0] -> villages[1]
-    ordered = []
-    now = datetime.now()
-
-    def eta_after_km(km: float) -> datetime:
-        minutes = (km / AVG_SPEED_KMPH) * 60.0
-        return now + timedelta(minutes=minutes)
-
-    # cumulative distances for ETA
-    cum_km = 0.0
-    if order_idx:
-        # distance from start to first
-        first = order_idx[0]
-        cum_km += D[0][first]
-
-    for idx_pos, idx1 in enumerate(order_idx):
-        v = villages[idx1 - 1]
-        eta = eta_after_km(cum_km)
-        ordered.append(
-            {
-                "village_id": v.id,
-                "lat": v.lat,
-                "lon": v.lon,
-                "distance_km": round(cum_km, 1),
-                "eta": eta.isoformat(),
-            }
+    large = _is_large(req, n)
+    if req.strategy == "exact" and not large and n > exact_max_n():
+        raise HTTPException(status_code=422, detail=f"exact strategy supports up to {exact_max_n()} villages")
+    if req.metric == "road" and get_network() is None:
+        raise HTTPException(status_code=422, detail=NO_ROADNET)
+
+    if req.metric == "road" and not large:
+        roads = road_route_matrices(
+            start, [v.id for v in villages], [v.lat for v in villages], [v.lon for v in villages]
         )
-        if idx_pos < len(order_idx) - 1:
-            idx2 = order_idx[idx_pos + 1]
-            cum_km += D[idx1][idx2]
+        return _optimize_road(req, villages, start, *roads)
+
+    t0 = time.perf_counter()
+    D = build_dist_matrix(start, villages) if not large or n <= FULL_MATRIX_MAX_N else None
+    matrix_ms = (time.perf_counter() - t0) * 1e3
+    res = solve(
+        start,
+        [v.lat for v in villages],
+        [v.lon for v in villages],
+        D,
+        weights=priority_weights([v.priority for v in villages]),
+        strategy=_strategy(req, n),
+        time_budget_s=req.time_budget_s,
+        cluster_size=req.cluster_size,
+        cluster_method=req.cluster_method,
+    )
+    out = _route_response(villages, res["order"], res["legs"], res["cost"])
+    out["metric"] = "haversine"
+    if req.metric == "road":
+        out["warning"] = ROAD_LARGE_WARNING
+    out["strategy"] = res["strategy"]
+    if large:
+        # 군집 분할 → 군집별 병렬 풀이 → 이어 붙이기 → 전역 개선
+        out["decomposition"] = res["decomposition"]
+        out["timings_ms"] = {"matrix_ms": round(matrix_ms, 1), **res["timings_ms"]}
+    return out
+
+
+@router.post("/batch")
+def optimize_batch(req: BatchRouteReq):
+    """
+    여러 경로 문제(what-if 시나리오)를 한 번에 풀이.
+    같은 마을 집합은 거리 블록을 공유하고, 문제별 풀이는 프로세스 풀에서 병렬 실행.
+    문제별 strategy/metric/time_budget_s는 /optimize와 같은 의미 (road 행렬은 요청 스레드에서 만들어 넘김).
+    results는 입력 순서 그대로 (문제별 timing_ms 포함, 실패한 문제는 error).
+    """
+    per_req = [_request_villages(r) for r in req.problems]
+    for i, (r, vs) in enumerate(zip(req.problems, per_req)):
+        if r.strategy == "exact" and not _is_large(r, len(vs)) and len(vs) > exact_max_n():
+            raise HTTPException(
+                status_code=422, detail=f"problems[{i}]: exact strategy supports up to {exact_max_n()} villages"
+            )
+        if r.metric == "road" and get_network() is None:
+            raise HTTPException(status_code=422, detail=f"problems[{i}]: {NO_ROADNET}")
+
+    problems = []
+    roads: Dict[int, Tuple[np.ndarray, np.ndarray, float]] = {}  # 문제 번호 -> (분, km, 행렬 ms)
+    for i, (r, vs) in enumerate(zip(req.problems, per_req)):
+        start = (r.vehicle.start_lat, r.vehicle.start_lon)
+        large = _is_large(r, len(vs))
+        matrix = None
+        if r.metric == "road" and not large:
+            t0 = time.perf_counter()
+            tk = road_route_matrices(start, [v.id for v in vs], [v.lat for v in vs], [v.lon for v in vs])
+            roads[i] = (tk[0], tk[1], (time.perf_counter() - t0) * 1e3)
+            matrix = symmetric(tk[0])
+        problems.append(RouteProblem(
+            start=start,
+            ids=[v.id for v in vs],
+            lats=[v.lat for v in vs],
+            lons=[v.lon for v in vs],
+            large=large,
+            priorities=[v.priority for v in vs],
+            cluster_size=r.cluster_size,
+            cluster_method=r.cluster_method,
+            strategy=_strategy(r, len(vs)),
+            time_budget_s=r.time_budget_s,
+            matrix=matrix,
+        ))
+    batch = solve_batch(problems, parallel=req.parallel)
+
+    results = []
+    for i, (vs, res) in enumerate(zip(per_req, batch["results"])):
+        if "error" in res:
+            results.append({"index": i, "error": res["error"]})
+            continue
+        matrix_ms = res["matrix_ms"]
+        if i in roads:
+            T_min, D_km, matrix_ms = roads[i]
+            legs_km = path_legs(D_km, res["order"])
+            out = {"index": i, **_route_response(vs, res["order"], legs_km, float(legs_km.sum()),
+                                                 path_legs(T_min, res["order"]))}
+            out["metric"] = "road"
+        else:
+            out = {"index": i, **_route_response(vs, res["order"], res["legs"], res["cost"])}
+            out["metric"] = "haversine"
+            if req.problems[i].metric == "road":
+                out["warning"] = ROAD_LARGE_WARNING
+        out["strategy"] = res["strategy"]
+        if "decomposition" in res:
+            out["decomposition"] = res["decomposition"]
+        out["timing_ms"] = {
+            "matrix_ms": round(matrix_ms, 1),
+            "solve_ms": round(res["solve_ms"], 1),
+            "shared_matrix": res["shared_matrix"],
+        }
+        results.append(out)
+    return {
+        "results": results,
+        "batch": {
+            "problems": len(problems),
+            "unique_matrices": batch["unique_matrices"],
+            "workers": batch["workers"],
+            "wall_ms": round(batch["wall_ms"], 1),
+        },
+    }
 
-    est_duration_min = int(round((total_km / AVG_SPEED_KMPH) * 60.0))
+
+def _optimize_road(
+    req: RouteReq, villages: List[VillageIn], start: Tuple[float, float], T_min: np.ndarray, D_km: np.ndarray
+) -> Dict:
+    """도로망 이동시간으로 순서 결정 (대칭화 행렬로 탐색), 거리/ETA는 방향별 실제 값"""
+    res = solve(
+        start,
+        [v.lat for v in villages],
+        [v.lon for v in villages],
+        symmetric(T_min),
+        weights=priority_weights([v.priority for v in villages]),
+        strategy=req.strategy,
+        time_budget_s=req.time_budget_s,
+    )
+    order_idx = res["order"]
+    legs_km = path_legs(D_km, order_idx)
+    out = _route_response(villages, order_idx, legs_km, float(legs_km.sum()), path_legs(T_min, order_idx))
+    out["metric"] = "road"
+    out["strategy"] = res["strategy"]
+    return out
+
+
+def _route_response(
+    villages: List[VillageIn],
+    order_idx: List[int],
+    legs_km: np.ndarray,
+    total_km: float,
+    legs_min: Optional[np.ndarray] = None,
+) -> Dict:
+    """
+    order_idx: e.g. [3,1,2] meaning visit villages[2] -> villages[0] -> villages[1]
+    legs_km[i]: 직전 지점(처음은 출발지) -> order_idx[i] 거리
+    legs_min: 구간 이동시간(분) — 없으면 평균 속도로 추정
+    distance_km는 출발지부터 누적, ETA는 누적 이동시간 기준
+    """
+    ordered, total_min = itinerary(villages, order_idx, legs_km, legs_min)
+    est_duration_min = int(round(total_min))
 
     return {
         "ordered_stops": ordered,
         "total_distance_km": round(total_km, 1),
         "est_duration_min": est_duration_min,
     }
+
+
+@router.websocket("/stream")
+async def optimize_stream(ws: WebSocket):
+    """
+    anytime 경로 풀이 스트리밍 (WebSocket).
+    client → StreamRouteReq JSON 1회, 이후 {"type": "cancel"}로 중단 가능
+    server → {"type": "solution", "phase", ...경로} 구성해 즉시, 이후 더 나은 해마다
+             {"type": "final", "stop_reason", ...경로} 마지막 1회
+    """
+    await ws.accept()
+    try:
+        req = StreamRouteReq.model_validate(await ws.receive_json())
+    except (ValidationError, ValueError) as e:
+        detail = e.errors(include_url=False) if isinstance(e, ValidationError) else str(e)
+        await ws.send_json({"type": "error", "detail": detail})
+        await ws.close(code=1003)
+        return
+    villages = _request_villages(req)
+    if len(villages) > FULL_MATRIX_MAX_N:
+        await ws.send_json({"type": "error", "detail": f"too many villages for streaming: {len(villages)}"})
+        await ws.close(code=1009)
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancel = threading.Event()
+    min_gap = req.min_interval_ms / 1e3
+    start = (req.vehicle.start_lat, req.vehicle.start_lon)
+    t0 = time.perf_counter()
+
+    def run():
+        # 스레드에서 실행 — 해 직렬화까지 여기서 끝내고 이벤트 루프로 넘김
+        D = build_dist_matrix(start, villages)
+        index = None
+        if len(villages) > exact_max_n():
+            index = SpatialIndex([start[0]] + [v.lat for v in villages], [start[1]] + [v.lon for v in villages])
+        last = [-np.inf]
+
+        def on_solution(phase: str, cost: float, order: List[int]) -> None:
+            now = time.perf_counter()
+            if phase in ("improve", "perturb") and now - last[0] < min_gap:
+                return
+            last[0] = now
+            msg = {"type": "solution", "phase": phase, "elapsed_ms": round((now - t0) * 1e3, 1)}
+            msg.update(_route_response(villages, order, path_legs(D, order), cost))
+            loop.call_soon_threadsafe(queue.put_nowait, msg)
+
+        weights = priority_weights([v.priority for v in villages])
+        cost, order, reason = tsp_anytime(
+            D, index, req.time_budget_s, on_solution, cancel.is_set, weights=weights
+        )
+        msg = {"type": "final", "stop_reason": reason, "elapsed_ms": round((time.perf_counter() - t0) * 1e3, 1)}
+        msg.update(_route_response(villages, order, path_legs(D, order), cost))
+        return msg
+
+    async def listen():
+        try:
+            while True:
+                msg = await ws.receive_json()
+                if isinstance(msg, dict) and msg.get("type") == "cancel":
+                    cancel.set()
+                    return
+        except (WebSocketDisconnect, ValueError):
+            cancel.set()
+
+    solver = loop.run_in_executor(None, run)
+    listener = asyncio.create_task(listen())
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _pending = await asyncio.wait({getter, solver}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            await ws.send_json(getter.result())
+        await ws.send_json(await solver)
+        await ws.close()
+    except WebSocketDisconnect:
+        cancel.set()
+        await solver
+    finally:
+        listener.cancel()
+
+
+@router.post("/repair")
+def repair(req: RepairReq):
+    """
+    기존 경로에 마을 추가/취소를 반영 (전체 재계산 없이).
+    취소는 앞뒤 연결, 추가는 최소 비용 위치 삽입, 바뀐 지점 주변만 국소 개선 후 ETA 갱신.
+    """
+    start = (req.vehicle.start_lat, req.vehicle.start_lon)
+    route_in = [VillageIn(id=s.village_id, lat=s.lat, lon=s.lon) for s in req.ordered_stops]
+    res = repair_route(start, route_in, insert=req.insert, remove=req.remove, max_span=req.max_span)
+    stops = res["stops"]
+    out = _route_response(stops, list(range(1, len(stops) + 1)), res["legs_km"], res["total_km"])
+    out["repair"] = {
+        "inserted": res["inserted"],
+        "removed": res["removed"],
+        "ignored": res["ignored"],
+        "changed_edges": res["changed_edges"],
+        "elapsed_ms": round(res["elapsed_ms"], 2),
+    }
+    return out
+
+
+@router.get("/matrix-cache")
+def matrix_cache_stats():
+    """거리 행렬 캐시 적중/미스 통계"""
+    return get_cache().stats()
+
+
+# ====== Fleet (multi-vehicle) ======
+def _fleet_vehicles(req: FleetReq, db: Session) -> List[FleetVehicle]:
+    from .vehicles import _VEHICLES
+
+    specs = req.vehicles or [FleetVehicleIn(id=vid) for vid in sorted(_VEHICLES)]
+    loads = dict(
+        db.execute(
+            select(InventoryItem.vehicle_id, func.sum(InventoryItem.qty)).group_by(InventoryItem.vehicle_id)
+        ).all()
+    )
+    out: List[FleetVehicle] = []
+    for spec in specs:
+        live = _VEHICLES.get(spec.id, {})
+        lat = spec.start_lat if spec.start_lat is not None else live.get("lat")
+        lon = spec.start_lon if spec.start_lon is not None else live.get("lon")
+        if lat is None or lon is None:
+            raise HTTPException(status_code=422, detail=f"vehicle {spec.id}: start position unknown")
+        cap = spec.capacity if spec.capacity is not None else loads.get(spec.id)
+        out.append(FleetVehicle(
+            id=spec.id,
+            start_lat=lat,
+            start_lon=lon,
+            capacity=int(cap) if cap is not None else FleetVehicle.capacity,
+            max_shift_min=spec.max_shift_min,
+        ))
+    return out
+
+
+def _fleet_demand(req: FleetReq, db: Session) -> Dict[int, int]:
+    """마을별 수요 = 적재 상품들의 예측 판매량 합"""
+    if req.demand is not None:
+        return {int(k): int(v) for k, v in req.demand.items()}
+    product_ids = sorted({pid for (pid,) in db.execute(select(InventoryItem.product_id).distinct()).all()})
+    if not product_ids or not req.villages:
+        return {}
+    from ..services import forecast  # 학습 모델 로딩이 무거우므로 필요할 때만
+
+    date = req.date or datetime.now().date().isoformat()
+    demand: Dict[int, int] = {}
+    for it in forecast.forecast(date, [v.id for v in req.villages], product_ids):
+        demand[it.village_id] = demand.get(it.village_id, 0) + int(it.qty)
+    return demand
+
+
+@router.post("/fleet")
+def optimize_fleet(req: FleetReq, db: Session = Depends(get_db)):
+    """
+    여러 차량에 마을을 나눠 배정 (용량 + 근무시간 제약).
+    time_limit_s 안에 찾은 최선의 해를 반환하며, 수용 불가 마을은 dropped에 담김.
+    """
+    vehicles = _fleet_vehicles(req, db)
+    if not vehicles:
+        raise HTTPException(status_code=422, detail="no vehicles")
+    demand = _fleet_demand(req, db)
+    stops = [
+        FleetStop(id=v.id, lat=v.lat, lon=v.lon, demand=demand.get(v.id, 0), service_min=req.service_min)
+        for v in req.villages
+    ]
+    return solve_fleet(stops, vehicles, time_limit_s=req.time_limit_s, avg_kmh=AVG_SPEED_KMPH)
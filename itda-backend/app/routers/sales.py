@@ -1,39 +1,48 @@
 from __future__ import annotations
+from typing import List, Optional
+import datetime as dt
+import os
+
 from fastapi import APIRouter, HTTPException
-import pandas as pd
-from pathlib import Path
+from pydantic import BaseModel, Field, conint
+
+from ..services.forecast import ingest_sales
+from ..services.sales_store import sales_frame
+from ..services.train_scheduler import schedule_refit
 
 router = APIRouter()
 
-# CSV 파일 경로 설정
-BASE_DIR = Path(__file__).resolve().parent.parent
-SALES_CSV = BASE_DIR / "seed/seed_sales.csv"
+INGEST_MAX_ROWS = int(os.getenv("ITDA_INGEST_MAX_ROWS", "50000"))  # 요청 하나당 판매 행 상한
 
 @router.get("/summary")
 def get_sales_summary():
     """일별, 주별, 월별 매출 요약을 제공합니다."""
-    if not SALES_CSV.exists():
+    try:
+        df = sales_frame()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing sales data: {e}")
+    if df.empty:
         raise HTTPException(status_code=404, detail="Sales data not found.")
 
     try:
-        df = pd.read_csv(SALES_CSV)
-        df['ts'] = pd.to_datetime(df['ts'])
-        df['sale'] = df['qty'] * df['price']
+        # 일별 합계를 먼저 — 주별/월별은 일별 표에서 (행 수와 무관)
+        by_day = df.groupby('day')['sale'].sum()
 
         # 일별 매출
-        daily_sales = df.groupby(df['ts'].dt.date)['sale'].sum().reset_index()
+        daily_sales = by_day.reset_index()
         daily_sales.columns = ['date', 'total_sales']
+        daily_sales['date'] = daily_sales['date'].dt.date
         daily_sales = daily_sales.sort_values(by='date', ascending=False).head(7)
 
         # 주별 매출
-        weekly_sales = df.groupby(df['ts'].dt.to_period('W'))['sale'].sum().reset_index()
-        weekly_sales['ts'] = weekly_sales['ts'].dt.start_time.dt.date
+        weekly_sales = by_day.groupby(by_day.index.to_period('W')).sum().reset_index()
+        weekly_sales['day'] = weekly_sales['day'].dt.start_time.dt.date
         weekly_sales.columns = ['week_start_date', 'total_sales']
         weekly_sales = weekly_sales.sort_values(by='week_start_date', ascending=False).head(4)
 
         # 월별 매출
-        monthly_sales = df.groupby(df['ts'].dt.to_period('M'))['sale'].sum().reset_index()
-        monthly_sales['ts'] = monthly_sales['ts'].dt.start_time.dt.date
+        monthly_sales = by_day.groupby(by_day.index.to_period('M')).sum().reset_index()
+        monthly_sales['day'] = monthly_sales['day'].dt.start_time.dt.date
         monthly_sales.columns = ['month', 'total_sales']
         monthly_sales = monthly_sales.sort_values(by='month', ascending=False).head(3)
 
@@ -43,4 +52,38 @@ def get_sales_summary():
             "monthly": monthly_sales.to_dict(orient="records"),
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing sales data: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing sales data: {e}")
+
+
+# ====== 판매 데이터 적재 ======
+class SaleRow(BaseModel):
+    ts: dt.datetime
+    village_id: conint(ge=1)
+    product_id: conint(ge=1)
+    qty: conint(ge=0)
+    price: Optional[int] = None
+    temp: Optional[float] = None
+    rain: Optional[conint(ge=0)] = None
+
+
+class IngestReq(BaseModel):
+    rows: List[SaleRow] = Field(..., max_length=INGEST_MAX_ROWS)
+
+
+@router.post("/ingest")
+def ingest(req: IngestReq):
+    """
+    판매 행 일괄 적재 (한 트랜잭션) — 이력/규칙 엔진 갱신 + XGB 이어 학습 (RF/HGB 유지).
+    드리프트·오래됨·과거 날짜 끼어듦으로 전체 재학습이 필요한 그룹은 학습 작업으로 등록 (그동안 기존 모델로 예측)
+    """
+    if not req.rows:
+        raise HTTPException(status_code=422, detail="no rows")
+    summary = ingest_sales([r.model_dump() for r in req.rows])
+    return {
+        "rows": summary["rows"],
+        "groups": summary["groups"],
+        "updated": len(summary["updated"]),
+        "refit": [{"village_id": v, "product_id": p, "reason": why} for (v, p), why in summary["refit"].items()],
+        "untrained": summary["untrained"],
+        "job": schedule_refit(list(summary["refit"]), reason="ingest"),
+    }
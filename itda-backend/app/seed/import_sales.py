@@ -0,0 +1,45 @@
+# app/seed/import_sales.py
+"""
+판매 CSV를 SQLite sales 표로 일괄 적재 (일회성 이전용)
+실행:
+    python -m app.seed.import_sales                      # app/seed/seed_sales.csv, 표가 비어 있을 때만
+    python -m app.seed.import_sales --csv sales_2025.csv --append
+    python -m app.seed.import_sales --replace            # 표를 비우고 다시 적재
+"""
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import sys
+import time
+
+from ..db import engine
+from ..services import sales_store
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="import sales CSV into the sales table")
+    ap.add_argument("--csv", type=Path, default=Path(sales_store.SEED_CSV))
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--append", action="store_true", help="기존 행 뒤에 추가")
+    mode.add_argument("--replace", action="store_true", help="기존 행을 지우고 적재")
+    args = ap.parse_args(argv)
+
+    if not args.csv.exists():
+        print(f"[ERR] {args.csv} not found")
+        return 1
+    sales_store.ensure_ready(import_seed=False)
+    existing = sales_store.count()
+    if existing and not (args.append or args.replace):
+        print(f"[SKIP] sales table already has {existing} rows (use --append or --replace)")
+        return 0
+    if args.replace:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM sales")
+    t0 = time.perf_counter()
+    n = sales_store.import_csv(args.csv)
+    print(f"[OK] imported {n} rows from {args.csv} in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
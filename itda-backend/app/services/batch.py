@@ -0,0 +1,197 @@
+# app/services/batch.py
+"""
+경로 문제 일괄 풀이 (what-if 시나리오 여러 개를 한 번에)
+- 같은 마을 집합(순서 포함)은 마을-마을 블록을 한 번만 만들고 공유, 출발지 행만 문제별로 계산
+  (matrix를 지정한 문제(도로망 등)는 그 행렬 그대로)
+- 문제별 풀이는 공용 프로세스 풀에서 병렬 실행 (워커 1개 이하면 직렬)
+  같은 블록을 쓰는 문제는 워커 수만큼의 묶음으로 나눠 제출 — 블록은 문제마다가 아니라 묶음마다 한 번만 직렬화
+- 결과는 입력 순서 그대로, 문제별 소요시간 포함
+"""
+from __future__ import annotations
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import time
+
+import numpy as np
+
+from .cluster import FULL_MATRIX_MAX_N
+from .matrix_cache import attach_start, get_cache
+from .solver import priority_weights, solve
+from .workers import ROUTE_WORKERS, get_pool, shutdown_pool
+
+
+@dataclass
+class RouteProblem:
+    start: Tuple[float, float]
+    ids: List[int]
+    lats: List[float]
+    lons: List[float]
+    large: bool = False  # 군집 분할 풀이
+    priorities: Optional[List[Optional[float]]] = None
+    cluster_size: Optional[int] = None
+    cluster_method: str = "kmeans"
+    strategy: str = "auto"  # solver.solve strategy (large면 cluster)
+    time_budget_s: Optional[float] = None
+    matrix: Optional[np.ndarray] = None  # (n+1)×(n+1) 풀이 행렬을 미리 만든 경우 (예: 도로망 이동시간)
+
+
+def _solve_task(
+    start: Tuple[float, float],
+    lats: np.ndarray,
+    lons: np.ndarray,
+    block: Optional[np.ndarray],
+    large: bool,
+    weights: Optional[np.ndarray],
+    cluster_size: Optional[int],
+    cluster_method: str,
+    strategy: str = "auto",
+    time_budget_s: Optional[float] = None,
+    matrix: Optional[np.ndarray] = None,
+) -> Dict:
+    """워커 프로세스 진입점 — 공유 블록에 출발지 행을 붙여서 풀이"""
+    D = matrix
+    if D is None and block is not None:
+        D = attach_start(start, block, lats, lons)
+    # 워커 안에서 다시 풀을 쓰지 않도록 군집 풀이는 직렬
+    return solve(
+        start, lats, lons, D,
+        weights=weights,
+        strategy="cluster" if large else strategy,
+        time_budget_s=time_budget_s,
+        cluster_size=cluster_size,
+        cluster_method=cluster_method,
+        parallel=False,
+    )
+
+
+def _solve_group(block: Optional[np.ndarray], tasks: List[Tuple]) -> List:
+    """워커 프로세스 진입점 — 같은 블록을 쓰는 문제 묶음 (task는 block 자리를 뺀 _solve_task 인자, 문제별 예외는 결과로)"""
+    out: List = []
+    for t in tasks:
+        try:
+            out.append(_solve_task(*t[:3], block, *t[3:]))
+        except Exception as e:
+            out.append(e)
+    return out
+
+
+def _groups(problems: List[RouteProblem], n_chunks: int) -> List[List[int]]:
+    """블록을 공유하는 문제 번호 묶음 — 마을 집합별로 최대 n_chunks개 (행렬을 지정한 문제는 각자 하나)"""
+    by_set: Dict[Tuple, List[int]] = {}
+    out: List[List[int]] = []
+    for i, p in enumerate(problems):
+        if p.matrix is not None:
+            out.append([i])
+        else:
+            by_set.setdefault(_set_key(p), []).append(i)
+    for idx in by_set.values():
+        k = max(1, min(n_chunks, len(idx)))
+        out.extend(idx[j::k] for j in range(k))
+    return out
+
+
+def _set_key(p: RouteProblem) -> Tuple:
+    return (tuple(p.ids), tuple(p.lats), tuple(p.lons))
+
+
+def solve_batch(problems: List[RouteProblem], parallel: bool = True) -> Dict:
+    """
+    Returns {
+      "results": 입력 순서별 solver.solve 결과 (+ "matrix_ms", "solve_ms", "shared_matrix") 또는 {"error"}
+                 (문제 하나의 실패가 일괄 전체를 실패시키지 않음),
+      "unique_matrices", "workers", "wall_ms"
+    }
+    """
+    t_start = time.perf_counter()
+
+    # 1) 마을 집합별 블록 한 번만 생성
+    blocks: Dict[Tuple, Tuple[Optional[np.ndarray], float]] = {}
+    users: Dict[Tuple, int] = {}
+    for p in problems:
+        if p.matrix is not None:
+            continue
+        key = _set_key(p)
+        users[key] = users.get(key, 0) + 1
+        if key in blocks:
+            continue
+        t0 = time.perf_counter()
+        block = None
+        if not p.ids:
+            block = np.zeros((0, 0), dtype=np.float64)
+        elif not p.large or len(p.ids) <= FULL_MATRIX_MAX_N:
+            block = get_cache().village_block(p.ids, p.lats, p.lons)
+        blocks[key] = (block, (time.perf_counter() - t0) * 1e3)
+
+    tasks = []
+    for p in problems:
+        tasks.append((
+            p.start,
+            np.asarray(p.lats, dtype=np.float64),
+            np.asarray(p.lons, dtype=np.float64),
+            p.large,
+            priority_weights(p.priorities) if p.priorities else None,
+            p.cluster_size,
+            p.cluster_method,
+            p.strategy,
+            p.time_budget_s,
+            p.matrix,
+        ))
+
+    def block_of(idx: List[int]) -> Optional[np.ndarray]:
+        p = problems[idx[0]]
+        return None if p.matrix is not None else blocks[_set_key(p)][0]
+
+    # 2) 병렬 풀이 — 문제별 예외는 그 문제의 error로 (일괄 전체를 실패시키지 않음)
+    #    워커가 죽어 풀이 깨지면 풀을 버림 (다음 get_pool()이 새로 생성), 풀을 못 쓰면 직렬
+    outcomes: List = [None] * len(tasks)
+    workers = 1
+    pending = list(range(len(tasks)))
+    if parallel and len(tasks) > 1 and ROUTE_WORKERS > 1:
+        groups = _groups(problems, ROUTE_WORKERS)
+        try:
+            pool = get_pool()
+            futs = [pool.submit(_solve_group, block_of(idx), [tasks[i] for i in idx]) for idx in groups]
+        except (BrokenProcessPool, OSError):
+            shutdown_pool()
+        else:
+            workers = min(ROUTE_WORKERS, len(groups))
+            pending = []
+            broken = False
+            for idx, f in zip(groups, futs):
+                try:
+                    res = f.result()
+                except BrokenProcessPool as e:
+                    broken = True
+                    res = [RuntimeError(f"worker process died: {e}")] * len(idx)
+                except Exception as e:
+                    res = [e] * len(idx)
+                for i, out in zip(idx, res):
+                    outcomes[i] = out
+            if broken:
+                shutdown_pool()
+    for i in pending:
+        try:
+            outcomes[i] = _solve_task(*tasks[i][:3], block_of([i]), *tasks[i][3:])
+        except Exception as e:
+            outcomes[i] = e
+
+    results: List[Dict] = []
+    for p, out in zip(problems, outcomes):
+        if isinstance(out, Exception):
+            results.append({"error": str(out) or type(out).__name__})
+            continue
+        if p.matrix is not None:
+            out["matrix_ms"], out["shared_matrix"] = 0.0, False
+        else:
+            key = _set_key(p)
+            out["matrix_ms"] = blocks[key][1]
+            out["shared_matrix"] = users[key] > 1
+        results.append(out)
+
+    return {
+        "results": results,
+        "unique_matrices": len(blocks),
+        "workers": workers,
+        "wall_ms": (time.perf_counter() - t_start) * 1e3,
+    }
@@ -0,0 +1,191 @@
+# app/services/cluster.py
+"""
+대규모 경로: 군집 우선, 경로 나중 (cluster-first, route-second)
+1) 마을을 지리적 군집으로 분할 (k-means 또는 출발지 기준 sweep)
+2) 군집 방문 순서: 출발지 → 군집 중심점들의 열린 경로
+3) 군집별 열린 경로를 프로세스 풀에서 병렬로 풀이 (직전 군집 중심에서 진입)
+4) 순서대로 이어 붙인 뒤 전체 행렬로 짧은 전역 지역 탐색
+"""
+from __future__ import annotations
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import os
+import time
+
+import numpy as np
+
+from .geo import SpatialIndex
+from .local_search import improve, path_legs
+from .matrix import haversine_legs, route_matrix
+from .tsp import exact_max_n, solve_open_path
+from .workers import ROUTE_WORKERS, get_pool, shutdown_pool
+
+CLUSTER_SIZE = int(os.getenv("ITDA_CLUSTER_SIZE", "150"))  # 군집당 목표 마을 수
+GLOBAL_PASS_S = float(os.getenv("ITDA_GLOBAL_PASS_S", "1.0"))  # 이어 붙인 뒤 전역 개선 시간
+FULL_MATRIX_MAX_N = int(os.getenv("ITDA_FULL_MATRIX_MAX_N", "6000"))  # 전역 개선용 전체 행렬 상한
+
+
+# ---------------- 군집화 ----------------
+def kmeans_labels(xy: np.ndarray, k: int, seed: int = 0, iters: int = 25) -> np.ndarray:
+    """k-means++ 초기화 + Lloyd 반복 (투영 km 좌표)"""
+    n = xy.shape[0]
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+    centers = np.empty((k, 2), dtype=np.float64)
+    centers[0] = xy[rng.integers(n)]
+    d2 = ((xy - centers[0]) ** 2).sum(axis=1)
+    for c in range(1, k):
+        total = d2.sum()
+        idx = rng.integers(n) if total <= 0 else rng.choice(n, p=d2 / total)
+        centers[c] = xy[idx]
+        d2 = np.minimum(d2, ((xy - centers[c]) ** 2).sum(axis=1))
+
+    labels = np.zeros(n, dtype=np.intp)
+    for it in range(iters):
+        # |x|² - 2x·c + |c|² : (n, k, 2) 임시 배열 없이 거리 계산
+        dist = (xy ** 2).sum(axis=1)[:, None] - 2.0 * xy @ centers.T + (centers ** 2).sum(axis=1)[None, :]
+        new = dist.argmin(axis=1)
+        if it > 0 and np.array_equal(new, labels):
+            break
+        labels = new
+        counts = np.bincount(labels, minlength=k)
+        for c in np.flatnonzero(counts == 0):
+            # 빈 군집은 현재 중심에서 가장 먼 점으로 다시 시작
+            far = int(dist[np.arange(n), labels].argmax())
+            labels[far] = c
+            counts = np.bincount(labels, minlength=k)
+        sums = np.zeros((k, 2))
+        np.add.at(sums, labels, xy)
+        centers = sums / counts[:, None]
+    return labels
+
+
+def sweep_labels(xy: np.ndarray, origin: np.ndarray, k: int) -> np.ndarray:
+    """출발지 기준 방위각으로 정렬 후 같은 크기로 나눔"""
+    n = xy.shape[0]
+    k = max(1, min(k, n))
+    ang = np.arctan2(xy[:, 1] - origin[1], xy[:, 0] - origin[0])
+    order = np.argsort(ang, kind="stable")
+    labels = np.empty(n, dtype=np.intp)
+    for c, chunk in enumerate(np.array_split(order, k)):
+        labels[chunk] = c
+    return labels
+
+
+# ---------------- 군집별 풀이 (워커 프로세스) ----------------
+def _solve_cluster(anchor: Tuple[float, float], lats: np.ndarray, lons: np.ndarray) -> List[int]:
+    """anchor에서 진입하는 열린 경로 — 군집 내 0-based 순서"""
+    D = route_matrix(anchor, lats, lons)
+    index = None
+    if len(lats) > exact_max_n():
+        index = SpatialIndex(np.r_[anchor[0], lats], np.r_[anchor[1], lons])
+    _cost, order = solve_open_path(D, index, kicks_per_node=0)  # 이어 붙인 뒤 전역 개선이 있으므로 교란 생략
+    return [i - 1 for i in order]
+
+
+def _run_clusters(tasks: List[Tuple], parallel: bool) -> Tuple[List[List[int]], int]:
+    if parallel and len(tasks) > 1 and ROUTE_WORKERS > 1:
+        try:
+            pool = get_pool()
+            futs = [pool.submit(_solve_cluster, *t) for t in tasks]
+            return [f.result() for f in futs], min(ROUTE_WORKERS, len(tasks))
+        except (BrokenProcessPool, OSError):
+            shutdown_pool()  # 깨진 풀은 버리고 다음 요청에서 새로 생성 → 이번엔 직렬 풀이
+    return [_solve_cluster(*t) for t in tasks], 1
+
+
+def _legs_km(start: Tuple[float, float], lats: np.ndarray, lons: np.ndarray, order: Sequence[int]) -> np.ndarray:
+    """연속 구간 거리 (전체 행렬 없이)"""
+    idx = np.asarray(order, dtype=np.intp) - 1
+    return haversine_legs(np.r_[start[0], lats[idx]], np.r_[start[1], lons[idx]])
+
+
+def solve_large(
+    start: Tuple[float, float],
+    lats: Sequence[float],
+    lons: Sequence[float],
+    D: Optional[np.ndarray] = None,
+    cluster_size: Optional[int] = None,
+    method: str = "kmeans",
+    parallel: bool = True,
+    improve_s: Optional[float] = None,
+) -> Dict:
+    """
+    Returns {
+      "order": 1..n 인덱스 방문 순서, "total_km", "legs_km",
+      "decomposition": {...}, "timings_ms": {...}
+    }
+    D: (n+1)×(n+1) 경로 행렬 (있으면 전역 개선에 사용, 없고 n이 크면 전역 개선 생략)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    n = len(lats)
+    size = max(2, int(cluster_size or CLUSTER_SIZE))
+    k = max(1, math.ceil(n / size))
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    index = SpatialIndex(np.r_[start[0], lats], np.r_[start[1], lons])
+    xy = index.xy[1:]
+    if method == "sweep":
+        labels = sweep_labels(xy, index.xy[0], k)
+    else:
+        method = "kmeans"
+        labels = kmeans_labels(xy, k)
+    members = [np.flatnonzero(labels == c) for c in range(k)]
+    members = [m for m in members if len(m)]
+    k = len(members)
+    c_lat = np.array([lats[m].mean() for m in members])
+    c_lon = np.array([lons[m].mean() for m in members])
+    t1 = time.perf_counter()
+    timings["cluster_ms"] = (t1 - t0) * 1e3
+
+    # 군집 방문 순서: 출발지 → 중심점 열린 경로
+    _c, c_order = solve_open_path(route_matrix(start, c_lat, c_lon))
+    c_order = [c - 1 for c in c_order]
+    t2 = time.perf_counter()
+    timings["order_ms"] = (t2 - t1) * 1e3
+
+    tasks = []
+    anchor = start
+    for c in c_order:
+        m = members[c]
+        tasks.append((anchor, lats[m], lons[m]))
+        anchor = (float(c_lat[c]), float(c_lon[c]))
+    sub_orders, workers = _run_clusters(tasks, parallel)
+    t3 = time.perf_counter()
+    timings["solve_ms"] = (t3 - t2) * 1e3
+
+    order: List[int] = []
+    for c, sub in zip(c_order, sub_orders):
+        order.extend(int(members[c][i]) + 1 for i in sub)
+    t4 = time.perf_counter()
+    timings["stitch_ms"] = (t4 - t3) * 1e3
+
+    improved = False
+    if D is not None:
+        budget = GLOBAL_PASS_S if improve_s is None else improve_s
+        if budget > 0:
+            _cost, order = improve(D, order, time_limit_s=budget, cand=index.neighbor_lists(8))
+            improved = True
+        legs = path_legs(D, order)
+    else:
+        legs = _legs_km(start, lats, lons, order)
+    t5 = time.perf_counter()
+    timings["improve_ms"] = (t5 - t4) * 1e3
+
+    return {
+        "order": order,
+        "total_km": float(np.sum(legs)),
+        "legs_km": legs,
+        "decomposition": {
+            "method": method,
+            "clusters": k,
+            "cluster_size": size,
+            "sizes": [int(len(members[c])) for c in c_order],
+            "workers": workers,
+            "global_pass": improved,
+        },
+        "timings_ms": {key: round(v, 1) for key, v in timings.items()},
+    }
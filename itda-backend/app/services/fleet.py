@@ -0,0 +1,187 @@
+# app/services/fleet.py
+"""
+다차량 용량 제약 경로 (CVRP + 근무시간) — OR-Tools Routing
+
+- 차량별 출발지에서 시작, 마지막 마을에서 종료(열린 경로: 가상 종점 비용 0)
+- 용량: 차량 적재량 ≥ 배정 마을 수요 합
+- 근무시간: 이동 + 마을 체류 시간 ≤ max_shift_min
+- 수용 불가 마을은 페널티를 주고 제외(dropped)하여 항상 해를 반환
+- time_limit_s 도달 시 그때까지 찾은 최선의 해 반환
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import importlib.util
+import time
+
+import numpy as np
+
+from .geo import travel_minutes
+from .matrix import haversine_matrix
+
+# OR-Tools는 solve_fleet 첫 호출에서 import — 라우터를 불러오는 것만으로는 로드하지 않음
+_ORTOOLS_OK = importlib.util.find_spec("ortools") is not None  # pip install ortools
+
+UNLIMITED_CAPACITY = 10**9
+_DROP_PENALTY_M = 10_000_000  # 마을 제외 페널티(= 1만 km) — 실제 경로보다 항상 크게
+
+
+@dataclass
+class FleetVehicle:
+    id: int
+    start_lat: float
+    start_lon: float
+    capacity: int = UNLIMITED_CAPACITY
+    max_shift_min: float = 480.0
+
+
+@dataclass
+class FleetStop:
+    id: int
+    lat: float
+    lon: float
+    demand: int = 0
+    service_min: float = 10.0
+
+
+def _status_name(routing) -> str:
+    from ortools.constraint_solver import routing_enums_pb2
+
+    names = {
+        getattr(routing_enums_pb2.RoutingSearchStatus, k): k
+        for k in routing_enums_pb2.RoutingSearchStatus.Value.keys()
+    }
+    return names.get(routing.status(), str(routing.status()))
+
+
+def solve_fleet(
+    stops: List[FleetStop],
+    vehicles: List[FleetVehicle],
+    time_limit_s: float = 5.0,
+    avg_kmh: float = 35.0,
+    now: Optional[datetime] = None,
+) -> Dict:
+    if not _ORTOOLS_OK:
+        raise RuntimeError("ortools is not installed")
+    if not vehicles:
+        raise ValueError("at least one vehicle is required")
+    from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
+    now = now or datetime.now()
+    V, n = len(vehicles), len(stops)
+    # 노드: 0..V-1 = 차량 출발지, V..V+n-1 = 마을, V+n = 가상 종점
+    lats = [v.start_lat for v in vehicles] + [s.lat for s in stops]
+    lons = [v.start_lon for v in vehicles] + [s.lon for s in stops]
+    D_km = haversine_matrix(lats, lons)
+    end = V + n
+    N = end + 1
+
+    dist_m = np.zeros((N, N), dtype=np.int64)
+    dist_m[:end, :end] = np.rint(D_km * 1000.0)
+    service_s = np.zeros(N, dtype=np.int64)
+    service_s[V:end] = [int(round(s.service_min * 60)) for s in stops]
+    # 이동시간(초) + 출발 노드 체류시간 — 가상 종점으로는 체류시간만
+    time_s = np.zeros((N, N), dtype=np.int64)
+    time_s[:end, :end] = np.rint(travel_minutes(D_km, avg_kmh) * 60.0)
+    time_s[:end, :end] += service_s[:end, None]
+    time_s[:end, end] = service_s[:end]
+    demand = np.zeros(N, dtype=np.int64)
+    demand[V:end] = [max(0, int(s.demand)) for s in stops]
+
+    dist_l, time_l, demand_l = dist_m.tolist(), time_s.tolist(), demand.tolist()
+
+    manager = pywrapcp.RoutingIndexManager(N, V, list(range(V)), [end] * V)
+    routing = pywrapcp.RoutingModel(manager)
+
+    def dist_cb(i, j):
+        return dist_l[manager.IndexToNode(i)][manager.IndexToNode(j)]
+
+    def time_cb(i, j):
+        return time_l[manager.IndexToNode(i)][manager.IndexToNode(j)]
+
+    def demand_cb(i):
+        return demand_l[manager.IndexToNode(i)]
+
+    dist_idx = routing.RegisterTransitCallback(dist_cb)
+    routing.SetArcCostEvaluatorOfAllVehicles(dist_idx)
+
+    time_idx = routing.RegisterTransitCallback(time_cb)
+    max_shift_s = [int(round(v.max_shift_min * 60)) for v in vehicles]
+    routing.AddDimensionWithVehicleCapacity(time_idx, 0, max_shift_s, True, "Time")
+
+    demand_idx = routing.RegisterUnaryTransitCallback(demand_cb)
+    caps = [int(min(max(0, v.capacity), UNLIMITED_CAPACITY)) for v in vehicles]
+    routing.AddDimensionWithVehicleCapacity(demand_idx, 0, caps, True, "Capacity")
+
+    for node in range(V, end):
+        routing.AddDisjunction([manager.NodeToIndex(node)], _DROP_PENALTY_M)
+
+    params = pywrapcp.DefaultRoutingSearchParameters()
+    params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    params.time_limit.FromMilliseconds(int(max(0.1, time_limit_s) * 1000))
+
+    t0 = time.perf_counter()
+    solution = routing.SolveWithParameters(params)
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    status = _status_name(routing)
+
+    if solution is None:
+        return {
+            "routes": [],
+            "dropped": [s.id for s in stops],
+            "total_distance_km": 0.0,
+            "solver": {"status": status, "time_limit_s": time_limit_s, "wall_ms": round(wall_ms, 1)},
+        }
+
+    time_dim = routing.GetDimensionOrDie("Time")
+    routes = []
+    served = set()
+    fleet_km = 0.0
+    for vi, veh in enumerate(vehicles):
+        idx = routing.Start(vi)
+        prev = manager.IndexToNode(idx)
+        cum_km = 0.0
+        load = 0
+        ordered = []
+        idx = solution.Value(routing.NextVar(idx))
+        while not routing.IsEnd(idx):
+            node = manager.IndexToNode(idx)
+            s = stops[node - V]
+            served.add(node)
+            cum_km += float(D_km[prev, node])
+            load += int(demand_l[node])
+            arrive_s = solution.Min(time_dim.CumulVar(idx))
+            ordered.append({
+                "village_id": s.id,
+                "lat": s.lat,
+                "lon": s.lon,
+                "distance_km": round(cum_km, 1),
+                "eta": (now + timedelta(seconds=arrive_s)).isoformat(),
+                "demand": int(demand_l[node]),
+            })
+            prev = node
+            idx = solution.Value(routing.NextVar(idx))
+        shift_s = solution.Min(time_dim.CumulVar(idx))
+        fleet_km += cum_km
+        routes.append({
+            "vehicle_id": veh.id,
+            "ordered_stops": ordered,
+            "total_distance_km": round(cum_km, 1),
+            "est_duration_min": int(round(shift_s / 60.0)),
+            "load": load,
+            "capacity": None if caps[vi] >= UNLIMITED_CAPACITY else caps[vi],
+        })
+
+    return {
+        "routes": routes,
+        "dropped": [stops[node - V].id for node in range(V, end) if node not in served],
+        "total_distance_km": round(fleet_km, 1),
+        "solver": {
+            "status": status,
+            "time_limit_s": time_limit_s,
+            "wall_ms": round(wall_ms, 1),
+            "objective": solution.ObjectiveValue(),
+        },
+    }
@@ -5,22 +5,90 @@ from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
 from pathlib import Path
 import datetime as dt
+import importlib.util
+import itertools
 import math
-import random
-
-_SKLEARN_OK = True
-_XGB_OK = True
-try:
-    import pandas as pd
-    import numpy as np
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.ensemble import HistGradientBoostingRegressor
-except Exception:
-    _SKLEARN_OK = False
-try:
-    import xgboost as xgb  # pip install xgboost
-except Exception:
-    _XGB_OK = False
+import os
+import threading
+
+import numpy as np
+
+from .forecast_cache import get_forecast_cache
+from .history_index import HistoryIndex, day_ordinals
+from .rule_forecast import WeekdayBaseline
+from . import sales_store
+from .model_store import ModelStore, data_hash, get_store
+
+# pandas/scikit-learn/xgboost는 예측기를 처음 만들 때(_import_ml) 로드 — 서버 기동과 CRUD만 쓰는 워커는 비용 없음
+pd = xgb = None
+RandomForestRegressor = HistGradientBoostingRegressor = threadpool_limits = None
+_SKLEARN_OK = all(importlib.util.find_spec(m) is not None for m in ("pandas", "sklearn", "threadpoolctl"))
+_XGB_OK = importlib.util.find_spec("xgboost") is not None  # pip install xgboost
+_IMPORT_LOCK = threading.Lock()
+
+FEATURES = [
+    "temp","rain","lag1","lag7","ma7",
+    "dow_sin","dow_cos","mon_sin","mon_cos","doy_sin","doy_cos"
+]
+# 그룹별 앙상블 구성원 (rf, hgb, xgb 중) — 정확도/비용 비교는 app.bench.forecast_backtest
+FORECAST_MEMBERS = tuple(m.strip() for m in os.getenv("ITDA_FORECAST_MEMBERS", "rf,hgb,xgb").split(",") if m.strip())
+# 특징/하이퍼파라미터를 바꾸면 올림 → 저장된 모델과 해시가 달라져 재학습
+MODEL_SPEC = f"ens-v1:rf200l2|hgb4x250@.06|xgb4x300@.08|members={'+'.join(FORECAST_MEMBERS)}"
+# 공용(pooled) 모델: 모든 그룹을 한 모델로 — 마을/상품은 평균 판매량 인코딩 특징으로
+POOLED_FEATURES = FEATURES + ["enc_village", "enc_product", "enc_pair"]
+POOLED_SPEC = "pooled-v2:xgb6x400@.08|hgb6x400@.08"
+POOLED_KEY = (0, 0)  # 모델 저장소/모델 사전에서 공용 모델 자리
+# per_group: (마을, 상품)별 앙상블 (기본) / pooled: 전체 공용 모델 하나 / rule: ML 없이 규칙 기반만 — 배포 단위로 선택
+FORECAST_MODEL = os.getenv("ITDA_FORECAST_MODEL", "per_group")
+# 학습 한 건이 쓰는 스레드 수 (RF n_jobs / HGB OpenMP / XGB nthread) — API 요청 스레드를 굶기지 않도록
+TRAIN_THREADS = max(1, int(os.getenv("ITDA_TRAIN_THREADS", "1")))
+HORIZON_MAX_DAYS = int(os.getenv("ITDA_HORIZON_MAX_DAYS", "28"))  # 다일 예측 요청 상한
+# 증분 갱신(append_sales): XGB는 최근 UPDATE_WINDOW행으로 UPDATE_XGB_ROUNDS 라운드 이어 학습,
+# 마지막 전체 학습 이후 새 행 잔차의 평균이 0에서 벗어나면(t > REFIT_DRIFT, 행 DRIFT_MIN_ROWS개 이상 — 수준 이동)
+# 또는 그 사이 행이 REFIT_STALE_FRAC 이상 늘면 전체 재학습
+UPDATE_XGB_ROUNDS = int(os.getenv("ITDA_UPDATE_XGB_ROUNDS", "10"))
+UPDATE_WINDOW = int(os.getenv("ITDA_UPDATE_WINDOW", "28"))
+REFIT_DRIFT = float(os.getenv("ITDA_REFIT_DRIFT", "3.0"))
+DRIFT_MIN_ROWS = int(os.getenv("ITDA_DRIFT_MIN_ROWS", "5"))
+REFIT_STALE_FRAC = float(os.getenv("ITDA_REFIT_STALE_FRAC", "0.3"))
+
+_XGB_PARAMS = {
+    "objective":"reg:squarederror","eta":0.08,"max_depth":4,
+    "subsample":0.9,"colsample_bytree":0.9,"seed":42,"eval_metric":"rmse",
+}
+_POOLED_XGB_PARAMS = {
+    "objective":"reg:squarederror","eta":0.08,"max_depth":6,"min_child_weight":5,
+    "subsample":0.9,"colsample_bytree":0.9,"seed":42,"eval_metric":"rmse",
+}
+
+
+def _import_ml() -> bool:
+    """무거운 ML 라이브러리를 한 번만 import — sklearn 계열을 쓸 수 있으면 True (xgboost는 있으면 추가)"""
+    global pd, xgb, RandomForestRegressor, HistGradientBoostingRegressor, threadpool_limits, _SKLEARN_OK, _XGB_OK
+    if pd is not None or not _SKLEARN_OK:
+        return _SKLEARN_OK
+    with _IMPORT_LOCK:
+        if pd is None and _SKLEARN_OK:
+            try:
+                import pandas
+                from sklearn.ensemble import HistGradientBoostingRegressor as hgb, RandomForestRegressor as rf
+                from threadpoolctl import threadpool_limits as limits
+            except Exception:
+                _SKLEARN_OK = False
+                return False
+            RandomForestRegressor, HistGradientBoostingRegressor, threadpool_limits = rf, hgb, limits
+            if _XGB_OK:
+                try:
+                    import xgboost
+                    xgb = xgboost
+                except Exception:
+                    _XGB_OK = False
+            pd = pandas  # 마지막에 채움 — pd가 있으면 나머지도 준비된 것
+    return _SKLEARN_OK
+
+
+class ModelNotReady(Exception):
+    """모델이 아직 학습 중 (train_inline=False일 때) — 호출 측은 규칙 기반으로 대체"""
 
 @dataclass
 class ForecastItem:
@@ -31,32 +99,79 @@ class ForecastItem:
     conf_high: int
     details: Dict
 
-def _weekday_idx(date_str: str) -> int:
-    y, m, d = [int(x) for x in date_str.split("-")]
-    return dt.date(y, m, d).weekday()
-
 # ---------------- ML Forecaster (Ensemble) ----------------
 class _MLForecaster:
     """
-    (village_id, product_id) 그룹별 소형회귀 앙상블:
+    mode="per_group": (village_id, product_id) 그룹별 소형회귀 앙상블:
       - XGBoost Regressor (가능시)
       - RandomForestRegressor
       - HistGradientBoostingRegressor
+    mode="pooled": 전체 이력으로 학습한 공용 모델 하나 (XGBoost, 없으면 HGB)
+      - 마을/상품/쌍 평균 판매량(타깃 인코딩)을 특징으로 추가 → 이력 없는 새 쌍도 예측
+      - 요청 전체를 한 번의 predict 호출로
     """
-    def __init__(self, base_dir: Path):
+    def __init__(self, base_dir: Optional[Path] = None, store: Optional[ModelStore] = None, mode: str = FORECAST_MODEL):
+        if mode not in ("per_group", "pooled"):
+            raise ValueError(f"unknown forecast model mode: {mode}")
+        if not _import_ml():
+            raise ImportError("pandas/scikit-learn not available")
         self.base_dir = base_dir
-        self.sales_csv = self.base_dir / "seed" / "seed_sales.csv"
+        self._store = store
+        self.mode = mode
+        self._pooled_data: Optional[Tuple["pd.DataFrame", "pd.Series"]] = None
+        self._pooled_sigma: Dict[Tuple[int, int], float] = {}
+        # base_dir가 있으면 그 아래 seed/seed_sales.csv (벤치/백테스트), 없으면 SQLite sales 표
+        self.sales_csv = base_dir / "seed" / "seed_sales.csv" if base_dir is not None else None
         self._models: Dict[Tuple[int,int], Dict[str, object]] = {}
         self._sigmas: Dict[Tuple[int,int], float] = {}
-        self._history: Optional["pd.DataFrame"] = None
+        self._untrainable: set = set()
+        self._fit_rows: Dict[Tuple[int,int], int] = {}
+        self._resid_acc: Dict[Tuple[int,int], Tuple[int, float, float]] = {}  # 전체 학습 이후 새 행 잔차 (n, Σr, Σr²)
+        # 학습 단위별 모델 버전 (install마다 새 번호) + 판매 데이터 버전 → 예측 캐시 키
+        self._model_ver: Dict[Tuple[int,int], int] = {}
+        self._ver_seq = itertools.count(1)
+        self.data_version = ""
+        self._source_version = ""
+        self._appends = 0  # CSV 모드 extend_history 횟수 (data_version 꼬리)
+        # False면 요청 경로에서 학습하지 않음 (train_scheduler가 백그라운드에서 채움)
+        self.train_inline = True
+        # 판매 프레임 (sales_store.sales_frame 형식, 적재 순) — DB 모드면 라우터와 같은 공용 프레임 그대로 (사본 없음)
+        self._frame: Optional["pd.DataFrame"] = None
+        self._index: Optional[HistoryIndex] = None
         self._load_history()
 
     def _load_history(self):
-        if not self.sales_csv.exists():
-            raise FileNotFoundError("seed_sales.csv not found")
-        df = pd.read_csv(self.sales_csv)
+        if self.sales_csv is None:
+            # 라우터와 같은 공용 판매 프레임에서 (DB를 따로 읽지 않음)
+            frame = sales_store.sales_frame()
+            version = sales_store.frame_version()
+        else:
+            if not self.sales_csv.exists():
+                raise FileNotFoundError("seed_sales.csv not found")
+            st = self.sales_csv.stat()
+            frame = self._typed_rows(pd.read_csv(self.sales_csv, parse_dates=["ts"]))
+            version = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        self.data_version = self._source_version = version
+        self._set_history(frame)
+
+    @staticmethod
+    def _typed_rows(df: "pd.DataFrame") -> "pd.DataFrame":
+        """CSV/입력 행 → 공용 판매 프레임과 같은 열/타입 (없는 price/temp/rain 열은 빈 값)"""
+        df = df.copy()
+        df["ts"] = pd.to_datetime(df["ts"])
+        df["qty"] = pd.to_numeric(df["qty"], errors="coerce")
+        for c in ("price", "temp", "rain"):
+            df[c] = pd.to_numeric(df[c], errors="coerce") if c in df.columns else np.nan
+        return sales_store.typed_frame(df)
+
+    @staticmethod
+    def _prepare_frame(df: "pd.DataFrame") -> "pd.DataFrame":
+        """판매 행(ts, village_id, product_id, qty[, temp, rain]) → 학습/색인용 열 추가"""
+        df = df.copy()
         df["ts"] = pd.to_datetime(df["ts"])
         df["date"] = df["ts"].dt.date
+        df["village_id"] = df["village_id"].astype(int)
+        df["product_id"] = df["product_id"].astype(int)
         df["qty"] = pd.to_numeric(df["qty"], errors="coerce").fillna(0).astype(int)
         df["dow"] = df["ts"].dt.weekday
         df["month"] = df["ts"].dt.month
@@ -67,7 +182,29 @@ class _MLForecaster:
             df["rain"] = 0
         df["temp"] = pd.to_numeric(df["temp"], errors="coerce").fillna(18.0)
         df["rain"] = pd.to_numeric(df["rain"], errors="coerce").fillna(0).astype(int)
-        self._history = df.sort_values(["village_id","product_id","date"]).reset_index(drop=True)
+        return df
+
+    def _set_history(self, frame: "pd.DataFrame"):
+        """판매 프레임 교체 — 색인/타깃 인코딩/공용 학습 행렬을 함께 갱신 (프레임은 정렬·복사하지 않음)"""
+        index = HistoryIndex.from_frame(frame)
+        self._frame, self._index = frame, index
+        self._pooled_data = None
+        qty = frame["qty"].astype("float64")
+        self._enc = (
+            float(qty.mean()) if len(frame) else 15.0,
+            {int(k): v for k, v in qty.groupby(frame["village_id"], observed=True).mean().items()},
+            {int(k): v for k, v in qty.groupby(frame["product_id"], observed=True).mean().items()},
+            {(int(v), int(p)): m for (v, p), m in
+             qty.groupby([frame["village_id"], frame["product_id"]], observed=True).mean().items()},
+        )
+
+    def _sorted_rows(self, rows: slice) -> "pd.DataFrame":
+        """색인 정렬 순서의 행 구간 → 학습용 열을 붙인 DataFrame (이 구간만 공용 프레임에서 꺼냄, 인덱스 = 정렬 위치)"""
+        assert self._frame is not None and self._index is not None
+        cols = ["ts", "village_id", "product_id", "qty", "temp", "rain"]
+        df = self._prepare_frame(self._frame[cols].take(self._index.order[rows]))
+        df.index = pd.RangeIndex(rows.start, rows.stop)
+        return df
 
     @staticmethod
     def _cyc(vals, period: int):
@@ -87,37 +224,47 @@ class _MLForecaster:
         g["doy_sin"], g["doy_cos"] = doy_sin, doy_cos
         return g
 
-    def _train_one(self, vid: int, pid: int):
-        assert self._history is not None
-        key = (vid, pid)
-        g = self._history[(self._history["village_id"]==vid) & (self._history["product_id"]==pid)]
+    def _group(self, vid: int, pid: int) -> "pd.DataFrame":
+        assert self._index is not None
+        return self._sorted_rows(self._index.rows((vid, pid)))
+
+    def _training_data(self, vid: int, pid: int) -> Tuple["pd.DataFrame", "pd.Series"]:
+        g = self._group(vid, pid)
         if g.empty or len(g) < 25:
             raise ValueError("not enough data")
         g = self._build_frame_with_lags(g)
-        feats = [
-            "temp","rain","lag1","lag7","ma7",
-            "dow_sin","dow_cos","mon_sin","mon_cos","doy_sin","doy_cos"
-        ]
         # FutureWarning 해결: fillna(method="ffill") -> ffill()
-        X = g[feats].ffill().fillna(0.0)
+        X = g[FEATURES].ffill().fillna(0.0)
         y = g["qty"].astype(float)
         valid = g["lag1"].notna()
         X, y = X[valid], y[valid]
         if len(X) < 20:
             raise ValueError("not enough valid rows")
+        return X, y
 
+    @staticmethod
+    def _fit(X: "pd.DataFrame", y: "pd.Series", n_jobs: Optional[int] = None,
+             members: Tuple[str, ...] = FORECAST_MEMBERS) -> Tuple[Dict[str, object], float]:
+        _import_ml()  # 정적 호출(학습 자식 프로세스, 백테스트)에서도 라이브러리 준비
+        n_jobs = n_jobs or TRAIN_THREADS
+        with threadpool_limits(limits=n_jobs):
+            return _MLForecaster._fit_models(X, y, n_jobs, members)
+
+    @staticmethod
+    def _fit_models(X: "pd.DataFrame", y: "pd.Series", n_jobs: int,
+                    members: Tuple[str, ...] = FORECAST_MEMBERS) -> Tuple[Dict[str, object], float]:
         models: Dict[str, object] = {}
         preds = []
 
-        if _SKLEARN_OK:
+        if _SKLEARN_OK and "rf" in members:
             rf = RandomForestRegressor(
-                n_estimators=200, max_depth=None, min_samples_leaf=2, random_state=42, n_jobs=-1
+                n_estimators=200, max_depth=None, min_samples_leaf=2, random_state=42, n_jobs=n_jobs
             )
             rf.fit(X, y)
             models["rf"] = rf
             preds.append(rf.predict(X))
 
-        if _SKLEARN_OK:
+        if _SKLEARN_OK and "hgb" in members:
             hgb = HistGradientBoostingRegressor(
                 max_depth=4, max_iter=250, learning_rate=0.06, random_state=42
             )
@@ -125,12 +272,9 @@ class _MLForecaster:
             models["hgb"] = hgb
             preds.append(hgb.predict(X))
 
-        if _XGB_OK:
+        if _XGB_OK and "xgb" in members:
             dtrain = xgb.DMatrix(X.values, label=y.values)
-            params = {
-                "objective":"reg:squarederror","eta":0.08,"max_depth":4,
-                "subsample":0.9,"colsample_bytree":0.9,"seed":42,"eval_metric":"rmse"
-            }
+            params = {**_XGB_PARAMS, "nthread": n_jobs}
             xgbm = xgb.train(params, dtrain, num_boost_round=300, verbose_eval=False)
             models["xgb"] = xgbm
             preds.append(xgbm.predict(dtrain))
@@ -140,64 +284,457 @@ class _MLForecaster:
         ens = np.mean(np.vstack(preds), axis=0)
         resid = y.values - ens
         sigma = float(np.std(resid)) if len(resid) > 1 else 3.0
+        return models, sigma
+
+    # ----- 공용(pooled) 모델 -----
+    def _encode(self, pairs: List[Tuple[int, int]]) -> "np.ndarray":
+        """(len(pairs), 3) — 마을/상품/쌍 평균 판매량. 없는 쌍은 마을 + 상품 - 전체 평균으로 추정"""
+        glob, by_v, by_p, by_vp = self._enc
+        E = np.empty((len(pairs), 3), dtype=np.float64)
+        for i, (v, p) in enumerate(pairs):
+            ev, ep = by_v.get(v, glob), by_p.get(p, glob)
+            E[i] = (ev, ep, by_vp.get((v, p), max(0.0, ev + ep - glob)))
+        return E
+
+    @staticmethod
+    def _past_encodings(qty: "np.ndarray", day: "np.ndarray", vid: "np.ndarray",
+                        pid: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        학습 행의 마을/상품/쌍 평균 판매량 — 그 행 날짜 이전 판매만으로 (자기 타깃·같은 날·미래 값이 새지 않도록).
+        이전 판매가 없으면 _encode와 같은 대체값 (전체 평균 / 마을 + 상품 - 전체, 첫날은 0)
+        """
+        def before(*keys: "np.ndarray") -> "np.ndarray":
+            df = pd.DataFrame({**{f"k{i}": k for i, k in enumerate(keys)}, "day": day, "qty": qty})
+            by = [f"k{i}" for i in range(len(keys))]
+            daily = df.groupby(by + ["day"], sort=True)["qty"].agg(["sum", "count"])
+            prior = (daily.groupby(level=by).cumsum() if by else daily.cumsum()) - daily
+            prior = prior.reindex(pd.MultiIndex.from_frame(df[by + ["day"]]) if by else pd.Index(day))
+            s, c = prior["sum"].to_numpy(), prior["count"].to_numpy()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(c > 0, s / np.maximum(c, 1), np.nan)
+
+        glob = np.nan_to_num(before(), nan=0.0)
+        ev, ep, evp = before(vid), before(pid), before(vid, pid)
+        ev = np.where(np.isnan(ev), glob, ev)
+        ep = np.where(np.isnan(ep), glob, ep)
+        evp = np.where(np.isnan(evp), np.maximum(0.0, ev + ep - glob), evp)
+        return ev, ep, evp
+
+    def _pooled_training_data(self) -> Tuple["pd.DataFrame", "pd.Series"]:
+        """전체 이력을 한 번에 — 그룹별 lag/MA7은 groupby shift와 누적합으로 (행 기준, 그룹별 앙상블과 같은 정의)"""
+        if self._pooled_data is not None:
+            return self._pooled_data
+        assert self._index is not None
+        h = self._sorted_rows(slice(0, len(self._index)))
+        by = ["village_id", "product_id"]
+        grp = h.groupby(by, sort=False)["qty"]
+        qty = h["qty"].to_numpy(dtype=np.float64)
+        pos = grp.cumcount().to_numpy()
+        csum = np.r_[0.0, np.cumsum(qty)]
+        i = np.arange(len(h))
+        m = np.minimum(pos, 7)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ma7 = np.where(m > 0, (csum[i] - csum[i - m]) / np.maximum(m, 1), np.nan)
+        X = pd.DataFrame({"temp": h["temp"].astype(float), "rain": h["rain"].astype(float)})
+        X["lag1"] = grp.shift(1)
+        X["lag7"] = grp.shift(7)
+        X["ma7"] = ma7
+        for name, col, period in (("dow", "dow", 7), ("mon", "month", 12), ("doy", "doy", 365)):
+            X[f"{name}_sin"], X[f"{name}_cos"] = self._cyc(h[col], period)
+        day = h["ts"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        X["enc_village"], X["enc_product"], X["enc_pair"] = self._past_encodings(
+            qty, day, h["village_id"].to_numpy(dtype=np.int64), h["product_id"].to_numpy(dtype=np.int64))
+        valid = X["lag1"].notna()
+        X = X[valid][POOLED_FEATURES].fillna(0.0)
+        y = h.loc[valid, "qty"].astype(float)
+        # 인덱스 (마을, 상품, 날짜 일수) — 학습 시 시간순 검증 구간/그룹별 sigma 계산용 (해시·특징에는 영향 없음)
+        X.index = y.index = pd.MultiIndex.from_arrays(
+            [h.loc[valid, "village_id"].to_numpy(), h.loc[valid, "product_id"].to_numpy(), day[valid.to_numpy()]],
+            names=["village_id", "product_id", "day"],
+        )
+        if len(X) < 20:
+            raise ValueError("not enough valid rows")
+        self._pooled_data = (X, y)
+        return X, y
+
+    @staticmethod
+    def _fit_pooled(X: "pd.DataFrame", y: "pd.Series", n_jobs: int) -> Tuple[Dict[str, object], float]:
+        """
+        최근 20% 날짜를 검증 구간으로 조기 종료 → 그 반복 수로 전체 재학습.
+        sigma는 검증 구간 잔차로 (학습 잔차는 깊은 트리에서 과소추정) — 전체 + 그룹별("group_sigma")
+        """
+        _import_ml()
+        day = X.index.get_level_values("day").to_numpy()
+        val = day > np.quantile(day, 0.8)
+        if val.all() or not val.any():
+            val = np.zeros(len(X), dtype=bool)
+            val[-max(1, len(X) // 5):] = True
+        Xv, yv = X.values, y.values
+        models: Dict[str, object] = {}
+        with threadpool_limits(limits=n_jobs):
+            if _XGB_OK:
+                params = {**_POOLED_XGB_PARAMS, "nthread": n_jobs}
+                dval = xgb.DMatrix(Xv[val], label=yv[val])
+                probe = xgb.train(params, xgb.DMatrix(Xv[~val], label=yv[~val]), num_boost_round=400,
+                                  evals=[(dval, "val")], early_stopping_rounds=30, verbose_eval=False)
+                rounds = probe.best_iteration + 1
+                pred_val = probe.predict(dval, iteration_range=(0, rounds))
+                models["xgb"] = xgb.train(params, xgb.DMatrix(Xv, label=yv), num_boost_round=rounds, verbose_eval=False)
+            else:
+                probe = HistGradientBoostingRegressor(max_depth=6, max_iter=400, learning_rate=0.08, random_state=42,
+                                                      early_stopping=True, validation_fraction=0.1)
+                probe.fit(X[~val], yv[~val])
+                pred_val = probe.predict(X[val])
+                hgb = HistGradientBoostingRegressor(max_depth=6, max_iter=probe.n_iter_, learning_rate=0.08,
+                                                    random_state=42, early_stopping=False)
+                hgb.fit(X, yv)
+                models["hgb"] = hgb
+        resid = pd.Series(yv[val] - pred_val, index=X.index[val].droplevel("day"))
+        std = resid.groupby(level=[0, 1]).std().dropna()
+        models["group_sigma"] = {(int(v), int(p)): float(v_) for (v, p), v_ in std.items()}
+        return models, float(resid.std()) if len(resid) > 1 else 3.0
+
+    @staticmethod
+    def fit_key(key: Tuple[int, int], X: "pd.DataFrame", y: "pd.Series", n_jobs: Optional[int] = None) -> Tuple[Dict[str, object], float]:
+        """prepare(key)의 입력으로 학습 (train_scheduler 자식 프로세스에서도 호출)"""
+        if tuple(key) == POOLED_KEY:
+            return _MLForecaster._fit_pooled(X, y, n_jobs or TRAIN_THREADS)
+        return _MLForecaster._fit(X, y, n_jobs)
+
+    # ----- 학습/저장소 -----
+    def _artifact_key(self, X: "pd.DataFrame", y: "pd.Series", pooled: bool = False) -> str:
+        """학습 데이터 + 특징/모델 구성 해시 (모델 저장소 파일 이름)"""
+        libs = f"xgb={_XGB_OK}"
+        spec = POOLED_SPEC if pooled else MODEL_SPEC
+        return data_hash(X.values, y.values, salt=f"{spec}|{','.join(X.columns)}|{libs}")
+
+    def prepare(self, key: Tuple[int, int]) -> Tuple["pd.DataFrame", "pd.Series", str]:
+        """학습 입력과 저장소 키 — 데이터 부족이면 ValueError"""
+        if tuple(key) == POOLED_KEY:
+            X, y = self._pooled_training_data()
+            return X, y, self._artifact_key(X, y, pooled=True)
+        X, y = self._training_data(*key)
+        return X, y, self._artifact_key(X, y)
+
+    def load_stored(self, key: Tuple[int, int], digest: str) -> bool:
+        loaded = self._store.load(key, digest) if self._store else None
+        if loaded is None:
+            return False
+        self.install(key, *loaded)
+        return True
 
+    def install(self, key: Tuple[int, int], models: Dict[str, object], sigma: float, incremental: bool = False):
+        """incremental=False(전체 학습/로드)면 지금 이력 행 수를 기록 — 증분 갱신의 '오래됨' 판단 기준"""
+        if not incremental:
+            self._fit_rows[key] = len(self._index) if tuple(key) == POOLED_KEY else self._index.count(key)
+            self._resid_acc.pop(key, None)
+        if tuple(key) == POOLED_KEY:
+            self._pooled_sigma = dict(models.get("group_sigma", {}))
+            self._pooled_data = None  # 학습 행렬은 다시 필요할 때 재구성 (메모리 반환)
+            get_forecast_cache().invalidate()  # 공용 모델 교체 → 모든 캐시 항목이 옛 버전
         self._models[key] = models
         self._sigmas[key] = sigma
+        self._model_ver[key] = next(self._ver_seq)
+        self._untrainable.discard(key)
 
-    def _ensure_model(self, vid: int, pid: int):
+    def has_model(self, key: Tuple[int, int]) -> bool:
+        if self.mode == "pooled":
+            return POOLED_KEY in self._models
+        return key in self._models
+
+    def cache_version(self, vid: int, pid: int) -> Optional[Tuple[int, str]]:
+        """(모델 버전, 데이터 버전) — 모델이 아직 없으면 None (캐시 안 함)"""
+        ver = self._model_ver.get(POOLED_KEY if self.mode == "pooled" else (vid, pid))
+        return None if ver is None else (ver, self.data_version)
+
+    def mark_untrainable(self, key: Tuple[int, int]):
+        self._untrainable.add(key)
+
+    def fallback_reason(self, vid: int, pid: int) -> str:
+        """ML 예측이 없는 이유 — details["fallback"]"""
         key = (vid, pid)
-        if key not in self._models:
-            self._train_one(vid, pid)
+        if self.mode == "pooled":
+            return "insufficient_history" if POOLED_KEY in self._untrainable else "model_training"
+        if key in self._untrainable or key not in self._index:
+            return "insufficient_history"
+        return "model_training"
+
+    def _train_one(self, vid: int, pid: int):
+        key = (vid, pid)
+        try:
+            X, y, digest = self.prepare(key)
+        except ValueError:
+            self.mark_untrainable(key)
+            raise
+        if self.load_stored(key, digest):
+            return
+        models, sigma = self.fit_key(key, X, y)
+        if self._store:
+            try:
+                self._store.save(key, digest, models, sigma)
+            except OSError:
+                pass  # 읽기 전용 디스크 등 — 메모리 모델로 계속
+        self.install(key, models, sigma)
+
+    def _ensure_model(self, vid: int, pid: int):
+        key = POOLED_KEY if self.mode == "pooled" else (vid, pid)
+        if key in self._models:
+            return
+        if not self.train_inline:
+            raise ModelNotReady(f"model for {key} is not trained yet")
+        self._train_one(*key)
+
+    def groups(self) -> List[Tuple[int, int]]:
+        assert self._index is not None
+        return self._index.groups()
+
+    def training_keys(self) -> List[Tuple[int, int]]:
+        """학습 단위 — per_group이면 모든 그룹, pooled면 공용 모델 하나"""
+        return [POOLED_KEY] if self.mode == "pooled" else self.groups()
+
+    def pretrain_all(self) -> Tuple[int, int]:
+        """모든 학습 단위 학습(또는 저장소에서 로드) — (성공, 데이터 부족) 개수"""
+        ok = failed = 0
+        for vid, pid in self.training_keys():
+            try:
+                self._ensure_model(vid, pid)
+                ok += 1
+            except ValueError:
+                failed += 1
+        return ok, failed
+
+    def current_artifacts(self) -> List[Tuple[Tuple[int, int], str]]:
+        """현재 판매 이력 기준 유효한 (그룹, data_hash) 목록 — 저장소 정리용"""
+        out = []
+        for key in self.training_keys():
+            try:
+                _X, _y, digest = self.prepare(key)
+            except ValueError:
+                continue
+            out.append((key, digest))
+        return out
+
+    # ----- 증분 갱신 -----
+    def extend_history(self, rows: "pd.DataFrame") -> Dict[Tuple[int, int], Tuple[int, int, bool]]:
+        """
+        새 판매 행을 이력에 합침 (색인/인코딩 재구성 — 모델 학습 없음).
+        DB 모드는 행이 이미 sales 표에 적재돼 있어야 함 (ingest_sales) — 갱신된 공용 프레임을 다시 색인,
+        CSV 모드(벤치/백테스트)는 이 예측기의 프레임 뒤에 덧붙임.
+        Returns {그룹: (새 행 수, 합치기 전 마지막 날짜 서수 또는 -1, 과거 날짜 포함 여부)}
+        """
+        assert self._frame is not None and self._index is not None
+        new = self._prepare_frame(rows)
+        if new.empty:
+            return {}
+        counts = new.groupby(["village_id", "product_id"]).size()
+        keys = [(int(v), int(p)) for v, p in counts.index]
+        last = self._index.last_days(keys).tolist()
+        if self.sales_csv is None:
+            self._set_history(sales_store.sales_frame())
+            self.data_version = self._source_version = sales_store.frame_version()
+        else:
+            self._set_history(sales_store.append_frame(self._frame, self._typed_rows(rows)))
+            self._appends += 1
+            self.data_version = f"{self._source_version}+{self._appends}"
+        for key in keys:
+            self._untrainable.discard(key)  # 행이 늘었으니 다시 시도
+        if self.mode == "pooled":
+            self._untrainable.discard(POOLED_KEY)
+        first = [d.toordinal() for d in new.groupby(["village_id", "product_id"])["date"].min().tolist()]
+        return {key: (int(n), old, f <= old) for key, n, old, f in zip(keys, counts.tolist(), last, first)}
+
+    def sync_history(self) -> bool:
+        """
+        DB 모드: 공용 판매 프레임의 버전이 색인한 버전과 다르면 다시 색인 — 다른 워커/프로세스가 적재한 행도 반영
+        (data_version이 바뀌므로 예측 캐시 키도 바뀜). 다시 색인했으면 True
+        """
+        if self.sales_csv is None:
+            frame = sales_store.sales_frame()  # 그대로면 DB 파일 stat 한 번
+            version = sales_store.frame_version()
+            if version != self._source_version:
+                self._set_history(frame)
+                self.data_version = self._source_version = version
+                self._untrainable.clear()  # 어느 그룹에 행이 늘었는지 모름 — 다시 시도
+                return True
+        return False
+
+    def _continue_xgb(self, booster, X: "np.ndarray", y: "np.ndarray", params: Dict) -> object:
+        """기존 부스터에 라운드 추가 — xgb.train이 사본을 만들어 이어 학습하므로 예측 중인 원본은 그대로"""
+        with threadpool_limits(limits=TRAIN_THREADS):
+            return xgb.train({**params, "nthread": TRAIN_THREADS}, xgb.DMatrix(X, label=y),
+                             num_boost_round=UPDATE_XGB_ROUNDS, xgb_model=booster, verbose_eval=False)
+
+    def _needs_refit(self, key: Tuple[int, int], models: Dict[str, object], resid: "np.ndarray", total_rows: int) -> Optional[str]:
+        """
+        전체 재학습 사유 (drift | stale | no_xgb) — 이어 학습으로 충분하면 None.
+        드리프트는 누적 잔차 평균의 t 값으로 판단 (학습 잔차 sigma는 과소추정이라 기준으로 쓰지 않음)
+        """
+        if not _XGB_OK or "xgb" not in models:
+            return "no_xgb"
+        n, s1, s2 = self._resid_acc.get(key, (0, 0.0, 0.0))
+        n, s1, s2 = n + len(resid), s1 + float(resid.sum()), s2 + float((resid ** 2).sum())
+        self._resid_acc[key] = (n, s1, s2)
+        if n >= DRIFT_MIN_ROWS:
+            mean = s1 / n
+            sd = math.sqrt(max(s2 / n - mean * mean, 0.0) * n / (n - 1))
+            if abs(mean) > REFIT_DRIFT * max(sd, 1e-6) / math.sqrt(n):
+                return "drift"
+        fit_rows = self._fit_rows.get(key, total_rows - len(resid))
+        if total_rows - fit_rows > REFIT_STALE_FRAC * max(fit_rows, 1):
+            return "stale"
+        return None
+
+    def _save_updated(self, key: Tuple[int, int], X: "pd.DataFrame", y: "pd.Series", models: Dict[str, object], sigma: float):
+        """현재 이력 해시로 저장 — 같은 이력으로 재시작하면 이어 학습한 모델을 그대로 로드"""
+        if self._store:
+            try:
+                self._store.save(key, self._artifact_key(X, y, pooled=tuple(key) == POOLED_KEY), models, sigma)
+            except OSError:
+                pass
+
+    def _update_group(self, key: Tuple[int, int], n_new: int) -> Optional[str]:
+        models = self._models[key]
+        X, y = self._training_data(*key)
+        n_new = min(n_new, len(y))
+        pred, _ = self._ensemble_predict(models, X.iloc[-n_new:], fast=True)
+        resid = y.values[-n_new:] - pred
+        reason = self._needs_refit(key, models, resid, self._index.count(key))
+        if reason:
+            return reason
+        w = max(n_new, UPDATE_WINDOW)
+        updated = dict(models)
+        updated["xgb"] = self._continue_xgb(models["xgb"], X.values[-w:], y.values[-w:], _XGB_PARAMS)
+        n_old = len(y) - n_new
+        sigma = float(np.sqrt((n_old * self._sigmas.get(key, 4.0) ** 2 + np.sum(resid ** 2)) / max(len(y), 1)))
+        self.install(key, updated, sigma, incremental=True)
+        self._save_updated(key, X, y, updated, sigma)
+        return None
+
+    def _update_pooled(self, delta: Dict[Tuple[int, int], Tuple[int, int, bool]]) -> Optional[str]:
+        models = self._models[POOLED_KEY]
+        X, y = self._pooled_training_data()
+        # 새 행 = 그룹의 (합치기 전) 마지막 날짜 이후 — 풀 행렬의 day는 1970-01-01 기준 일수
+        epoch = dt.date(1970, 1, 1).toordinal()
+        last = pd.Series([old - epoch if old >= 0 else -(1 << 40) for _n, old, _b in delta.values()],
+                         index=pd.MultiIndex.from_tuples(list(delta), names=["village_id", "product_id"]))
+        grp_last = last.reindex(X.index.droplevel("day")).to_numpy()
+        new = X.index.get_level_values("day").to_numpy() > grp_last  # 영향 없는 그룹은 NaN → False
+        if not new.any():
+            return None
+        pred, _ = self._ensemble_predict(models, X[new], fast=True)
+        resid = y.values[new] - pred
+        reason = self._needs_refit(POOLED_KEY, models, resid, len(self._index))
+        if reason:
+            return reason
+        updated = dict(models)
+        updated["xgb"] = self._continue_xgb(models["xgb"], X.values[new], y.values[new], _POOLED_XGB_PARAMS)
+        n_old = len(y) - int(new.sum())
+        sigma = float(np.sqrt((n_old * self._sigmas.get(POOLED_KEY, 4.0) ** 2 + np.sum(resid ** 2)) / max(len(y), 1)))
+        self.install(POOLED_KEY, updated, sigma, incremental=True)
+        self._save_updated(POOLED_KEY, X, y, updated, sigma)
+        return None
+
+    def update_models(self, delta: Dict[Tuple[int, int], Tuple[int, int, bool]]) -> Dict[str, object]:
+        """
+        extend_history 이후 영향받은 모델 증분 갱신 — XGB만 이어 학습하고 RF/HGB는 유지.
+        과거 날짜가 끼어든 그룹(backfill)과 드리프트/오래됨 그룹은 전체 재학습 대상으로 돌려줌 (호출 측이 스케줄)
+        """
+        updated: List[Tuple[int, int]] = []
+        refit: Dict[Tuple[int, int], str] = {}
+        untrained = 0
+        if self.mode == "pooled":
+            if POOLED_KEY not in self._models:
+                untrained = 1
+            elif any(back for _n, _old, back in delta.values()):
+                refit[POOLED_KEY] = "backfill"
+            else:
+                reason = self._update_pooled(delta)
+                if reason:
+                    refit[POOLED_KEY] = reason
+                else:
+                    updated.append(POOLED_KEY)
+        else:
+            for key, (n_new, _old, back) in delta.items():
+                if key not in self._models:
+                    untrained += 1  # 아직 모델 없음 — 다음 학습(요청/스케줄러)에서 새 이력으로
+                    continue
+                if back:
+                    refit[key] = "backfill"
+                    continue
+                try:
+                    reason = self._update_group(key, n_new)
+                except ValueError:
+                    continue
+                if reason:
+                    refit[key] = reason
+                else:
+                    updated.append(key)
+        return {"updated": updated, "refit": refit, "untrained": untrained}
 
     def _feature_row(self, vid: int, pid: int, target_date: dt.date) -> Dict[str,float]:
-        assert self._history is not None
-        g = self._history[(self._history["village_id"]==vid) & (self._history["product_id"]==pid)].copy()
-        g = g.sort_values("date")
-        recent = g[g["date"] <= target_date].tail(14)
-        temp = float(recent["temp"].mean()) if not recent.empty else 18.0
-        rain = int(round(recent["rain"].mean())) if not recent.empty else 0
-        d1 = target_date - dt.timedelta(days=1)
-        d7 = target_date - dt.timedelta(days=7)
-        lag1 = float(g.loc[g["date"]==d1,"qty"].iloc[0]) if (g["date"]==d1).any() else float(g["qty"].iloc[-1]) if len(g) else 15.0
-        lag7 = float(g.loc[g["date"]==d7,"qty"].iloc[0]) if (g["date"]==d7).any() else float(g["qty"].tail(7).mean()) if len(g) else 15.0
-        mask7 = (g["date"] <= d1) & (g["date"] > d1 - dt.timedelta(days=7))
-        ma7 = float(g.loc[mask7,"qty"].mean()) if g.loc[mask7].shape[0]>0 else float(g["qty"].tail(7).mean()) if len(g) else 15.0
-        dow = target_date.weekday()
-        month = target_date.month
-        doy = target_date.timetuple().tm_yday
-        def cyc(v, p):
-            r = 2*math.pi*float(v)/p
-            return math.sin(r), math.cos(r)
-        dow_sin, dow_cos = cyc(dow, 7)
-        mon_sin, mon_cos = cyc(month, 12)
-        doy_sin, doy_cos = cyc(doy, 365)
-        return {
-            "temp": temp, "rain": rain, "lag1": lag1, "lag7": lag7, "ma7": ma7,
-            "dow_sin": dow_sin, "dow_cos": dow_cos, "mon_sin": mon_sin, "mon_cos": mon_cos,
-            "doy_sin": doy_sin, "doy_cos": doy_cos
-        }
+        row = self._feature_matrix([(vid, pid)], target_date)[0].tolist()
+        feats = dict(zip(FEATURES, row))
+        feats["rain"] = int(feats["rain"])
+        return feats
 
-    def predict_one(self, vid: int, pid: int, target_date: dt.date) -> ForecastItem:
-        self._ensure_model(vid, pid)
-        models = self._models[(vid, pid)]
-        sigma = self._sigmas.get((vid, pid), 4.0)
-        feats = self._feature_row(vid, pid, target_date)
-        order = ["temp","rain","lag1","lag7","ma7","dow_sin","dow_cos","mon_sin","mon_cos","doy_sin","doy_cos"]
+    def _feature_matrix(self, pairs: List[Tuple[int, int]], target_date: dt.date) -> "np.ndarray":
+        """
+        (len(pairs), len(FEATURES)) — 이력 색인(HistoryIndex)에서 lag/MA7/기온·강수 조회 + 달력 특징.
+          temp/rain : target_date 이하 최근 14행 평균
+          lag1/lag7 : 1일/7일 전 qty (없으면 마지막 qty / 최근 7행 평균)
+          ma7       : 직전 7일 평균 (없으면 최근 7행 평균)
+        """
+        assert self._index is not None
+        F = np.empty((len(pairs), len(FEATURES)), dtype=np.float64)
+        F[:, :5] = self._index.features(pairs, target_date)
+        F[:, 5:] = self._calendar(target_date)
+        return F
 
-        # 경고 제거: 예측 입력에 컬럼명을 포함한 DataFrame 전달
-        X1_df = pd.DataFrame([{k: feats[k] for k in order}])[order]
+    @staticmethod
+    def _calendar(target_date: dt.date) -> List[float]:
+        out = []
+        for v, p in ((target_date.weekday(), 7), (target_date.month, 12), (target_date.timetuple().tm_yday, 365)):
+            r = 2*math.pi*float(v)/p
+            out += [math.sin(r), math.cos(r)]
+        return out
 
+    @staticmethod
+    def _ensemble_predict(models: Dict[str, object], X_df: "pd.DataFrame", fast: bool = False) -> Tuple["np.ndarray", List[str]]:
+        """
+        행마다 앙상블 평균 — 모델당 한 번 호출.
+        fast=True: RF는 트리(tree_)별 예측을 직접 합산(입력 검사/스레드 풀 생략),
+                   XGB는 DMatrix 없이 inplace_predict — 결과는 같고 작은 배치에서 호출 비용이 크게 줄어듦
+        """
+        _import_ml()
         preds = []
         used = []
         if "rf" in models:
-            preds.append(models["rf"].predict(X1_df)[0]); used.append("rf")
+            rf = models["rf"]
+            if fast:
+                X32 = np.ascontiguousarray(X_df.values, dtype=np.float32)
+                acc = np.zeros(len(X32))
+                for est in rf.estimators_:
+                    acc += est.tree_.predict(X32)[:, 0]
+                preds.append(acc / len(rf.estimators_))
+            else:
+                preds.append(rf.predict(X_df))
+            used.append("rf")
         if "hgb" in models:
-            preds.append(models["hgb"].predict(X1_df)[0]); used.append("hgb")
+            preds.append(models["hgb"].predict(X_df)); used.append("hgb")
         if "xgb" in models:
-            dm = xgb.DMatrix(X1_df.values)  # type: ignore
-            preds.append(models["xgb"].predict(dm)[0]); used.append("xgb")
+            if fast:
+                preds.append(models["xgb"].inplace_predict(X_df.values))
+            else:
+                dm = xgb.DMatrix(X_df.values)  # type: ignore
+                preds.append(models["xgb"].predict(dm))
+            used.append("xgb")
+        if not preds:
+            return np.full(len(X_df), 15.0), used
+        return np.mean(np.vstack(preds), axis=0), used
 
-        y_hat = float(np.mean(preds)) if preds else 15.0
+    @staticmethod
+    def _item(vid: int, pid: int, y_hat: float, sigma: float, feats: Dict[str, float], used: List[str],
+              model: Optional[str] = None) -> ForecastItem:
         base = max(0.0, y_hat)
         qty = int(round(base * 1.10))  # 안전버퍼
         low = max(0, int(round(base - 1.0 * sigma)))
@@ -210,76 +747,205 @@ class _MLForecaster:
             conf_low=low,
             conf_high=high,
             details={
-                "model": f"ensemble({'+'.join(used)})" if used else "rule",
+                "model": model or (f"ensemble({'+'.join(used)})" if used else "rule"),
                 "y_hat": round(base,1),
                 "sigma": round(sigma,2),
                 "features": feats,
             },
         )
 
+    def predict_one(self, vid: int, pid: int, target_date: dt.date) -> ForecastItem:
+        """쌍 하나씩 (predict_batch 비교 기준). 공용 모델은 그룹 인코딩 열이 필요하므로 _infer 경로로"""
+        self._ensure_model(vid, pid)
+        if self.mode == "pooled":
+            return self.predict_batch([(vid, pid)], target_date)[0]
+        models = self._models[(vid, pid)]
+        sigma = self._sigmas.get((vid, pid), 4.0)
+        feats = self._feature_row(vid, pid, target_date)
+        # 경고 제거: 예측 입력에 컬럼명을 포함한 DataFrame 전달
+        X1_df = pd.DataFrame([{k: feats[k] for k in FEATURES}])[FEATURES]
+        y, used = self._ensemble_predict(models, X1_df)
+        return self._item(vid, pid, float(y[0]), sigma, feats, used)
+
+    def _ready(self, pairs: List[Tuple[int, int]]) -> List[int]:
+        """모델이 준비된 쌍의 위치 (inline 모드면 여기서 학습/로드)"""
+        ready = []
+        for i, (vid, pid) in enumerate(pairs):
+            try:
+                self._ensure_model(vid, pid)
+                ready.append(i)
+            except Exception:
+                continue
+        return ready
+
+    def _input_columns(self) -> List[str]:
+        return POOLED_FEATURES if self.mode == "pooled" else FEATURES
+
+    def _base_features(self, pairs: List[Tuple[int, int]], target_date: dt.date) -> "np.ndarray":
+        F = self._feature_matrix(pairs, target_date)
+        if self.mode == "pooled":
+            assert self._index is not None
+            unseen = np.array([k not in self._index for k in pairs], dtype=bool)
+            if unseen.any():
+                F[unseen, 2:5] = self._encode([k for k, u in zip(pairs, unseen) if u])[:, 2:3]  # 이력 없는 쌍: lag/MA7 자리에 추정 평균
+        return F
+
+    def _infer(self, pairs: List[Tuple[int, int]], F: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", List[str], "np.ndarray"]:
+        """
+        준비된 쌍들의 특징 행렬 → (y_hat, sigma, 모델 이름, 모델 입력 행렬).
+        같은 모델 묶음을 쓰는 행들은 모델당 한 번 호출 (공용 모델이면 전체가 한 번)
+        """
+        m = len(pairs)
+        if self.mode == "pooled":
+            X = np.hstack([F, self._encode(pairs)])
+            y, used = self._ensemble_predict(self._models[POOLED_KEY], pd.DataFrame(X, columns=POOLED_FEATURES), fast=True)
+            default = self._sigmas.get(POOLED_KEY, 4.0)
+            sigma = np.array([self._pooled_sigma.get(k, default) for k in pairs], dtype=np.float64)
+            return y, sigma, [f"pooled({'+'.join(used)})"] * m, X
+
+        X_df = pd.DataFrame(F, columns=FEATURES)
+        y = np.empty(m)
+        labels = [""] * m
+        batches: Dict[int, List[int]] = defaultdict(list)
+        for r, key in enumerate(pairs):
+            batches[id(self._models[key])].append(r)
+        for rows in batches.values():
+            yb, used = self._ensemble_predict(self._models[pairs[rows[0]]], X_df.iloc[rows], fast=True)
+            y[rows] = yb
+            for r in rows:
+                labels[r] = f"ensemble({'+'.join(used)})" if used else "rule"
+        sigma = np.array([self._sigmas.get(k, 4.0) for k in pairs], dtype=np.float64)
+        return y, sigma, labels, F
+
+    def predict_batch(self, pairs: List[Tuple[int, int]], target_date: dt.date) -> List[Optional[ForecastItem]]:
+        """
+        여러 (village_id, product_id)를 한 번에 예측 — 특징은 이력 색인에서 한 번에,
+        모델 호출은 _infer. 모델이 없는 쌍은 None (호출 측에서 규칙 기반으로 대체)
+        """
+        out: List[Optional[ForecastItem]] = [None] * len(pairs)
+        ready = self._ready(pairs)
+        if not ready:
+            return out
+        sub = [pairs[i] for i in ready]
+        y, sigma, labels, X = self._infer(sub, self._base_features(sub, target_date))
+        cols = self._input_columns()
+        for r, i in enumerate(ready):
+            vid, pid = sub[r]
+            feats = dict(zip(cols, X[r].tolist()))
+            feats["rain"] = int(feats["rain"])
+            out[i] = self._item(vid, pid, float(y[r]), float(sigma[r]), feats, [], model=labels[r])
+        return out
+
+    def predict_horizon(self, pairs: List[Tuple[int, int]], start: dt.date, days: int) -> Tuple[List[int], "np.ndarray", "np.ndarray", List[str]]:
+        """
+        start부터 days일 — 하루씩 전체 쌍을 한 번에 예측하고, 이력 마지막 날 이후의 lag1/lag7/MA7은
+        앞선 날의 예측값(y_hat)으로 채워 다음 날로 넘김 (재귀 예측).
+        Returns (준비된 쌍 위치, y_hat (m, days), sigma (m,), 모델 이름)
+        """
+        ready = self._ready(pairs)
+        sub = [pairs[i] for i in ready]
+        m = len(sub)
+        Y = np.zeros((m, days))
+        if not m:
+            return ready, Y, np.zeros(0), []
+        assert self._index is not None
+        last = self._index.last_days(sub)
+        s0 = start.toordinal()
+        sigma = np.zeros(m)
+        labels: List[str] = []
+        for k in range(days):
+            t = s0 + k
+            F = self._base_features(sub, start + dt.timedelta(days=k))
+            if k >= 1:
+                use = (t - 1) > last
+                F[use, 2] = Y[use, k - 1]
+            if k >= 7:
+                use = (t - 7) > last
+                F[use, 3] = Y[use, k - 7]
+            if k >= 1:
+                # MA7 구간 [t-7, t-1]: 이력(마지막 날 이하) + 예측(마지막 날 이후, start 이상)
+                lo = max(0, k - 7)
+                pred_mask = (np.arange(s0 + lo, t)[None, :] > last[:, None])
+                p_sum = (Y[:, lo:k] * pred_mask).sum(axis=1)
+                p_cnt = pred_mask.sum(axis=1)
+                a_sum, a_cnt = self._index.window(sub, t - 7, t - 1)
+                upd = p_cnt > 0
+                F[upd, 4] = (p_sum[upd] + a_sum[upd]) / (p_cnt[upd] + a_cnt[upd])
+            y, sigma, labels, _X = self._infer(sub, F)
+            Y[:, k] = np.maximum(0.0, y)
+        return ready, Y, sigma, labels
+
 # ---------------- Rule-based fallback ----------------
-def _seed_history(villages: List[int], products: List[int], days: int = 120) -> List[Tuple[int,int,dt.date,int]]:
-    today = dt.date.today()
-    out = []
-    for vid in villages:
-        for pid in products:
-            base = 20 + (pid % 7) * 2
-            for d in range(days):
-                day = today - dt.timedelta(days=days - d)
-                w = day.weekday()
-                weekday_factor = 1.0
-                if w in (1, 4):
-                    weekday_factor = 1.2
-                elif w in (5, 6):
-                    weekday_factor = 0.8
-                trend = 1.0 + d / days * 0.05
-                noise = random.uniform(0.85, 1.15)
-                qty = max(0, int(round(base * weekday_factor * trend * noise)))
-                out.append((vid, pid, day, qty))
-    return out
+_RULES: Optional[WeekdayBaseline] = None
+_RULES_LOCK = threading.Lock()
 
-def _forecast_rule_based(date: str, villages: List[int], products: List[int]) -> List[ForecastItem]:
-    hist = _seed_history(villages, products, days=120)
-    target_w = _weekday_idx(date)
-    buckets: Dict[Tuple[int,int,int], List[int]] = defaultdict(list)
-    last_date = max(h[2] for h in hist)
-    cutoff = last_date - dt.timedelta(days=28)
-    for vid, pid, d, qty in hist:
-        if d.weekday() != target_w: continue
-        if d <= cutoff: continue
-        buckets[(vid, pid, d.weekday())].append(qty)
+def get_rules() -> WeekdayBaseline:
+    """실제 판매 이력 기반 규칙 엔진 (ML 예측기의 이력을 재사용, 없으면 sales 표를 직접 읽음)"""
+    global _RULES
+    if _RULES is None:
+        with _RULES_LOCK:
+            if _RULES is None:
+                h = _ML._frame if _ML is not None else None
+                if h is not None:
+                    eng = WeekdayBaseline()
+                    eng.update(h["village_id"].to_numpy(dtype=np.int64), h["product_id"].to_numpy(dtype=np.int64),
+                               day_ordinals(h["day"].to_numpy()), h["qty"].to_numpy(dtype=np.float64))
+                else:
+                    eng = WeekdayBaseline.from_rows(sales_store.fetch_rows(("ts", "village_id", "product_id", "qty")))
+                _RULES = eng
+    return _RULES
 
+def _rule_items(pairs: List[Tuple[int, int]], target_date: dt.date) -> List[ForecastItem]:
+    base, sigma, source = get_rules().predict(pairs, target_date)
     out: List[ForecastItem] = []
-    for vid in villages:
-        for pid in products:
-            arr = buckets.get((vid, pid, target_w), [])
-            if not arr:
-                arr = [q for (v,p,dd,q) in hist if v==vid and p==pid and (last_date - dd).days <= 7]
-            if not arr:
-                base = 20; sigma = 5
-            else:
-                weights = list(range(1, len(arr)+1))
-                base = sum(a*w for a,w in zip(arr, weights)) / sum(weights)
-                mean = sum(arr)/len(arr)
-                var = sum((x-mean)**2 for x in arr) / max(1,(len(arr)-1))
-                sigma = math.sqrt(var)
-            qty = int(round(base * 1.10 + sigma))
-            low = max(0, int(round(base - 1.0*sigma)))
-            high = int(round(base + 1.5*sigma))
-            out.append(ForecastItem(
-                village_id=vid, product_id=pid, qty=qty, conf_low=low, conf_high=high,
-                details={"model":"rule","sigma":round(float(sigma),2),"base":round(float(base),1)}
-            ))
+    for (vid, pid), b, sd, src in zip(pairs, base.tolist(), sigma.tolist(), source):
+        qty = int(round(b * 1.10 + sd))
+        low = max(0, int(round(b - 1.0*sd)))
+        high = int(round(b + 1.5*sd))
+        out.append(ForecastItem(
+            village_id=vid, product_id=pid, qty=qty, conf_low=low, conf_high=high,
+            details={"model":"rule","sigma":round(sd,2),"base":round(b,1),"source":src}
+        ))
     return out
 
+def _forecast_rule_based(date: str, villages: List[int], products: List[int]) -> List[ForecastItem]:
+    return _rule_items([(vid, pid) for vid in villages for pid in products], dt.date.fromisoformat(date))
+
 # ---------------- Public API ----------------
-_BASE_DIR = Path(__file__).resolve().parent.parent
 _ML: Optional[_MLForecaster] = None
-if _SKLEARN_OK:
-    try:
-        _ML = _MLForecaster(_BASE_DIR)
-    except Exception:
-        _ML = None
+_ML_LOCK = threading.Lock()
+_ML_FAILED = False
+_TRAIN_INLINE = True
+
+def get_ml() -> Optional[_MLForecaster]:
+    """ML 예측기 — 첫 호출에서 생성 (라이브러리 import + 판매 이력 로드). 쓸 수 없으면 None"""
+    global _ML, _ML_FAILED
+    if FORECAST_MODEL == "rule":
+        return None
+    if _ML is None and not _ML_FAILED:
+        with _ML_LOCK:
+            if _ML is None and not _ML_FAILED:
+                try:
+                    ml = _MLForecaster(store=get_store())
+                    ml.train_inline = _TRAIN_INLINE
+                    _ML = ml
+                except Exception:
+                    _ML_FAILED = True
+    return _ML
+
+def set_train_inline(flag: bool):
+    """False면 요청 경로에서 학습하지 않음 — 예측기가 아직 없으면 생성될 때 적용"""
+    global _TRAIN_INLINE
+    _TRAIN_INLINE = flag
+    if _ML is not None:
+        _ML.train_inline = flag
+
+def _sync_history(ml: _MLForecaster):
+    """다른 워커가 적재한 판매 반영 — 예측기 이력을 다시 색인했으면 규칙 엔진도 새 이력으로 다시 만듦"""
+    global _RULES
+    with _RULES_LOCK:
+        if ml.sync_history():
+            _RULES = None
 
 def forecast(date: str, villages: List[int], products: List[int]) -> List[ForecastItem]:
     try:
@@ -287,17 +953,120 @@ def forecast(date: str, villages: List[int], products: List[int]) -> List[Foreca
     except Exception:
         target_date = dt.date.today()
 
-    if _ML is None:
+    ml = get_ml()
+    if ml is None:
         return _forecast_rule_based(target_date.isoformat(), villages, products)
+    _sync_history(ml)
 
-    out: List[ForecastItem] = []
-    for vid in villages:
-        for pid in products:
-            try:
-                out.append(_ML.predict_one(vid, pid, target_date))
-            except Exception:
-                out.extend(_forecast_rule_based(target_date.isoformat(), [vid], [pid]))
-    return out
+    pairs = [(vid, pid) for vid in villages for pid in products]
+    day = target_date.isoformat()
+    cache = get_forecast_cache()
+    items: List[Optional[ForecastItem]] = [None] * len(pairs)
+    if cache.enabled:
+        for i, (vid, pid) in enumerate(pairs):
+            ver = ml.cache_version(vid, pid)
+            if ver is not None:
+                items[i] = cache.get((day, vid, pid) + ver)
+    todo = [i for i, it in enumerate(items) if it is None]
+    if todo:
+        try:
+            fresh = ml.predict_batch([pairs[i] for i in todo], target_date)
+        except Exception:
+            fresh = [None] * len(todo)
+        for i, item in zip(todo, fresh):
+            items[i] = item
+            ver = ml.cache_version(*pairs[i]) if item is not None else None
+            if ver is not None:
+                cache.put((day,) + pairs[i] + ver, item)
+
+    missing = [i for i, it in enumerate(items) if it is None]
+    if missing:
+        for i, it in zip(missing, _rule_items([pairs[i] for i in missing], target_date)):
+            it.details["fallback"] = ml.fallback_reason(*pairs[i])
+            items[i] = it
+    return items
+
+def _horizon_columns(b: "np.ndarray", sigma: "np.ndarray", rule: bool) -> Tuple[List, List, List]:
+    """(쌍, 일) 기준값 배열 → qty/conf_low/conf_high 열 — _item/_rule_items와 같은 식"""
+    if rule:
+        qty, low, high = b * 1.10 + sigma, b - 1.0 * sigma, b + 1.5 * sigma
+    else:
+        qty, low, high = b * 1.10, b - 1.0 * sigma, b + 1.6 * sigma
+    return (np.round(qty).astype(int).tolist(), np.maximum(0, np.round(low)).astype(int).tolist(),
+            np.round(high).astype(int).tolist())
+
+def forecast_horizon(start: str, days: int, villages: List[int], products: List[int]) -> Dict:
+    """
+    start부터 days일 예측 — 쌍마다 날짜별 배열(열 형식)로 반환.
+    ML 예측은 하루씩 전체 쌍을 한 번에 돌리며 lag/MA7을 앞선 예측값으로 이어 감, 모델이 없는 쌍은 규칙 기반
+    """
+    start_date = dt.date.fromisoformat(start)
+    days = max(1, min(int(days), HORIZON_MAX_DAYS))
+    dates = [start_date + dt.timedelta(days=k) for k in range(days)]
+    pairs = [(vid, pid) for vid in villages for pid in products]
+    results: List[Optional[Dict]] = [None] * len(pairs)
+
+    ml = get_ml()
+    if ml is not None:
+        _sync_history(ml)
+        try:
+            ready, Y, sigma, labels = ml.predict_horizon(pairs, start_date, days)
+        except Exception:
+            ready, Y, sigma, labels = [], None, None, []
+        if ready:
+            qty, low, high = _horizon_columns(Y, np.repeat(sigma[:, None], days, axis=1), rule=False)
+            for r, i in enumerate(ready):
+                results[i] = {"model": labels[r], "sigma": round(float(sigma[r]), 2),
+                              "qty": qty[r], "conf_low": low[r], "conf_high": high[r]}
+
+    missing = [i for i, res in enumerate(results) if res is None]
+    if missing:
+        sub = [pairs[i] for i in missing]
+        rules = get_rules()
+        B = np.empty((len(sub), days))
+        S = np.empty((len(sub), days))
+        for k, d in enumerate(dates):
+            B[:, k], S[:, k], _src = rules.predict(sub, d)
+        qty, low, high = _horizon_columns(B, S, rule=True)
+        for r, i in enumerate(missing):
+            results[i] = {"model": "rule", "qty": qty[r], "conf_low": low[r], "conf_high": high[r]}
+            if ml is not None:
+                results[i]["fallback"] = ml.fallback_reason(*pairs[i])
+
+    return {
+        "start": start_date.isoformat(),
+        "days": days,
+        "dates": [d.isoformat() for d in dates],
+        "results": [dict(village_id=vid, product_id=pid, **res) for (vid, pid), res in zip(pairs, results)],
+    }
+
+def ingest_sales(rows: List[Dict]) -> Dict[str, object]:
+    """
+    새 판매 행 반영 — sales 표에 적재하고, ML 이력/색인·규칙 엔진을 갱신한 뒤 모델 증분 갱신.
+    Returns {"rows", "groups", "updated", "refit": {그룹: 사유}, "untrained"} — refit은 호출 측이 재학습 작업으로
+    """
+    if not rows:
+        return {"rows": 0, "groups": 0, "updated": [], "refit": {}, "untrained": 0}
+    rows = [sales_store.normalize(r) for r in rows]
+    ml = get_ml()  # 적재 전에 — 예측기가 이번 행까지 표에서 읽은 뒤 다시 덧붙이지 않도록
+    sales_store.insert_rows(rows)
+    vids = [int(r["village_id"]) for r in rows]
+    pids = [int(r["product_id"]) for r in rows]
+    days = [dt.date.fromisoformat(str(r["ts"])[:10]).toordinal() for r in rows]
+    qty = [float(r.get("qty") or 0) for r in rows]
+    groups = len(set(zip(vids, pids)))
+    if ml is None:
+        with _RULES_LOCK:
+            if _RULES is not None:
+                _RULES.update(vids, pids, days, qty)
+        return {"rows": len(rows), "groups": groups, "updated": [], "refit": {}, "untrained": 0}
+    # 규칙 엔진이 아직 없으면 나중에 새 이력으로 만들어지므로, 이력 교체와 규칙 갱신을 같은 잠금 안에서 (이중 반영 방지)
+    with _RULES_LOCK:
+        delta = ml.extend_history(pd.DataFrame(rows))
+        if _RULES is not None:
+            _RULES.update(vids, pids, days, qty)
+    summary = ml.update_models(delta)
+    return {"rows": len(rows), "groups": groups, **summary}
 
 def predict(date: str, villages: List[int], products: List[int]):
     return forecast(date, villages, products)
@@ -0,0 +1,113 @@
+# app/services/forecast_cache.py
+"""
+수요예측 결과 메모리 캐시 (LRU + TTL + 용량 상한)
+
+- 키: (target_date, village_id, product_id, 모델 버전, 판매 데이터 버전)
+  → 재학습(모델 버전 증가)이나 판매 데이터 반영(데이터 버전 변경) 시 옛 항목은 자동으로 조회되지 않고
+    LRU/TTL로 밀려남 (invalidate()로 즉시 비울 수도 있음)
+- ML 예측만 저장 — 규칙 기반 대체값은 모델 준비 전 임시 값이라 저장하지 않음
+- 항목 크기는 pickle 길이로 추정, 총량이 FORECAST_CACHE_MB를 넘으면 오래된 것부터 제거
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Dict, Hashable, Optional, Tuple
+import os
+import pickle
+import threading
+import time
+
+FORECAST_CACHE_ENTRIES = int(os.getenv("ITDA_FORECAST_CACHE_ENTRIES", "50000"))
+FORECAST_CACHE_MB = float(os.getenv("ITDA_FORECAST_CACHE_MB", "64"))
+FORECAST_CACHE_TTL_S = float(os.getenv("ITDA_FORECAST_CACHE_TTL_S", "900"))
+
+
+class ForecastCache:
+    def __init__(self, max_entries: int = FORECAST_CACHE_ENTRIES, max_bytes: int = int(FORECAST_CACHE_MB * 1e6),
+                 ttl_s: float = FORECAST_CACHE_TTL_S):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, int, object]]" = OrderedDict()  # key -> (만료 시각, 크기, 항목)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.ttl_s > 0
+
+    def get(self, key: Hashable):
+        """있으면 항목 사본(details 사전도 복사), 없거나 만료면 None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, size, item = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return replace(item, details=dict(item.details))
+
+    def put(self, key: Hashable, item) -> None:
+        if not self.enabled:
+            return
+        size = len(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)) + 64 * len(key)
+        item = replace(item, details=dict(item.details))  # 호출 측이 돌려받은 객체를 고쳐도 캐시는 그대로
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (time.monotonic() + self.ttl_s, size, item)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _k, (_e, s, _i) = self._data.popitem(last=False)
+                self._bytes -= s
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """전체 비우기 — 데이터 반영/재학습 직후 메모리를 바로 돌려받고 싶을 때"""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+            }
+
+
+_CACHE: Optional[ForecastCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_forecast_cache() -> ForecastCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ForecastCache()
+    return _CACHE
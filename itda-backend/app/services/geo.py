@@ -1,9 +1,13 @@
 # app/services/geo.py
 import math
 
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0  # matrix.py 등 벡터화 거리 계산도 이 값을 import
+
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """구면 코사인/Haversine: km"""
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     p1, p2 = math.radians(lat1), math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
     dlambda = math.radians(lon2 - lon1)
@@ -15,3 +19,118 @@ def travel_minutes(distance_km: float, avg_kmh: float = 35.0) -> float:
     if avg_kmh <= 0:
         avg_kmh = 35.0
     return (distance_km / avg_kmh) * 60.0
+
+
+# ---------------- Spatial index ----------------
+def _kdtree(xy: np.ndarray):
+    from scipy.spatial import cKDTree  # 경로 계산 때만 로드 (서버 기동 시간)
+    return cKDTree(xy)
+
+
+class SpatialIndex:
+    """
+    위경도 점 집합 KD-tree (기준 위도 등장방형 투영, km 좌표).
+    - 군 단위 범위에서 투영 오차는 무시할 수준 → 후보 탐색은 투영 거리,
+      반환 거리는 Haversine(km)으로 다시 계산
+    - k-최근접 / 반경 질의 / 최근접 이웃 경로 생성
+    """
+
+    def __init__(self, lats, lons):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.n = int(self.lats.shape[0])
+        lat0 = float(self.lats.mean()) if self.n else 0.0
+        self._ky = math.radians(1.0) * EARTH_RADIUS_KM
+        self._kx = self._ky * math.cos(math.radians(lat0))
+        self.xy = self.project(self.lats, self.lons)
+        self._tree = _kdtree(self.xy) if self.n else None
+
+    def project(self, lats, lons) -> np.ndarray:
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        return np.column_stack((lons * self._kx, lats * self._ky))
+
+    def _exact(self, lat: float, lon: float, idx: np.ndarray):
+        from .matrix import haversine_rows
+        d = haversine_rows(lat, lon, self.lats[idx], self.lons[idx])
+        order = np.argsort(d, kind="stable")
+        return d[order], idx[order]
+
+    def knearest(self, lat: float, lon: float, k: int = 1):
+        """(거리 km, 인덱스) — 가까운 순"""
+        k = min(int(k), self.n)
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        _d, idx = self._tree.query(self.project([lat], [lon])[0], k=k)
+        return self._exact(lat, lon, np.atleast_1d(idx).astype(np.intp))
+
+    def within(self, lat: float, lon: float, radius_km: float):
+        """반경 radius_km 이내 (거리 km, 인덱스) — 가까운 순"""
+        if self.n == 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        idx = np.asarray(self._tree.query_ball_point(self.project([lat], [lon])[0], r=radius_km * 1.01), dtype=np.intp)
+        d, idx = self._exact(lat, lon, idx)
+        keep = d <= radius_km
+        return d[keep], idx[keep]
+
+    def neighbor_lists(self, k: int = 8) -> np.ndarray:
+        """점별 가까운 순 k개 이웃 인덱스 (자기 자신 제외), shape (n, min(k, n-1))"""
+        k = min(int(k), self.n - 1)
+        if k <= 0:
+            return np.empty((self.n, 0), dtype=np.intp)
+        _d, idx = self._tree.query(self.xy, k=k + 1)
+        idx = idx.astype(np.intp)
+        # 자기 자신(보통 첫 열, 중복 좌표면 다른 열)을 빼고 k개
+        out = np.empty((self.n, k), dtype=np.intp)
+        for i in range(self.n):
+            row = idx[i][idx[i] != i]
+            out[i] = row[:k]
+        return out
+
+    def nearest_neighbor_path(self, origin: int, weights=None) -> list:
+        """
+        origin에서 시작해 '가장 가까운 미방문 점'을 반복 선택한 방문 순서 (origin 제외).
+        weights가 있으면 거리 / weight 최소 점 선택 (우선순위 가중).
+        미방문 점만으로 트리를 주기적으로 재구성 → 전체 O(n log n) 수준.
+        """
+        n = self.n
+        visited = np.zeros(n, dtype=bool)
+        visited[origin] = True
+        w = None if weights is None else np.asarray(weights, dtype=np.float64)
+        # 가중치 범위 → 반경 질의 배수: d/w 최소 후보는 최근접 거리 × (w_max / w_min) 안에 있음
+        w_ratio = 1.0 if w is None else float(w.max() / max(w.min(), 1e-9))
+
+        alive = np.flatnonzero(~visited)
+        tree = _kdtree(self.xy[alive]) if len(alive) else None
+        dead_in_tree = 0
+        path: list = []
+        cur = origin
+        while len(path) < n - 1:
+            if dead_in_tree > len(alive) // 2 and len(alive) > 64:
+                alive = np.flatnonzero(~visited)
+                tree = _kdtree(self.xy[alive])
+                dead_in_tree = 0
+            p = self.xy[cur]
+            k = 8
+            while True:
+                kk = min(k, len(alive))
+                _d, loc = tree.query(p, k=kk)
+                cand = alive[np.atleast_1d(loc)]
+                cand = cand[~visited[cand]]
+                if len(cand) or kk == len(alive):
+                    break
+                k *= 4
+            if w is not None and w_ratio > 1.0:
+                r = float(np.hypot(*(self.xy[cand[0]] - p))) * w_ratio * 1.01
+                ball = alive[np.asarray(tree.query_ball_point(p, r=r), dtype=np.intp)]
+                cand = ball[~visited[ball]]
+            d, cand = self._exact(self.lats[cur], self.lons[cur], cand)
+            if w is not None:
+                nxt = int(cand[np.argmin(d / w[cand])])
+            else:
+                nxt = int(cand[0])
+            visited[nxt] = True
+            dead_in_tree += 1
+            path.append(nxt)
+            cur = nxt
+        return path
@@ -0,0 +1,157 @@
+# app/services/history_index.py
+"""
+판매 이력 그룹 색인 — (village_id, product_id)별 날짜순 연속 배열 + 누적합
+- 행 키 = 그룹번호 * _SPAN + 날짜 서수(ordinal) → 전체가 하나의 정렬 배열,
+  어떤 그룹/날짜 조회든 np.searchsorted 한 번 (여러 그룹도 한 번에 벡터화)
+- 구간 평균(최근 14행 기온/강수, MA7, 마지막 7행)은 누적합 차이로 O(1)
+- from_frame: 공용 판매 프레임(sales_store.sales_frame, 적재 순)을 복사·정렬하지 않고 색인만 —
+  정렬 순서는 order(프레임의 iloc 위치)로 보관
+학습 프레임은 order[rows(key)]로 얻은 그룹 행만 공용 프레임에서 꺼내 씀 (불리언 마스크 스캔 없음).
+"""
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+import datetime as dt
+
+import numpy as np
+
+_SPAN = 1 << 22  # date.toordinal() 최대값(3,652,059)보다 큼
+_EPOCH = dt.date(1970, 1, 1).toordinal()
+
+# features()가 돌려주는 열 순서 (forecast.FEATURES 앞 5개와 같음)
+COLUMNS = ("temp", "rain", "lag1", "lag7", "ma7")
+_DEFAULTS = (18.0, 0.0, 15.0, 15.0, 15.0)  # 이력이 없는 그룹
+
+
+def day_ordinals(days) -> np.ndarray:
+    """datetime64 날짜 열 → date.toordinal() 값"""
+    return np.asarray(days, dtype="datetime64[D]").astype(np.int64) + _EPOCH
+
+
+class HistoryIndex:
+    def __init__(self, vids, pids, days, qty, temp, rain):
+        """모든 배열은 (village_id, product_id, 날짜) 순으로 정렬돼 있어야 함. days = date.toordinal()"""
+        vids = np.asarray(vids, dtype=np.int64)
+        pids = np.asarray(pids, dtype=np.int64)
+        n = len(vids)
+        start = np.flatnonzero(np.r_[True, (vids[1:] != vids[:-1]) | (pids[1:] != pids[:-1])]) if n else np.zeros(0, int)
+        self._lo = start
+        self._hi = np.r_[start[1:], n].astype(np.int64) if n else np.zeros(0, int)
+        self._gid: Dict[Tuple[int, int], int] = {
+            (int(vids[s]), int(pids[s])): g for g, s in enumerate(start.tolist())
+        }
+        gid_rows = np.repeat(np.arange(len(start), dtype=np.int64), self._hi - self._lo)
+        self._key = gid_rows * _SPAN + np.asarray(days, dtype=np.int64)
+        self._qty = np.asarray(qty, dtype=np.float64)
+        self._cq = np.r_[0.0, np.cumsum(self._qty)]
+        self._ct = np.r_[0.0, np.cumsum(np.asarray(temp, dtype=np.float64))]
+        self._cr = np.r_[0.0, np.cumsum(np.asarray(rain, dtype=np.float64))]
+        self.order = np.arange(n, dtype=np.int64)  # 정렬된 행 → 원본 행 위치
+
+    @classmethod
+    def from_frame(cls, df) -> "HistoryIndex":
+        """
+        판매 프레임(열 day, village_id, product_id, qty, temp, rain — sales_store.sales_frame 형식)에서.
+        행 순서는 상관없음 — (마을, 상품, 날짜) 안정 정렬 순서를 order에 (같은 날짜 행은 원래 순서)
+        """
+        vids = df["village_id"].to_numpy(dtype=np.int64)
+        pids = df["product_id"].to_numpy(dtype=np.int64)
+        days = day_ordinals(df["day"].to_numpy())
+        order = np.lexsort((days, pids, vids))
+        temp = df["temp"].fillna(18.0).to_numpy(dtype=np.float64)
+        rain = df["rain"].fillna(0).to_numpy(dtype=np.float64)
+        qty = df["qty"].to_numpy(dtype=np.float64)
+        index = cls(vids[order], pids[order], days[order], qty[order], temp[order], rain[order])
+        index.order = order
+        return index
+
+    def __len__(self) -> int:
+        return len(self._key)
+
+    def groups(self) -> List[Tuple[int, int]]:
+        return list(self._gid)
+
+    def __contains__(self, key) -> bool:
+        return (int(key[0]), int(key[1])) in self._gid
+
+    def rows(self, key: Tuple[int, int]) -> slice:
+        """그룹의 행 구간 (정렬 순서 기준 — 원본 프레임의 iloc 위치는 order[구간]) — 없으면 빈 slice"""
+        g = self._gid.get((int(key[0]), int(key[1])))
+        if g is None:
+            return slice(0, 0)
+        return slice(int(self._lo[g]), int(self._hi[g]))
+
+    def count(self, key: Tuple[int, int]) -> int:
+        r = self.rows(key)
+        return r.stop - r.start
+
+    def _gids(self, pairs: Sequence[Tuple[int, int]]) -> np.ndarray:
+        return np.fromiter((self._gid.get((int(v), int(p)), -1) for v, p in pairs), dtype=np.int64, count=len(pairs))
+
+    def last_days(self, pairs: Sequence[Tuple[int, int]]) -> np.ndarray:
+        """그룹별 마지막 기록 날짜 서수 — 이력 없는 쌍은 -1"""
+        g = self._gids(pairs)
+        out = np.full(len(pairs), -1, dtype=np.int64)
+        known = g >= 0
+        out[known] = self._key[self._hi[g[known]] - 1] - g[known] * _SPAN
+        return out
+
+    def window(self, pairs: Sequence[Tuple[int, int]], first_day: int, last_day: int) -> Tuple[np.ndarray, np.ndarray]:
+        """[first_day, last_day] 날짜 구간의 qty 합과 행 수"""
+        g = self._gids(pairs)
+        total = np.zeros(len(pairs))
+        count = np.zeros(len(pairs), dtype=np.int64)
+        known = np.flatnonzero(g >= 0)
+        if len(known):
+            base = g[known] * _SPAN
+            a = np.searchsorted(self._key, base + first_day, side="left")
+            b = np.searchsorted(self._key, base + last_day, side="right")
+            total[known] = self._cq[b] - self._cq[a]
+            count[known] = b - a
+        return total, count
+
+    def _mean(self, csum: np.ndarray, a: np.ndarray, b: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+        cnt = b - a
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(cnt > 0, (csum[b] - csum[a]) / np.maximum(cnt, 1), fallback)
+
+    def features(self, pairs: Sequence[Tuple[int, int]], target_date: dt.date) -> np.ndarray:
+        """
+        (len(pairs), 5) — COLUMNS 순서
+          temp/rain : target_date 이하 마지막 14행 평균 (rain은 반올림)
+          lag1/lag7 : 정확히 1일/7일 전 qty, 없으면 마지막 qty / 마지막 7행 평균
+          ma7       : (d-8, d-1] 날짜 구간 평균, 없으면 마지막 7행 평균
+        """
+        m = len(pairs)
+        out = np.tile(np.asarray(_DEFAULTS), (m, 1))
+        g = self._gids(pairs)
+        known = np.flatnonzero(g >= 0)
+        if not len(known):
+            return out
+        g = g[known]
+        lo, hi = self._lo[g], self._hi[g]
+        base = g * _SPAN
+        t = target_date.toordinal()
+        key, qty = self._key, self._qty
+        last = len(key) - 1
+
+        def at(day: int, side: str) -> np.ndarray:
+            return np.searchsorted(key, base + day, side=side)
+
+        tail = np.maximum(lo, hi - 7)
+        tail7 = self._mean(self._cq, tail, hi, np.full(len(g), _DEFAULTS[2]))
+
+        ht = at(t, "right")
+        rl = np.maximum(lo, ht - 14)
+        out[known, 0] = self._mean(self._ct, rl, ht, np.full(len(g), _DEFAULTS[0]))
+        out[known, 1] = np.round(self._mean(self._cr, rl, ht, np.full(len(g), _DEFAULTS[1])))
+
+        i1 = at(t - 1, "left")
+        hit1 = (i1 < hi) & (key[np.minimum(i1, last)] == base + t - 1)
+        out[known, 2] = np.where(hit1, qty[np.minimum(i1, last)], qty[hi - 1])
+
+        i7 = at(t - 7, "left")
+        hit7 = (i7 < hi) & (key[np.minimum(i7, last)] == base + t - 7)
+        out[known, 3] = np.where(hit7, qty[np.minimum(i7, last)], tail7)
+
+        out[known, 4] = self._mean(self._cq, at(t - 8, "right"), at(t - 1, "right"), tail7)
+        return out
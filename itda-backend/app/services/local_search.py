@@ -0,0 +1,241 @@
+# app/services/local_search.py
+"""
+열린 경로(open path) 지역 탐색 엔진
+
+- 경로: 0(출발지, 고정) -> order[0] -> ... -> order[-1] (종점 자유)
+- 이동 평가는 바뀌는 간선만 보는 O(1) 델타
+- k-최근접 후보 리스트 + don't-look bit 큐로 탐색 범위 제한
+  (FULL_NEIGHBOURHOOD_N 이하 정점은 후보 제한 없이 전체 이웃)
+- 이동: 2-opt(구간 뒤집기), Or-opt(길이 1~3 구간 이동, 정/역방향)
+NOTE: 델타 계산은 대칭 행렬(D[a,b] == D[b,a]) 가정.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+import os
+import time
+
+import numpy as np
+
+_EPS = 1e-9
+OR_OPT_MAX_SEG = 3
+# 이 이하 정점 수면 k-최근접 대신 전체 이웃 탐색 — 작은 경로는 후보 제한으로 놓치는 이동이 더 비쌈
+FULL_NEIGHBOURHOOD_N = int(os.getenv("ITDA_LS_FULL_N", "200"))
+
+
+def path_legs(D: np.ndarray, order: Sequence[int], start: int = 0) -> np.ndarray:
+    """구간별 비용: [D[start, order[0]], D[order[0], order[1]], ...]"""
+    if len(order) == 0:
+        return np.empty(0, dtype=np.float64)
+    idx = np.asarray(order, dtype=np.intp)
+    prev = np.concatenate(([start], idx[:-1]))
+    return D[prev, idx]
+
+
+def path_length(D: np.ndarray, order: Sequence[int], start: int = 0) -> float:
+    """열린 경로 비용: start -> order[0] -> ... -> order[-1]"""
+    return float(path_legs(D, order, start).sum())
+
+
+def candidate_lists(D: np.ndarray, k: int = 8) -> np.ndarray:
+    """노드별 가까운 순 k개 후보 (자기 자신 제외), shape (N, min(k, N-1))"""
+    N = D.shape[0]
+    k = max(0, min(k, N - 1))
+    if k == 0:
+        return np.empty((N, 0), dtype=np.intp)
+    work = np.array(D, dtype=np.float64, copy=True)
+    np.fill_diagonal(work, np.inf)
+    part = np.argpartition(work, k - 1, axis=1)[:, :k]
+    rows = np.arange(N)[:, None]
+    order = np.argsort(work[rows, part], axis=1, kind="stable")
+    return part[rows, order]
+
+
+class _Tour:
+    """t[0] = 0 고정, pos[node] = t에서의 위치"""
+
+    def __init__(self, order: Sequence[int], N: int):
+        self.t: List[int] = [0] + [int(x) for x in order]
+        self.pos: List[int] = [0] * N
+        for i, v in enumerate(self.t):
+            self.pos[v] = i
+
+    def _reindex(self, lo: int, hi: int) -> None:
+        t, pos = self.t, self.pos
+        for i in range(lo, hi + 1):
+            pos[t[i]] = i
+
+    def reverse(self, i: int, j: int) -> None:
+        """t[i..j] 뒤집기 (1 <= i < j)"""
+        self.t[i : j + 1] = self.t[i : j + 1][::-1]
+        self._reindex(i, j)
+
+    def move_segment(self, i: int, L: int, after: int, reverse: bool) -> None:
+        """t[i..i+L-1] 구간을 노드 after 뒤로 옮김 (after는 구간 밖 노드)"""
+        t = self.t
+        seg = t[i : i + L]
+        if reverse:
+            seg.reverse()
+        del t[i : i + L]
+        j = self.pos[after]
+        k = (j - L if j > i else j) + 1
+        t[k:k] = seg
+        self._reindex(min(i, k), max(i + L - 1, k + L - 1))
+
+
+def improve(
+    D: np.ndarray,
+    order: Sequence[int],
+    k: int = 8,
+    time_limit_s: Optional[float] = None,
+    active: Optional[Iterable[int]] = None,
+    cand: Optional[np.ndarray] = None,
+    on_progress: Optional[Callable[[float, List[int]], bool]] = None,
+) -> Tuple[float, List[int]]:
+    """
+    2-opt + Or-opt 지역 탐색 (first-improvement).
+    - order: 방문 순서 (행렬 인덱스 1..n, 0은 출발지)
+    - k / cand: 노드별 후보 수 / 후보 리스트 (cand 없고 n <= FULL_NEIGHBOURHOOD_N이면 전체 이웃)
+    - active: 처음에 탐색할 노드 (None이면 전체) — 일부만 바뀐 경로의 국소 개선용
+    - time_limit_s: 초과 시 현재까지의 최선 경로 반환
+    - on_progress(cost, order): 주기적 점검 시 비용이 줄었으면 호출, True 반환 시 중단
+    Returns (cost, order).
+    """
+    D = np.asarray(D, dtype=np.float64)
+    N = D.shape[0]
+    tour = _Tour(order, N)
+    m = len(tour.t)
+    if m <= 2:
+        return path_length(D, tour.t[1:]), tour.t[1:]
+    if cand is None:
+        cand = candidate_lists(D, N - 1 if N - 1 <= FULL_NEIGHBOURHOOD_N else k)
+    nbrs: List[List[int]] = cand.tolist()
+    d = D.item
+    t, pos = tour.t, tour.pos
+    deadline = None if time_limit_s is None else time.perf_counter() + time_limit_s
+    cost = path_length(D, tour.t[1:])
+    reported = cost
+
+    queue = deque(tour.t if active is None else [int(a) for a in active if 0 <= a < N])
+    queued = [False] * N
+    for a in queue:
+        queued[a] = True
+
+    def push(*nodes: Optional[int]) -> None:
+        for v in nodes:
+            if v is not None and not queued[v]:
+                queued[v] = True
+                queue.append(v)
+
+    def node_at(i: int) -> Optional[int]:
+        return t[i] if 0 <= i < m else None
+
+    def two_opt_delta(i: int, j: int) -> float:
+        """t[i+1..j] 뒤집기 비용 변화 (0 <= i, i+1 < j)"""
+        a, b, c = t[i], t[i + 1], t[j]
+        delta = d(a, c) - d(a, b)
+        if j + 1 < m:
+            e = t[j + 1]
+            delta += d(b, e) - d(c, e)
+        return delta
+
+    def try_two_opt(a: int) -> float:
+        """개선 시 비용 변화(음수), 없으면 0"""
+        i = pos[a]
+        a_next = t[i + 1] if i + 1 < m else None
+        a_prev = t[i - 1] if i > 0 else None
+        # 제거될 a의 간선 길이 — 새 간선 (a, c)가 이보다 짧아야 이득 가능
+        # (종점 a는 다음 간선이 없어도 뒤집기로 이득 가능 → 상한 없음)
+        g_next = d(a, a_next) if a_next is not None else np.inf
+        g_prev = d(a, a_prev) if a_prev is not None else -np.inf
+        for c in nbrs[a]:
+            dac = d(a, c)
+            if dac >= g_next and dac >= g_prev:
+                break
+            j = pos[c]
+            lo, hi = (i, j) if i < j else (j, i)
+            # (a, a_next),(c, c_next) 제거 → (a, c) 연결
+            if dac < g_next:
+                delta = two_opt_delta(lo, hi) if hi - lo > 1 else 0.0
+                if delta < -_EPS:
+                    ends = (t[lo], t[lo + 1], t[hi], node_at(hi + 1))
+                    tour.reverse(lo + 1, hi)
+                    push(*ends)
+                    return delta
+            # (a_prev, a),(c_prev, c) 제거 → (a, c) 연결
+            if dac < g_prev and lo >= 1:
+                delta = two_opt_delta(lo - 1, hi - 1) if hi - lo > 1 else 0.0
+                if delta < -_EPS:
+                    ends = (t[lo - 1], t[lo], t[hi - 1], t[hi])
+                    tour.reverse(lo, hi - 1)
+                    push(*ends)
+                    return delta
+        return 0.0
+
+    def try_or_opt(a: int) -> float:
+        """개선 시 비용 변화(음수), 없으면 0"""
+        i = pos[a]
+        if i == 0:
+            return 0.0
+        for L in range(1, OR_OPT_MAX_SEG + 1):
+            if i + L - 1 >= m:
+                break
+            s0, sL = t[i], t[i + L - 1]
+            p = t[i - 1]
+            nx = node_at(i + L)
+            removed = d(p, s0) + (d(sL, nx) - d(p, nx) if nx is not None else 0.0)
+            if removed <= _EPS:
+                continue
+            in_seg = set(t[i : i + L])
+
+            def after_removal(c: int) -> Tuple[Optional[int], Optional[int]]:
+                """구간 제거 후 c의 (이전, 다음) 노드"""
+                j = pos[c]
+                prev_c = p if c == nx else node_at(j - 1)
+                next_c = nx if c == p else node_at(j + 1)
+                return prev_c, next_c
+
+            for end, other in ((s0, sL), (sL, s0)):
+                for c in nbrs[end]:
+                    dec = d(end, c)
+                    if dec >= removed:
+                        break
+                    if c in in_seg:
+                        continue
+                    prev_c, next_c = after_removal(c)
+                    # 틈 (c, next_c)에 c-end ... other-next_c 로 삽입
+                    add = dec + (d(other, next_c) - d(c, next_c) if next_c is not None else 0.0)
+                    if add - removed < -_EPS:
+                        ends = (p, nx, s0, sL, c, next_c)
+                        tour.move_segment(i, L, c, reverse=(end != s0))
+                        push(*ends)
+                        return add - removed
+                    # 틈 (prev_c, c)에 prev_c-other ... end-c 로 삽입 (c=0 앞은 불가)
+                    if prev_c is not None:
+                        add = dec + d(prev_c, other) - d(prev_c, c)
+                        if add - removed < -_EPS:
+                            ends = (p, nx, s0, sL, c, prev_c)
+                            tour.move_segment(i, L, prev_c, reverse=(end == s0))
+                            push(*ends)
+                            return add - removed
+        return 0.0
+
+    steps = 0
+    while queue:
+        a = queue.popleft()
+        queued[a] = False
+        delta = try_two_opt(a) or try_or_opt(a)
+        if delta:
+            cost += delta
+            push(a)
+        steps += 1
+        if (steps & 63) == 0:
+            if on_progress is not None and cost < reported - _EPS:
+                reported = cost
+                if on_progress(cost, t[1:]):
+                    break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+    out = t[1:]
+    return path_length(D, out), out
@@ -0,0 +1,110 @@
+# app/services/matrix.py
+"""
+거리/이동시간 행렬 엔진 (NumPy 브로드캐스트)
+
+- 좌표 배열 전체를 한 번에 계산해 C-contiguous float64 (n, n) 배열로 반환
+- Haversine은 대칭이므로 상삼각 블록만 계산하고 하삼각은 전치 복사
+- 큰 n에서도 임시 배열 메모리가 폭증하지 않도록 행 블록 단위로 처리
+"""
+from __future__ import annotations
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_KM, travel_minutes
+
+# 한 번에 처리할 (행 × 열) 원소 수 상한 — 임시 배열 1개당 약 32MB
+_BLOCK_ELEMS = 4_000_000
+
+
+def _as_radians(lats: Sequence[float], lons: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    if lat.shape != lon.shape or lat.ndim != 1:
+        raise ValueError("lats/lons must be 1-D arrays of the same length")
+    return lat, lon
+
+
+def _haversine_block(
+    lat_r: np.ndarray, lon_r: np.ndarray, cos_r: np.ndarray,
+    lat_c: np.ndarray, lon_c: np.ndarray, cos_c: np.ndarray,
+) -> np.ndarray:
+    """행 좌표(r) × 열 좌표(c) 거리 블록(km)"""
+    dlat = lat_c[None, :] - lat_r[:, None]
+    dlon = lon_c[None, :] - lon_r[:, None]
+    a = np.sin(dlat * 0.5) ** 2
+    a += (cos_r[:, None] * cos_c[None, :]) * np.sin(dlon * 0.5) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2.0 * EARTH_RADIUS_KM
+    return a
+
+
+def haversine_matrix(lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+    """
+    전체 쌍 Haversine 거리 행렬(km).
+    D[i, j] == D[j, i], 대각은 0.
+    """
+    lat, lon = _as_radians(lats, lons)
+    n = lat.shape[0]
+    D = np.zeros((n, n), dtype=np.float64)
+    if n < 2:
+        return D
+    cos_lat = np.cos(lat)
+
+    rows = max(1, _BLOCK_ELEMS // n)
+    for r0 in range(0, n, rows):
+        r1 = min(n, r0 + rows)
+        # 상삼각(열 >= r0)만 계산 → 하삼각은 전치로 채움
+        blk = _haversine_block(
+            lat[r0:r1], lon[r0:r1], cos_lat[r0:r1],
+            lat[r0:], lon[r0:], cos_lat[r0:],
+        )
+        D[r0:r1, r0:] = blk
+        D[r0:, r0:r1] = blk.T
+    np.fill_diagonal(D, 0.0)
+    return D
+
+
+def haversine_rows(
+    lat: float, lon: float, lats: Sequence[float], lons: Sequence[float]
+) -> np.ndarray:
+    """한 점 → 여러 점 거리 벡터(km)"""
+    la, lo = _as_radians(lats, lons)
+    p_lat, p_lon = np.radians([lat]), np.radians([lon])
+    return _haversine_block(p_lat, p_lon, np.cos(p_lat), la, lo, np.cos(la))[0]
+
+
+def haversine_legs(lats: Sequence[float], lons: Sequence[float]) -> np.ndarray:
+    """연속한 점 사이 거리 벡터(km): i -> i+1, 길이 n-1"""
+    lat, lon = _as_radians(lats, lons)
+    if lat.shape[0] < 2:
+        return np.empty(0, dtype=np.float64)
+    dlat = lat[1:] - lat[:-1]
+    dlon = lon[1:] - lon[:-1]
+    a = np.sin(dlat * 0.5) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon * 0.5) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def route_matrix(
+    start: Optional[Tuple[float, float]],
+    lats: Sequence[float],
+    lons: Sequence[float],
+) -> np.ndarray:
+    """
+    경로용 거리 행렬.
+    - start가 있으면 0번 = 출발지, 1..n = 마을
+    - 없으면 0..n-1 = 마을
+    """
+    if start is None:
+        return haversine_matrix(lats, lons)
+    all_lat = np.concatenate(([start[0]], np.asarray(lats, dtype=np.float64)))
+    all_lon = np.concatenate(([start[1]], np.asarray(lons, dtype=np.float64)))
+    return haversine_matrix(all_lat, all_lon)
+
+
+def travel_minutes_matrix(D_km: np.ndarray, avg_kmh: float = 35.0) -> np.ndarray:
+    """거리 행렬(km) → 이동시간 행렬(분)"""
+    return np.ascontiguousarray(travel_minutes(np.asarray(D_km, dtype=np.float64), avg_kmh))
+
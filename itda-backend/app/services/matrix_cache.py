@@ -0,0 +1,210 @@
+# app/services/matrix_cache.py
+"""
+마을-마을 거리 블록 디스크 캐시 (LRU + 용량 상한)
+
+- 키: (metric, 마을 ID/좌표 집합)의 해시 — 요청 순서와 무관하게 ID 기준 정렬 후 해싱
+- 값: 정렬 순서 기준 (n, n) float64 블록을 <key>.npy로 저장 (재시작 후에도 유지)
+- 히트 시 출발지 행만 새로 계산해서 (n+1)×(n+1) 경로 행렬을 조립
+- 파일 mtime을 최근 사용 시각으로 사용 → 재시작 시에도 LRU 순서 복원
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from .matrix import haversine_matrix, haversine_rows
+
+_BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(os.getenv("ITDA_MATRIX_CACHE_DIR", str(_BASE_DIR / "cache" / "matrix")))
+CACHE_MAX_MB = float(os.getenv("ITDA_MATRIX_CACHE_MB", "512"))
+CACHE_MIN_N = int(os.getenv("ITDA_MATRIX_CACHE_MIN_N", "32"))  # 이보다 작으면 바로 계산이 더 빠름
+
+
+def canonical_order(ids: Sequence[int], lats: Sequence[float], lons: Sequence[float]):
+    """
+    ID 기준 정렬 순서 + 키용 좌표(1e-6도 ≈ 10cm 반올림: 부동소수 오차로 키가 갈라지지 않게)
+    캐시 블록은 이 순서로 저장 — 블록을 직접 만드는 쪽(roadnet)도 같은 순서를 써야 함
+    """
+    ids_a = np.asarray(ids, dtype=np.int64)
+    lat_k = np.round(np.asarray(lats, dtype=np.float64), 6)
+    lon_k = np.round(np.asarray(lons, dtype=np.float64), 6)
+    perm = np.lexsort((lon_k, lat_k, ids_a))
+    return perm, ids_a[perm], lat_k[perm], lon_k[perm]
+
+
+class MatrixCache:
+    def __init__(self, root: Path, max_bytes: int, min_n: int = CACHE_MIN_N):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.min_n = min_n
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> bytes (오래된 것부터)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_index()
+
+    # ---------- index ----------
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npy"
+
+    def _load_index(self) -> None:
+        if not self.root.exists():
+            return
+        files = sorted(self.root.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+        for p in files:
+            size = p.stat().st_size
+            self._index[p.stem] = size
+            self._bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def make_key(metric: str, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray) -> str:
+        h = hashlib.sha1(metric.encode())
+        h.update(ids.astype("<i8").tobytes())
+        h.update(lats.astype("<f8").tobytes())
+        h.update(lons.astype("<f8").tobytes())
+        return h.hexdigest()
+
+    # ---------- public ----------
+    def village_block(
+        self,
+        ids: Sequence[int],
+        lats: Sequence[float],
+        lons: Sequence[float],
+        metric: str = "haversine",
+        builder: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None,
+    ) -> np.ndarray:
+        """마을-마을 (n, n) 블록 (입력 순서 기준). 캐시에 없으면 builder로 계산 후 저장"""
+        builder = builder or haversine_matrix
+        n = len(ids)
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if n < self.min_n:
+            return builder(lats, lons)
+
+        perm, c_ids, k_lat, k_lon = canonical_order(ids, lats, lons)
+        key = self.make_key(metric, c_ids, k_lat, k_lon)
+        path = self._path(key)
+        block: Optional[np.ndarray] = None
+        with self._lock:
+            if key in self._index:
+                try:
+                    block = np.load(path, mmap_mode="r")
+                    self._index.move_to_end(key)
+                    self.hits += 1
+                    os.utime(path)
+                except (FileNotFoundError, ValueError):
+                    self._bytes -= self._index.pop(key)
+                    block = None
+        if block is None:
+            block = builder(lats[perm], lons[perm])
+            self._store(key, block)
+            with self._lock:
+                self.misses += 1
+
+        inv = np.empty_like(perm)
+        inv[perm] = np.arange(n)
+        return np.ascontiguousarray(block[np.ix_(inv, inv)])
+
+    def _store(self, key: str, block: np.ndarray) -> None:
+        if block.nbytes > self.max_bytes:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(block, dtype=np.float64))
+        os.replace(tmp, path)  # 여러 워커가 동시에 써도 원자적으로 교체
+        size = path.stat().st_size
+        with self._lock:
+            self._bytes -= self._index.pop(key, 0)
+            self._index[key] = size
+            self._bytes += size
+            self._evict()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else None,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "min_n": self.min_n,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._index):
+                try:
+                    self._path(key).unlink()
+                except FileNotFoundError:
+                    pass
+            self._index.clear()
+            self._bytes = 0
+
+
+_CACHE: Optional[MatrixCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> MatrixCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = MatrixCache(CACHE_DIR, int(CACHE_MAX_MB * 1024 * 1024))
+    return _CACHE
+
+
+def cached_route_matrix(
+    start: Tuple[float, float],
+    ids: Sequence[int],
+    lats: Sequence[float],
+    lons: Sequence[float],
+) -> np.ndarray:
+    """
+    (n+1)×(n+1) 경로 행렬 — 0 = 출발지, 1..n = 마을.
+    마을-마을 블록은 캐시에서, 출발지 행/열만 새로 계산.
+    """
+    if len(ids) == 0:
+        return np.zeros((1, 1), dtype=np.float64)
+    return attach_start(start, get_cache().village_block(ids, lats, lons), lats, lons)
+
+
+def attach_start(
+    start: Tuple[float, float],
+    block: np.ndarray,
+    lats: Sequence[float],
+    lons: Sequence[float],
+) -> np.ndarray:
+    """마을-마을 (n, n) 블록에 출발지 행/열을 붙인 (n+1)×(n+1) 경로 행렬 — 같은 마을 집합 재사용용"""
+    n = block.shape[0]
+    D = np.zeros((n + 1, n + 1), dtype=np.float64)
+    if n == 0:
+        return D
+    D[1:, 1:] = block
+    row = haversine_rows(start[0], start[1], lats, lons)
+    D[0, 1:] = row
+    D[1:, 0] = row
+    return D
@@ -0,0 +1,162 @@
+# app/services/model_store.py
+"""
+수요예측 앙상블 디스크 저장소 (여러 uvicorn 워커가 같은 디렉터리 공유)
+
+- 경로: <ITDA_MODEL_DIR>/v<FORMAT_VERSION>/<village>_<product>-<data_hash>.joblib
+  data_hash = 학습 데이터(X, y) + 특징/하이퍼파라미터 버전 해시 → 데이터가 바뀌면 자동으로 새 파일
+- 값: {"models": {"rf", "hgb", "xgb"(원시 바이트)}, "sigma", "data_hash", "trained_at", "libs"}
+- 로드는 필요할 때만, joblib mmap_mode="r" (트리 배열은 페이지 캐시를 워커끼리 공유)
+- 저장은 tmp 파일 + os.replace로 원자적 교체
+
+    python -m app.services.model_store pretrain   # 모든 (마을, 상품) 그룹 미리 학습
+    python -m app.services.model_store list
+    python -m app.services.model_store prune      # 현재 데이터와 맞지 않는 옛 파일 삭제
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import datetime as dt
+import hashlib
+import os
+import sys
+import threading
+
+_BASE_DIR = Path(__file__).resolve().parent.parent
+MODEL_DIR = Path(os.getenv("ITDA_MODEL_DIR", str(_BASE_DIR / "cache" / "models")))
+FORMAT_VERSION = 1  # 저장 형식이 바뀌면 올림 → 옛 파일은 자연히 무시
+
+
+def data_hash(*arrays, salt: str = "") -> str:
+    """학습 입력 배열들 + salt(특징/하이퍼파라미터 버전)의 해시"""
+    import numpy as np
+
+    h = hashlib.sha1(salt.encode())
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str(a.shape).encode())
+        h.update(a.astype("<f8", copy=False).tobytes())
+    return h.hexdigest()[:16]
+
+
+class ModelStore:
+    def __init__(self, root: Path = MODEL_DIR):
+        self.root = Path(root) / f"v{FORMAT_VERSION}"
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.saves = 0
+
+    def path(self, key: Tuple[int, int], digest: str) -> Path:
+        return self.root / f"{key[0]}_{key[1]}-{digest}.joblib"
+
+    def load(self, key: Tuple[int, int], digest: str) -> Optional[Tuple[Dict[str, object], float]]:
+        """(models, sigma) — 없거나 읽을 수 없으면 None"""
+        import joblib
+
+        path = self.path(key, digest)
+        if not path.exists():
+            return None
+        try:
+            blob = joblib.load(path, mmap_mode="r")
+        except Exception:
+            return None  # 깨진/호환 안 되는 파일 → 다시 학습
+        models = dict(blob["models"])
+        if "xgb" in models:
+            try:
+                import xgboost as xgb
+
+                booster = xgb.Booster()
+                booster.load_model(bytearray(models["xgb"]))
+                models["xgb"] = booster
+            except Exception:
+                models.pop("xgb")
+        with self._lock:
+            self.loads += 1
+        return models, float(blob["sigma"])
+
+    def save(self, key: Tuple[int, int], digest: str, models: Dict[str, object], sigma: float) -> Path:
+        import joblib
+        import sklearn
+
+        stored = dict(models)
+        libs = {"sklearn": sklearn.__version__}
+        if "xgb" in stored:
+            import xgboost as xgb
+
+            stored["xgb"] = bytes(stored["xgb"].save_raw("ubj"))
+            libs["xgboost"] = xgb.__version__
+        blob = {
+            "models": stored,
+            "sigma": float(sigma),
+            "data_hash": digest,
+            "trained_at": dt.datetime.now().isoformat(timespec="seconds"),
+            "libs": libs,
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(key, digest)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        joblib.dump(blob, tmp)  # 압축 없음 → mmap 로드 가능
+        os.replace(tmp, path)
+        with self._lock:
+            self.saves += 1
+        return path
+
+    def entries(self) -> List[Dict]:
+        out = []
+        if not self.root.exists():
+            return out
+        for p in sorted(self.root.glob("*.joblib")):
+            group, digest = p.stem.split("-", 1)
+            vid, pid = group.split("_")
+            out.append({"village_id": int(vid), "product_id": int(pid), "data_hash": digest, "bytes": p.stat().st_size})
+        return out
+
+    def prune(self, keep: Sequence[Tuple[Tuple[int, int], str]]) -> int:
+        """keep에 없는 파일 삭제, 삭제 개수 반환"""
+        keep_paths = {self.path(k, d) for k, d in keep}
+        n = 0
+        for p in self.root.glob("*.joblib") if self.root.exists() else []:
+            if p not in keep_paths:
+                p.unlink(missing_ok=True)
+                n += 1
+        return n
+
+
+_STORE: Optional[ModelStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> ModelStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = ModelStore(MODEL_DIR)
+    return _STORE
+
+
+def _main(argv: Sequence[str]) -> int:
+    cmd = argv[0] if argv else ""
+    store = get_store()
+    if cmd == "list":
+        for e in store.entries():
+            print(f"{e['village_id']:>6} {e['product_id']:>6} {e['data_hash']} {e['bytes'] / 1e6:8.2f} MB")
+        return 0
+    if cmd in ("pretrain", "prune"):
+        from . import forecast
+
+        ml = forecast.get_ml()
+        if ml is None:
+            print("ML forecaster unavailable (missing libraries or sales data)")
+            return 1
+        if cmd == "prune":
+            print(f"removed {store.prune(ml.current_artifacts())} stale artifacts")
+            return 0
+        ok, failed = ml.pretrain_all()
+        print(f"trained/loaded {ok} groups, skipped {failed} (not enough data) -> {store.root}")
+        return 0
+    print("usage: python -m app.services.model_store {pretrain|list|prune}")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
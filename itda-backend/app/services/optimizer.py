@@ -1,10 +1,13 @@
 # app/services/optimizer.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
-from datetime import datetime, timedelta
+from typing import List, Dict
+from datetime import datetime
 
-from .geo import haversine_km, travel_minutes
+from .local_search import path_legs
+from .matrix_cache import cached_route_matrix
+from .roadnet import road_route_matrices, symmetric
+from .solver import itinerary, priority_weights, select_stops, solve
 
 @dataclass
 class Village:
@@ -19,82 +22,37 @@ class Vehicle:
     start_lon: float
     max_stops: int | None = None
 
-def _weighted_cost(a: Tuple[float,float], b: Village) -> float:
-    """거리 / (0.5 + priority) : 우선순위 높을수록 비용 낮아져 먼저 방문"""
-    d = haversine_km(a[0], a[1], b.lat, b.lon)
-    w = 0.5 + max(0.0, min(1.0, b.priority or 0.0))
-    return d / w
-
-def _nearest_route(vs: List[Village], start: Tuple[float,float]) -> List[Village]:
-    remain = vs[:]
-    path: List[Village] = []
-    cur = start
-    while remain:
-        nxt = min(remain, key=lambda v: _weighted_cost(cur, v))
-        path.append(nxt)
-        cur = (nxt.lat, nxt.lon)
-        remain.remove(nxt)
-    return path
-
-def _two_opt(path: List[Village]) -> List[Village]:
-    """간단 2-opt 개선"""
-    import math
-    def seglen(a: Village, b: Village) -> float:
-        return haversine_km(a.lat, a.lon, b.lat, b.lon)
-
-    best = path[:]
-    n = len(best)
-    if n < 4:
-        return best
-
-    improved = True
-    while improved:
-        improved = False
-        for i in range(0, n-3):
-            for j in range(i+2, n-1):
-                a, b = best[i], best[i+1]
-                c, d = best[j], best[j+1]
-                cur = seglen(a,b) + seglen(c,d)
-                new = seglen(a,c) + seglen(b,d)
-                if new + 1e-6 < cur:
-                    best[i+1:j+1] = reversed(best[i+1:j+1])
-                    improved = True
-    return best
-
-def optimize(villages: List[Village], vehicle: Vehicle) -> Dict:
-    # 1) subset by max_stops
-    vs = villages[:]
-    if vehicle.max_stops and vehicle.max_stops > 0:
-        # 우선순위 높은 순으로 자르기
-        vs = sorted(vs, key=lambda v: (-(v.priority or 0), v.id))[: vehicle.max_stops]
+def optimize(villages: List[Village], vehicle: Vehicle, metric: str = "haversine") -> Dict:
+    """
+    우선순위 가중 경로 (services.solver 엔진 사용).
+    metric="road"면 도로망 이동시간/거리 행렬 사용 (도로망 없으면 haversine)
+    """
+    # 1) subset by max_stops (우선순위 높은 순)
+    vs = select_stops(villages, vehicle.max_stops)
 
     start = (vehicle.start_lat, vehicle.start_lon)
-
-    # 2) nearest + 2opt
-    nn = _nearest_route(vs, start)
-    route = _two_opt(nn)
-
-    # 3) metrics + ETA
-    total_km = 0.0
-    now = datetime.utcnow()
-    ordered = []
-    prev = start
-    for v in route:
-        leg_km = haversine_km(prev[0], prev[1], v.lat, v.lon)
-        total_km += leg_km
-        eta = now + timedelta(minutes=travel_minutes(leg_km))
-        ordered.append({
-            "village_id": v.id,
-            "lat": v.lat,
-            "lon": v.lon,
-            "distance_km": round(leg_km, 1),
-            "eta": eta.isoformat(),
-        })
-        now = eta
-        prev = (v.lat, v.lon)
+    ids, lats, lons = [v.id for v in vs], [v.lat for v in vs], [v.lon for v in vs]
+    roads = road_route_matrices(start, ids, lats, lons) if metric == "road" else None
+    if roads is not None:
+        T_min, D = roads
+        cost = symmetric(T_min)
+    else:
+        D = cached_route_matrix(start, ids, lats, lons)
+        T_min = None
+        cost = D
+
+    # 2) solve (규모별 전략, 우선순위 가중 구성)
+    res = solve(start, lats, lons, cost, weights=priority_weights([v.priority for v in vs]))
+    route = res["order"]
+
+    # 3) metrics + ETA (distance_km는 구간 거리)
+    legs_km = path_legs(D, route)
+    legs_min = path_legs(T_min, route) if T_min is not None else None
+    ordered, total_min = itinerary(vs, route, legs_km, legs_min, now=datetime.utcnow(), cumulative=False)
 
     return {
         "ordered_stops": ordered,
-        "total_distance_km": round(total_km, 1),
-        "est_duration_min": int(travel_minutes(total_km)),
+        "total_distance_km": round(float(legs_km.sum()), 1),
+        "est_duration_min": int(total_min),
+        "metric": "road" if roads is not None else "haversine",
     }
@@ -0,0 +1,166 @@
+# app/services/repair.py
+"""
+기존 경로 국소 수정 (운행 중 마을 추가/취소)
+- 취소: 해당 마을을 빼고 앞뒤를 바로 연결 (removal splicing)
+- 추가: 열린 경로의 가장 싼 위치에 삽입 (cheapest insertion, 비용 낮은 마을부터)
+- 개선: 바뀐 지점 앞뒤 max_span 정류장 창(window)만 2-opt/Or-opt — 창 밖 순서는 그대로
+전체 행렬 없이 O(n) 거리 계산 + 창 크기 행렬만 쓰므로 전체 재계산보다 훨씬 가벼움.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import os
+import time
+
+import numpy as np
+
+from .local_search import improve
+from .matrix import haversine_legs, haversine_rows, route_matrix
+
+REPAIR_MAX_SPAN = int(os.getenv("ITDA_REPAIR_MAX_SPAN", "6"))  # 수정 지점 앞뒤 개선 창 폭(정류장 수)
+REPAIR_TIME_S = float(os.getenv("ITDA_REPAIR_TIME_S", "0.05"))
+_PIN_KM = 1e5  # 창 끝 고정 노드에 붙이는 페널티 — 항상 마지막에 남도록
+
+
+def _path_coords(start: Tuple[float, float], stops: Sequence, order: List[int]):
+    lats = np.array([start[0]] + [stops[i].lat for i in order], dtype=np.float64)
+    lons = np.array([start[1]] + [stops[i].lon for i in order], dtype=np.float64)
+    return lats, lons
+
+
+def _cheapest_insertion(p_lat: np.ndarray, p_lon: np.ndarray, lat: float, lon: float) -> Tuple[int, float]:
+    """
+    경로 좌표(0 = 출발지)에 점을 넣을 위치와 추가 비용.
+    위치 i는 order[i] 앞, len(order)는 맨 끝(종점 자유)
+    """
+    r = haversine_rows(lat, lon, p_lat, p_lon)
+    mid = r[:-1] + r[1:] - haversine_legs(p_lat, p_lon)
+    tail = r[-1]
+    if len(mid) and mid.min() < tail:
+        i = int(mid.argmin())
+        return i, float(mid[i])
+    return len(r) - 1, float(tail)
+
+
+def _improve_window(
+    start: Tuple[float, float],
+    stops: Sequence,
+    order: List[int],
+    lo: int,
+    hi: int,
+    active: Set[int],
+    time_limit_s: float,
+) -> List[int]:
+    """order[lo..hi]만 재배치 — 앞 노드(또는 출발지)에서 진입, 뒤 노드가 있으면 그 노드로 끝나도록 고정"""
+    nodes = order[lo : hi + 1]
+    anchor = start if lo == 0 else (stops[order[lo - 1]].lat, stops[order[lo - 1]].lon)
+    tail = order[hi + 1] if hi + 1 < len(order) else None
+    seq = nodes + ([tail] if tail is not None else [])
+    D = route_matrix(anchor, [stops[i].lat for i in seq], [stops[i].lon for i in seq])
+    m = len(nodes)
+    if tail is not None:
+        # 고정 끝 노드: 붙는 간선마다 페널티 → 간선 하나뿐인 마지막 자리가 항상 최선
+        D[m + 1, : m + 1] += _PIN_KM
+        D[: m + 1, m + 1] += _PIN_KM
+    local = [i + 1 for i, x in enumerate(nodes) if x in active]
+    _c, sub = improve(D, list(range(1, len(seq) + 1)), time_limit_s=time_limit_s, active=local or None)
+    if tail is not None:
+        if sub[-1] != m + 1:
+            return nodes
+        sub = sub[:-1]
+    return [nodes[i - 1] for i in sub]
+
+
+def repair_route(
+    start: Tuple[float, float],
+    route: Sequence,
+    insert: Sequence = (),
+    remove: Iterable[int] = (),
+    max_span: Optional[int] = None,
+    time_limit_s: Optional[float] = None,
+) -> Dict:
+    """
+    route: 현재 남은 방문 순서 (id/lat/lon 속성), start: 차량 현재 위치
+    insert: 추가할 마을들, remove: 취소할 village_id
+    Returns {
+      "stops": 새 방문 순서 (입력 객체), "legs_km", "total_km",
+      "inserted", "removed", "ignored", "changed_edges", "elapsed_ms"
+    }
+    """
+    t0 = time.perf_counter()
+    span = REPAIR_MAX_SPAN if max_span is None else max(1, int(max_span))
+    budget = REPAIR_TIME_S if time_limit_s is None else time_limit_s
+    remove_ids = {int(r) for r in remove}
+    kept = [s for s in route if s.id not in remove_ids]
+    removed = [s.id for s in route if s.id in remove_ids]
+    present = {s.id for s in kept}
+    ignored: List[int] = sorted(remove_ids - set(removed))
+    adds = []
+    for s in insert:
+        if s.id in present:
+            ignored.append(s.id)  # 이미 경로에 있음
+            continue
+        present.add(s.id)
+        adds.append(s)
+    stops = kept + adds  # order는 이 리스트의 인덱스
+
+    # 1) 취소 — 빠진 자리 바로 뒤 정류장을 수정 지점으로 (-1 = 출발지 직후)
+    order = list(range(len(kept)))
+    touched: Set[int] = set()
+    k = 0
+    gap = False
+    for s in route:
+        if s.id in remove_ids:
+            gap = True
+            continue
+        if gap:
+            touched.add(k)
+            if k > 0:
+                touched.add(k - 1)
+            gap = False
+        k += 1
+    if gap and kept:
+        touched.add(len(kept) - 1)
+
+    # 2) 추가 — 남은 후보 중 추가 비용이 가장 작은 것부터
+    pending = list(range(len(kept), len(stops)))
+    while pending:
+        p_lat, p_lon = _path_coords(start, stops, order)
+        (i, _cost), k = min(
+            ((_cheapest_insertion(p_lat, p_lon, stops[k].lat, stops[k].lon), k) for k in pending),
+            key=lambda x: x[0][1],
+        )
+        order.insert(i, k)
+        pending.remove(k)
+        touched.add(k)
+
+    # 3) 수정 지점 앞뒤 창만 국소 개선 (겹치는 창은 합침, 길이 불변이라 뒤에서부터 교체)
+    if touched and len(order) > 2:
+        where = {x: p for p, x in enumerate(order)}
+        windows: List[List[int]] = []
+        for p in sorted(where[x] for x in touched):
+            lo, hi = max(0, p - span), min(len(order) - 1, p + span)
+            if windows and lo <= windows[-1][1] + 1:
+                windows[-1][1] = max(windows[-1][1], hi)
+            else:
+                windows.append([lo, hi])
+        for lo, hi in reversed(windows):
+            if hi - lo >= 1:
+                order[lo : hi + 1] = _improve_window(start, stops, order, lo, hi, touched, budget / len(windows))
+
+    p_lat, p_lon = _path_coords(start, stops, order)
+    legs = haversine_legs(p_lat, p_lon)
+    # 원래 경로 대비 바뀐 간선 수 (운전자 입장의 변경량)
+    old_ids = [s.id for s in route]
+    old_edges = set(zip([None] + old_ids, old_ids))
+    new_ids = [stops[i].id for i in order]
+    changed = sum(1 for e in zip([None] + new_ids, new_ids) if e not in old_edges)
+    return {
+        "stops": [stops[i] for i in order],
+        "legs_km": legs,
+        "total_km": float(legs.sum()),
+        "inserted": [s.id for s in adds],
+        "removed": removed,
+        "ignored": ignored,
+        "changed_edges": changed,
+        "elapsed_ms": (time.perf_counter() - t0) * 1e3,
+    }
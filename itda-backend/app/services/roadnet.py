@@ -0,0 +1,309 @@
+# app/services/roadnet.py
+"""
+오프라인 도로망 이동시간/거리 행렬
+- 입력(ITDA_ROADNET_DIR): nodes.csv (id,lat,lon), edges.csv (u,v,length_m,speed_kmh[,oneway])
+- 최초 로드 시 CSR 배열(indptr/indices/분·km 가중치)로 변환해 roadnet.npz에 저장
+  → 이후에는 CSV 파싱 없이 npz만 읽음 (CSV가 더 새로우면 다시 생성)
+- 다대다 행렬: 스냅된 지점 노드에서만 출발하는 scipy csgraph Dijkstra
+  - 탐색 반경(limit): 지점들의 최대 직선거리 × ROAD_LIMIT_FACTOR — 작업량이 도로망 전체가 아니라 지점 주변에 비례
+    (반경 안에서 닿지 않는 쌍은 연결되지 않은 쌍처럼 직선거리 × DETOUR_FACTOR로 대체)
+  - (출발 노드 수, 노드 수) 임시 배열은 ROAD_TMP_BYTES 이하가 되도록 출발 노드를 나눠서
+  - 마을-마을 블록이 캐시에 없으면 출발지까지 한 번에 풀어 출발지 행/열도 재사용,
+    캐시에 있으면 출발지 한 점만 (일방통행이 없는 도로망이면 정방향 한 번으로 행/열 모두)
+- 마을/차량 좌표는 가장 가까운 도로 노드에 스냅, 스냅 거리는 저속 접근 시간으로 가산
+- 마을-마을 표는 matrix_cache에 metric="road-min:<fingerprint>" / "road-km:<fingerprint>"로 캐시
+도로망 파일이 없으면 get_network()가 None → 호출부는 Haversine으로 폴백.
+
+    python -m app.services.roadnet build   # CSV → roadnet.npz 미리 생성
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+import hashlib
+import os
+import sys
+import threading
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+from .geo import SpatialIndex, travel_minutes
+from .matrix import haversine_rows
+from .matrix_cache import canonical_order, get_cache
+
+_BASE_DIR = Path(__file__).resolve().parent.parent
+ROADNET_DIR = Path(os.getenv("ITDA_ROADNET_DIR", str(_BASE_DIR / "data" / "roadnet")))
+ACCESS_KMH = float(os.getenv("ITDA_ROAD_ACCESS_KMH", "15"))  # 스냅 지점까지 비포장/골목 속도
+DETOUR_FACTOR = 1.3  # 도로로 연결되지 않은 쌍: 직선거리 × 우회계수로 대체
+ROAD_LIMIT_FACTOR = float(os.getenv("ITDA_ROAD_LIMIT_FACTOR", "4"))  # 탐색 반경 = 최대 직선거리 × 이 값
+ROAD_TMP_BYTES = int(os.getenv("ITDA_ROAD_TMP_MB", "64")) << 20  # Dijkstra 결과 임시 배열 상한
+
+
+class RoadNetwork:
+    """
+    CSR 도로 그래프 두 벌 (가중치: 분, km) + 노드 좌표 KD-tree.
+    그래프는 이동시간 기준 최단경로, km는 최단거리 경로 기준 (표시용)
+    """
+
+    def __init__(self, lat, lon, indptr, indices, minutes, km, fingerprint: str):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        n = len(self.lat)
+        from scipy.sparse import csr_matrix  # 도로망을 쓸 때만 로드 (서버 기동 시간)
+        self.g_min = csr_matrix((minutes, indices, indptr), shape=(n, n))
+        self.g_km = csr_matrix((km, indices, indptr), shape=(n, n))
+        self.fingerprint = fingerprint
+        self.index = SpatialIndex(self.lat, self.lon)
+        self._rev: dict = {}  # 역방향 그래프 (도착 쪽이 적을 때 역으로 Dijkstra)
+        # 일방통행이 없으면 역방향 탐색 불필요 (출발지 열 = 행)
+        self.symmetric = (self.g_min != self.g_min.T).nnz == 0 and (self.g_km != self.g_km.T).nnz == 0
+        # 분 탐색 반경용 — 느린 쪽 99% 간선의 km당 분 (km 반경 안 경로의 이동시간 상한 추정)
+        pace = np.asarray(minutes, dtype=np.float64) / np.maximum(np.asarray(km, dtype=np.float64), 1e-9)
+        self.pace_p99 = float(np.percentile(pace, 99)) if len(pace) else 60.0 / ACCESS_KMH
+
+    # ---------- 로드 ----------
+    @classmethod
+    def from_csv(cls, nodes_csv: Path, edges_csv: Path) -> "RoadNetwork":
+        nodes = np.loadtxt(nodes_csv, delimiter=",", skiprows=1, ndmin=2)
+        edges = np.loadtxt(edges_csv, delimiter=",", skiprows=1, ndmin=2)
+        ids = nodes[:, 0].astype(np.int64)
+        order = np.argsort(ids)
+        ids = ids[order]
+        lat, lon = nodes[order, 1], nodes[order, 2]
+        u = np.searchsorted(ids, edges[:, 0].astype(np.int64))
+        v = np.searchsorted(ids, edges[:, 1].astype(np.int64))
+        if (u >= len(ids)).any() or (v >= len(ids)).any() or (ids[u] != edges[:, 0]).any() or (ids[v] != edges[:, 1]).any():
+            raise ValueError("edges.csv refers to unknown node ids")
+        km = edges[:, 2] / 1000.0
+        speed = np.maximum(edges[:, 3], 1.0)
+        minutes = km / speed * 60.0
+        oneway = edges[:, 4].astype(bool) if edges.shape[1] > 4 else np.zeros(len(edges), dtype=bool)
+        # 양방향 간선은 역방향도 추가
+        back = ~oneway
+        src = np.concatenate((u, v[back]))
+        dst = np.concatenate((v, u[back]))
+        km = np.concatenate((km, km[back]))
+        minutes = np.concatenate((minutes, minutes[back]))
+        # 0 가중치는 csgraph에서 '간선 없음'이 되므로 하한
+        km = np.maximum(km, 1e-6)
+        minutes = np.maximum(minutes, 1e-6)
+        # 같은 (u, v) 중복 간선은 더 빠른 것만
+        key = src * len(ids) + dst
+        pick = np.lexsort((minutes, key))
+        first = np.ones(len(pick), dtype=bool)
+        first[1:] = key[pick][1:] != key[pick][:-1]
+        pick = pick[first]
+        from scipy.sparse import csr_matrix
+        g = csr_matrix((minutes[pick], (src[pick], dst[pick])), shape=(len(ids), len(ids)))
+        g_km = csr_matrix((km[pick], (src[pick], dst[pick])), shape=(len(ids), len(ids)))
+        g.sort_indices()
+        g_km.sort_indices()
+        h = hashlib.sha1()
+        for a in (lat, lon, g.indptr, g.indices, g.data, g_km.data):
+            h.update(np.ascontiguousarray(a).tobytes())
+        return cls(lat, lon, g.indptr, g.indices, g.data, g_km.data, h.hexdigest()[:16])
+
+    @classmethod
+    def load(cls, root: Path = ROADNET_DIR) -> "RoadNetwork":
+        """roadnet.npz가 CSV보다 새로우면 그대로, 아니면 CSV에서 만들고 저장"""
+        root = Path(root)
+        nodes_csv, edges_csv, npz = root / "nodes.csv", root / "edges.csv", root / "roadnet.npz"
+        if npz.exists() and (
+            not edges_csv.exists() or npz.stat().st_mtime >= max(edges_csv.stat().st_mtime, nodes_csv.stat().st_mtime)
+        ):
+            z = np.load(npz)
+            return cls(z["lat"], z["lon"], z["indptr"], z["indices"], z["minutes"], z["km"], str(z["fingerprint"]))
+        net = cls.from_csv(nodes_csv, edges_csv)
+        net.save(npz)
+        return net
+
+    def save(self, path: Path) -> None:
+        tmp = Path(path).with_suffix(f".{os.getpid()}.tmp.npz")
+        np.savez(
+            tmp,
+            lat=self.lat,
+            lon=self.lon,
+            indptr=self.g_min.indptr,
+            indices=self.g_min.indices,
+            minutes=self.g_min.data,
+            km=self.g_km.data,
+            fingerprint=np.array(self.fingerprint),
+        )
+        os.replace(tmp, path)
+
+    # ---------- 질의 ----------
+    def snap(self, lats: Sequence[float], lons: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """좌표별 (가장 가까운 노드, 스냅 거리 km)"""
+        nodes = np.empty(len(lats), dtype=np.intp)
+        dist = np.empty(len(lats), dtype=np.float64)
+        for i, (la, lo) in enumerate(zip(lats, lons)):
+            d, idx = self.index.knearest(la, lo, 1)
+            nodes[i], dist[i] = idx[0], d[0]
+        return nodes, dist
+
+    def _shortest(self, graph: "csr_matrix", src: np.ndarray, dst: np.ndarray, limit: float) -> np.ndarray:
+        """
+        노드 src × 노드 dst 최단경로 표 (중복 노드는 한 번만, limit 밖은 inf).
+        도착 쪽이 더 적으면 역방향 그래프에서 도착 노드들을 출발로 풀고 전치
+        """
+        if len(np.unique(dst)) < len(np.unique(src)):
+            if self.symmetric:
+                return self._dijkstra(graph, dst, src, limit).T
+            key = id(graph)
+            if key not in self._rev:
+                self._rev[key] = graph.T.tocsr()
+            return self._dijkstra(self._rev[key], dst, src, limit).T
+        return self._dijkstra(graph, src, dst, limit)
+
+    @staticmethod
+    def _dijkstra(graph: "csr_matrix", src: np.ndarray, dst: np.ndarray, limit: float) -> np.ndarray:
+        from scipy.sparse.csgraph import dijkstra
+        uniq, inv = np.unique(src, return_inverse=True)
+        chunk = max(1, ROAD_TMP_BYTES // (8 * max(graph.shape[0], 1)))
+        out = np.empty((len(uniq), len(dst)), dtype=np.float64)
+        for s in range(0, len(uniq), chunk):
+            part = dijkstra(graph, directed=True, indices=uniq[s : s + chunk], limit=limit)
+            out[s : s + chunk] = part[:, dst]
+        return out[inv]
+
+    def _limits(self, lats: np.ndarray, lons: np.ndarray, acc_km: float) -> Tuple[float, float]:
+        """탐색 반경 (km, 분) — 지점들을 감싸는 상자의 대각선 × ROAD_LIMIT_FACTOR (스냅 거리 제외)"""
+        span = float(haversine_rows(lats.min(), lons.min(), [lats.max()], [lons.max()])[0])
+        km = ROAD_LIMIT_FACTOR * max(span, 1.0) + 2.0 * acc_km
+        return km, km * self.pace_p99
+
+    def tables(
+        self,
+        src_lats: Sequence[float],
+        src_lons: Sequence[float],
+        dst_lats: Sequence[float],
+        dst_lons: Sequence[float],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (분, km) 표 — 접근 구간(스냅 거리) 포함.
+        도로로 닿지 않는 쌍은 직선거리 × DETOUR_FACTOR, 평균 속도로 대체
+        """
+        s_node, s_acc = self.snap(src_lats, src_lons)
+        d_node, d_acc = self.snap(dst_lats, dst_lons)
+        acc_km = s_acc[:, None] + d_acc[None, :]
+        lim_km, lim_min = self._limits(
+            np.r_[np.asarray(src_lats, dtype=np.float64), np.asarray(dst_lats, dtype=np.float64)],
+            np.r_[np.asarray(src_lons, dtype=np.float64), np.asarray(dst_lons, dtype=np.float64)],
+            float(acc_km.max()) if acc_km.size else 0.0,
+        )
+        T = self._shortest(self.g_min, s_node, d_node, lim_min) + acc_km / ACCESS_KMH * 60.0
+        K = self._shortest(self.g_km, s_node, d_node, lim_km) + acc_km
+        bad = ~np.isfinite(T) | ~np.isfinite(K)
+        if bad.any():
+            crow = np.array([haversine_rows(a, b, dst_lats, dst_lons) for a, b in zip(src_lats, src_lons)])
+            K[bad] = crow[bad] * DETOUR_FACTOR
+            T[bad] = travel_minutes(K[bad])
+        return T, K
+
+    def village_tables(self, lats: Sequence[float], lons: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """마을-마을 (분, km) — 같은 마을끼리는 0"""
+        T, K = self.tables(lats, lons, lats, lons)
+        np.fill_diagonal(T, 0.0)
+        np.fill_diagonal(K, 0.0)
+        return T, K
+
+
+_NET: Optional[RoadNetwork] = None
+_NET_LOADED = False
+_NET_LOCK = threading.Lock()
+
+
+def get_network() -> Optional[RoadNetwork]:
+    """도로망 (한 번만 로드). 파일이 없거나 깨졌으면 None"""
+    global _NET, _NET_LOADED
+    if not _NET_LOADED:
+        with _NET_LOCK:
+            if not _NET_LOADED:
+                try:
+                    _NET = RoadNetwork.load(ROADNET_DIR)
+                except (OSError, ValueError, KeyError):
+                    _NET = None
+                _NET_LOADED = True
+    return _NET
+
+
+def road_route_matrices(
+    start: Tuple[float, float],
+    ids: Sequence[int],
+    lats: Sequence[float],
+    lons: Sequence[float],
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (n+1)×(n+1) (이동시간 분, 도로거리 km) 경로 행렬 — 0 = 출발지, 1..n = 마을.
+    일방통행이 있으면 비대칭. 도로망이 없으면 None.
+    마을-마을 블록은 matrix_cache에서 (도로망이 바뀌면 fingerprint로 키가 달라짐)
+    """
+    net = get_network()
+    if net is None:
+        return None
+    n = len(ids)
+    T = np.zeros((n + 1, n + 1), dtype=np.float64)
+    K = np.zeros((n + 1, n + 1), dtype=np.float64)
+    if n == 0:
+        return T, K
+    cache = get_cache()
+    fp = net.fingerprint
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    built: dict = {}
+
+    def builder(which: int):
+        # 캐시 미스 — 출발지까지 한 번에 풀어 출발지 행/열도 재사용 (분/km 둘 다 미스여도 Dijkstra는 한 번)
+        def build(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            if "tk" not in built:
+                built["order"] = (a, b)
+                built["tk"] = net.village_tables(np.r_[start[0], a], np.r_[start[1], b])
+            return built["tk"][which][1:, 1:]
+        return build
+
+    T[1:, 1:] = cache.village_block(ids, lats, lons, metric=f"road-min:{fp}", builder=builder(0))
+    K[1:, 1:] = cache.village_block(ids, lats, lons, metric=f"road-km:{fp}", builder=builder(1))
+    if "tk" in built:
+        # builder는 캐시 정렬 순서(또는 입력 순서)로 받음 → 입력 순서 위치로 되돌림
+        a, b = built["order"]
+        if np.array_equal(a, lats) and np.array_equal(b, lons):
+            pos = np.arange(1, n + 1)
+        else:
+            perm = canonical_order(ids, lats, lons)[0]
+            pos = np.empty(n, dtype=np.intp)
+            pos[perm] = np.arange(1, n + 1)
+        Tf, Kf = built["tk"]
+        T[0, 1:], K[0, 1:] = Tf[0, pos], Kf[0, pos]
+        T[1:, 0], K[1:, 0] = Tf[pos, 0], Kf[pos, 0]
+        return T, K
+    # 블록이 캐시에 있으면 출발지 한 점만 (일방통행이 없으면 정방향 결과를 열에도)
+    t_out, k_out = net.tables([start[0]], [start[1]], lats, lons)
+    T[0, 1:], K[0, 1:] = t_out[0], k_out[0]
+    if net.symmetric:
+        T[1:, 0], K[1:, 0] = t_out[0], k_out[0]
+    else:
+        t_in, k_in = net.tables(lats, lons, [start[0]], [start[1]])
+        T[1:, 0], K[1:, 0] = t_in[:, 0], k_in[:, 0]
+    return T, K
+
+
+def symmetric(M: np.ndarray) -> np.ndarray:
+    """지역 탐색(대칭 가정)용 평균 행렬"""
+    return 0.5 * (M + M.T)
+
+
+def _main(argv: Sequence[str]) -> int:
+    if len(argv) < 1 or argv[0] != "build":
+        print("usage: python -m app.services.roadnet build [DIR]")
+        return 2
+    root = Path(argv[1]) if len(argv) > 1 else ROADNET_DIR
+    net = RoadNetwork.from_csv(root / "nodes.csv", root / "edges.csv")
+    net.save(root / "roadnet.npz")
+    print(f"{root / 'roadnet.npz'}: {len(net.lat)} nodes, {net.g_min.nnz} arcs, fingerprint {net.fingerprint}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,137 @@
+# app/services/rule_forecast.py
+"""
+규칙 기반 수요예측 (ML 모델이 없거나 준비 전일 때의 대체값) — 실제 판매 이력 기반
+
+- (마을, 상품, 요일)별 지수 가중 평균/분산: 가중치 합 S0, Σw·x = S1, Σw·x² = S2
+  관측 가중치 w = exp(-Δdays/τ), Δdays = 그 그룹의 마지막 판매일 - 관측일 (관측 건수가 아니라 경과 일수로 감쇠)
+  새 관측으로 마지막 판매일이 d만큼 늦어지면 S ← exp(-d/τ)·S + Σ(w, w·x, w·x²) → 전체 재계산 없이 누적 갱신
+  (늦게 들어온 과거 행도 그 날짜만큼 감쇠되어 합산, 요일 통계는 HALFLIFE_WEEKS주마다 가중치 절반)
+- 같은 요일 기록이 없으면 (마을, 상품) 전체 일자 가중 평균 (HALFLIFE_DAYS일마다 절반), 그것도 없으면 기본값
+- 요청의 모든 쌍을 배열 조회 한 번으로 평가 (결정적, 난수 없음)
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Sequence, Tuple
+import datetime as dt
+import math
+import os
+
+import numpy as np
+
+HALFLIFE_WEEKS = float(os.getenv("ITDA_RULE_HALFLIFE_WEEKS", "4"))
+HALFLIFE_DAYS = float(os.getenv("ITDA_RULE_HALFLIFE_DAYS", "7"))
+DEFAULT_BASE = 20.0
+DEFAULT_SIGMA = 5.0
+_MIN_WEIGHT = 0.5  # 이보다 가벼운 (오래된 한두 건뿐인) 통계는 다음 단계로 대체
+
+
+def _weighted_sums(cell: np.ndarray, n_cells: int, x: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """cell별 가중 합 (3, n_cells): Σw, Σw·x, Σw·x²"""
+    out = np.zeros((3, n_cells))
+    if len(cell):
+        out[0] = np.bincount(cell, w, n_cells)
+        out[1] = np.bincount(cell, w * x, n_cells)
+        out[2] = np.bincount(cell, w * x * x, n_cells)
+    return out
+
+
+class WeekdayBaseline:
+    def __init__(self, halflife_weeks: float = HALFLIFE_WEEKS, halflife_days: float = HALFLIFE_DAYS):
+        # 감쇠 시정수 τ (일) — 반감기 h일이면 τ = h / ln 2
+        self.tau_wd = max(halflife_weeks, 1e-6) * 7.0 / math.log(2)
+        self.tau_all = max(halflife_days, 1e-6) / math.log(2)
+        self._gid: Dict[Tuple[int, int], int] = {}
+        self._wd = np.zeros((3, 0, 7))  # (S0/S1/S2, 그룹, 요일)
+        self._all = np.zeros((3, 0))
+        self._ref = np.zeros(0)  # 그룹별 기준일 (마지막 판매일 toordinal) — 가중치는 이 날짜 기준
+        self.rows = 0
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple]) -> "WeekdayBaseline":
+        """(ts, village_id, product_id, qty) 튜플들에서 — pandas 없이도 동작"""
+        eng = cls()
+        vids: List[int] = []
+        pids: List[int] = []
+        days: List[int] = []
+        qty: List[float] = []
+        for ts, v, p, q in rows:
+            try:
+                d = dt.date.fromisoformat(str(ts)[:10])
+                v, p = int(v), int(p)
+                q = float(q or 0)
+            except (TypeError, ValueError):
+                continue
+            vids.append(v); pids.append(p); days.append(d.toordinal()); qty.append(q)
+        eng.update(vids, pids, days, qty)
+        return eng
+
+    def _group_ids(self, vids: np.ndarray, pids: np.ndarray) -> np.ndarray:
+        """새 그룹이면 배열을 늘려 번호 배정"""
+        g = np.empty(len(vids), dtype=np.int64)
+        for i, key in enumerate(zip(vids.tolist(), pids.tolist())):
+            idx = self._gid.get(key)
+            if idx is None:
+                idx = self._gid[key] = len(self._gid)
+            g[i] = idx
+        grow = len(self._gid) - self._all.shape[1]
+        if grow > 0:
+            self._wd = np.concatenate([self._wd, np.zeros((3, grow, 7))], axis=1)
+            self._all = np.concatenate([self._all, np.zeros((3, grow))], axis=1)
+            self._ref = np.concatenate([self._ref, np.full(grow, -np.inf)])
+        return g
+
+    def update(self, vids: Sequence[int], pids: Sequence[int], days: Sequence[int], qty: Sequence[float]) -> None:
+        """
+        새 판매 행 반영 (days = date.toordinal(), 순서 무관).
+        그룹 기준일이 늦어진 만큼 기존 통계를 감쇠한 뒤 새 행을 기준일까지의 경과 일수로 가중해 더함.
+        """
+        vids = np.asarray(vids, dtype=np.int64)
+        if not len(vids):
+            return
+        pids = np.asarray(pids, dtype=np.int64)
+        days = np.asarray(days, dtype=np.float64)
+        x = np.asarray(qty, dtype=np.float64)
+        g = self._group_ids(vids, pids)
+        n_groups = len(self._gid)
+
+        ref = self._ref
+        new_ref = ref.copy()
+        np.maximum.at(new_ref, g, days)
+        shift = np.where(np.isfinite(ref), new_ref - ref, 0.0)  # 처음 보는 그룹은 감쇠할 기존 통계 없음
+        age = new_ref[g] - days
+
+        cell = g * 7 + (days.astype(np.int64) - 1) % 7  # toordinal 1 = 월요일
+        self._wd = self._wd * np.exp(-shift / self.tau_wd)[None, :, None] + _weighted_sums(
+            cell, n_groups * 7, x, np.exp(-age / self.tau_wd)
+        ).reshape(3, n_groups, 7)
+        self._all = self._all * np.exp(-shift / self.tau_all)[None] + _weighted_sums(
+            g, n_groups, x, np.exp(-age / self.tau_all)
+        )
+        self._ref = new_ref
+        self.rows += len(x)
+
+    @staticmethod
+    def _moments(s: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s[1] / s[0]
+            var = np.maximum(s[2] / s[0] - mean * mean, 0.0)
+        return mean, np.sqrt(var)
+
+    def predict(self, pairs: Sequence[Tuple[int, int]], target_date: dt.date) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """(base, sigma, source) — source: weekday | recent | default"""
+        m = len(pairs)
+        base = np.full(m, DEFAULT_BASE)
+        sigma = np.full(m, DEFAULT_SIGMA)
+        source = np.full(m, "default", dtype=object)
+        g = np.fromiter((self._gid.get((int(v), int(p)), -1) for v, p in pairs), dtype=np.int64, count=m)
+        known = np.flatnonzero(g >= 0)
+        if len(known):
+            gk = g[known]
+            s_all = self._all[:, gk]
+            mean, sd = self._moments(s_all)
+            ok = s_all[0] >= _MIN_WEIGHT
+            base[known[ok]], sigma[known[ok]], source[known[ok]] = mean[ok], sd[ok], "recent"
+            s_wd = self._wd[:, gk, target_date.weekday()]
+            mean, sd = self._moments(s_wd)
+            ok = s_wd[0] >= _MIN_WEIGHT
+            base[known[ok]], sigma[known[ok]], source[known[ok]] = mean[ok], sd[ok], "weekday"
+        return base, sigma, source.tolist()
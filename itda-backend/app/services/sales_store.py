@@ -0,0 +1,259 @@
+# app/services/sales_store.py
+"""
+판매 이력 저장소 — SQLite sales 표 (models.Sale)
+- insert_rows: 요청 하나에 수천 행 — INSERT_BATCH행씩 executemany, 전체가 한 트랜잭션
+- import_csv: 판매 CSV(ts, village_id, product_id, qty[, price, temp, rain]) 일괄 적재 (python -m app.seed.import_sales)
+  ensure_ready()는 표가 비어 있으면 SEED_CSV와 런타임 CSV(cache/sales/ingested.csv)를 한 번 적재 (서버 시작 시 호출)
+- read_sales: 필요한 열/기간만 DataFrame으로 (ts는 datetime64, id 순 = 적재 순)
+  fetch_rows: pandas 없이 튜플 목록 (규칙 엔진)
+- version(): 행 수 + 최대 id — 예측기가 데이터 변경을 알아채는 키
+- sales_frame: 프로세스 공용 판매 DataFrame (한 번 읽어 타입 지정, 라우터/예측기가 같은 데이터를 공유)
+  DB 파일 mtime/크기 또는 이 프로세스의 적재 횟수가 바뀌면 version()을 확인해 새 행만 덧붙이거나(id 뒤로 추가) 다시 읽음
+  typed_frame / append_frame: 같은 열/타입의 프레임을 DB 밖 행(CSV 모드 예측기)으로 만들거나 이어 붙임
+"""
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import csv
+import os
+import threading
+
+from sqlalchemy import insert
+
+from .. import db
+from ..models import Sale
+
+_BASE_DIR = Path(__file__).resolve().parent.parent
+SEED_CSV = os.getenv("ITDA_SALES_SEED_CSV", str(_BASE_DIR / "seed" / "seed_sales.csv"))
+INGESTED_CSV = _BASE_DIR / "cache" / "sales" / "ingested.csv"  # 표 이전 전 /demand/ingest가 쌓던 런타임 CSV
+INSERT_BATCH = int(os.getenv("ITDA_SALES_INSERT_BATCH", "5000"))
+COLUMNS = ("ts", "village_id", "product_id", "qty", "price", "temp", "rain")
+
+_READY = False
+_READY_LOCK = threading.Lock()
+
+_WRITES = 0  # 이 프로세스의 적재 횟수 (파일 mtime 해상도가 낮아도 공용 프레임이 바로 갱신되도록)
+_FRAME = None  # 공용 판매 DataFrame
+_FRAME_KEY: Optional[tuple] = None  # (적재 횟수, DB 파일 mtime_ns, 크기) — 바뀌면 version() 확인
+_FRAME_VER = ""
+_FRAME_LAST_ID = 0
+_FRAME_LOCK = threading.Lock()
+
+
+def _opt(v, cast):
+    return None if v is None or v == "" else cast(v)
+
+
+def normalize(row: Dict) -> Dict:
+    """입력 행 → 표 열 (ts는 datetime). 형식이 틀리면 ValueError/KeyError"""
+    ts = row["ts"]
+    if not isinstance(ts, datetime):
+        ts = datetime.fromisoformat(str(ts))
+    ts = ts.replace(tzinfo=None)  # 이력은 현지 시각 기준 naive
+    return {
+        "ts": ts,
+        "village_id": int(row["village_id"]),
+        "product_id": int(row["product_id"]),
+        "qty": int(float(row.get("qty") or 0)),
+        "price": _opt(row.get("price"), lambda x: int(float(x))),
+        "temp": _opt(row.get("temp"), float),
+        "rain": _opt(row.get("rain"), lambda x: int(float(x))),
+    }
+
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_rows(rows: Iterable[Dict]) -> int:
+    """normalize()된 행들을 한 트랜잭션으로 적재 — 삽입한 행 수"""
+    ensure_ready()
+    return _insert(rows)
+
+
+def _insert(rows: Iterable[Dict]) -> int:
+    global _WRITES
+    n = 0
+    stmt = insert(Sale)
+    with db.engine.begin() as conn:
+        for batch in _batches(rows, max(1, INSERT_BATCH)):
+            conn.execute(stmt, batch)
+            n += len(batch)
+    _WRITES += 1
+    return n
+
+
+def import_csv(path: Path) -> int:
+    """CSV 스트리밍 적재 (형식이 틀린 행은 건너뜀) — 삽입한 행 수. 표는 이미 있어야 함 (ensure_ready)"""
+    def rows() -> Iterator[Dict]:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    yield normalize(row)
+                except (KeyError, ValueError, TypeError):
+                    continue
+    return _insert(rows())
+
+
+def count() -> int:
+    with db.engine.connect() as conn:
+        return int(conn.exec_driver_sql("SELECT count(*) FROM sales").scalar() or 0)
+
+
+def _stats() -> tuple:
+    with db.engine.connect() as conn:
+        n, last = conn.exec_driver_sql("SELECT count(*), max(id) FROM sales").one()
+    return int(n), int(last or 0)
+
+
+def version() -> str:
+    n, last = _stats()
+    return f"db-{n}-{last}"
+
+
+def ensure_ready(import_seed: bool = True) -> int:
+    """프로세스당 한 번 — 표가 없으면 만들고, 비어 있으면 SEED_CSV(+ 이전에 반영된 INGESTED_CSV) 적재 (적재한 행 수)"""
+    global _READY
+    if _READY:
+        return 0
+    with _READY_LOCK:
+        if _READY:
+            return 0
+        Sale.__table__.create(bind=db.engine, checkfirst=True)
+        loaded = 0
+        if import_seed and SEED_CSV and Path(SEED_CSV).exists() and count() == 0:
+            loaded = import_csv(Path(SEED_CSV))
+            if INGESTED_CSV.exists():
+                loaded += import_csv(INGESTED_CSV)
+        _READY = True
+        return loaded
+
+
+def _select(columns: Sequence[str], since: Optional[datetime]):
+    cols = [c for c in columns if c in COLUMNS]
+    if not cols:
+        raise ValueError(f"unknown sales columns: {columns}")
+    sql = f"SELECT {', '.join(cols)} FROM sales"
+    params: tuple = ()
+    if since is not None:
+        sql += " WHERE ts >= ?"
+        params = (since.isoformat(sep=" "),)
+    return sql + " ORDER BY id", params
+
+
+def read_sales(columns: Sequence[str] = COLUMNS, since: Optional[datetime] = None):
+    """판매 행 DataFrame — since가 있으면 ts 색인으로 그 이후만"""
+    import pandas as pd  # 조회 시점에만 로드 (서버 기동 시간)
+
+    ensure_ready()
+    sql, params = _select(columns, since)
+    raw = db.engine.raw_connection()
+    try:
+        return pd.read_sql_query(sql, raw.driver_connection, params=params,
+                                 parse_dates=["ts"] if "ts" in columns else None)
+    finally:
+        raw.close()
+
+
+def fetch_rows(columns: Sequence[str] = COLUMNS, since: Optional[datetime] = None) -> List[tuple]:
+    """read_sales와 같은 조회를 튜플 목록으로 (ts는 'YYYY-MM-DD HH:MM:SS' 문자열)"""
+    ensure_ready()
+    sql, params = _select(columns, since)
+    with db.engine.connect() as conn:
+        return [tuple(r) for r in conn.exec_driver_sql(sql, params).all()]
+
+
+# ---------------- 공용 판매 DataFrame ----------------
+def typed_frame(df):
+    """조회 결과(또는 같은 열의 CSV 행) → 공용 타입 (마을/상품 ID category, ts/day datetime64, 수량/가격 int32, 강수 int8, 매출 int64)"""
+    import pandas as pd
+
+    out = pd.DataFrame({
+        "ts": df["ts"],
+        "day": df["ts"].dt.normalize(),
+        "village_id": df["village_id"].astype("category"),
+        "product_id": df["product_id"].astype("category"),
+        "qty": df["qty"].fillna(0).astype("int32"),
+        "price": df["price"].astype("Int32"),  # 비어 있을 수 있음
+        "temp": df["temp"].astype("float64"),  # 예측 특징 — 정밀도 그대로
+        "rain": df["rain"].astype("Int8"),
+    })
+    out["sale"] = (out["qty"].astype("int64") * out["price"].fillna(0).astype("int64")).astype("int64")
+    return out
+
+
+def _load_frame(after_id: int = 0):
+    """id > after_id 행을 타입 지정 DataFrame으로 (+ 마지막 id)"""
+    import pandas as pd
+
+    raw = db.engine.raw_connection()
+    try:
+        df = pd.read_sql_query("SELECT id, " + ", ".join(COLUMNS) + " FROM sales WHERE id > ? ORDER BY id",
+                               raw.driver_connection, params=(after_id,), parse_dates=["ts"])
+    finally:
+        raw.close()
+    last = int(df["id"].iloc[-1]) if len(df) else after_id
+    return typed_frame(df), last
+
+
+def append_frame(old, new):
+    """공용 프레임 + 새 행 — category 열은 범주를 합쳐 유지"""
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    out = pd.concat([old, new], ignore_index=True)
+    for c in ("village_id", "product_id"):
+        out[c] = pd.Categorical(union_categoricals([old[c].array, new[c].array]))
+    return out
+
+
+def _file_key() -> tuple:
+    try:
+        st = os.stat(db.DB_PATH)
+        return (_WRITES, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (_WRITES, 0, 0)
+
+
+def sales_frame():
+    """
+    공용 판매 DataFrame — 열: ts, day(자정), village_id, product_id, qty, price, temp, rain, sale(qty×price).
+    적재 순(id 순). 읽기 전용으로 다룰 것 — 얕은 복사본을 돌려주므로 열 추가/교체는 공용 프레임에 영향 없음, 값 수정은 금지
+    """
+    global _FRAME, _FRAME_KEY, _FRAME_VER, _FRAME_LAST_ID
+    ensure_ready()
+    key = _file_key()
+    frame = _FRAME
+    if frame is not None and key == _FRAME_KEY:
+        return frame.copy(deep=False)
+    with _FRAME_LOCK:
+        key = _file_key()
+        if _FRAME is None or key != _FRAME_KEY:
+            n, last = _stats()
+            ver = f"db-{n}-{last}"
+            if _FRAME is None or ver != _FRAME_VER:
+                if _FRAME is not None and last >= _FRAME_LAST_ID:
+                    tail, tail_last = _load_frame(_FRAME_LAST_ID)
+                    if len(_FRAME) + len(tail) == n:  # id 뒤로 추가만 — 새 행만 읽어 덧붙임
+                        _FRAME = append_frame(_FRAME, tail) if len(tail) else _FRAME
+                        _FRAME_LAST_ID = tail_last
+                    else:  # 삭제/교체 — 전체 다시 읽기
+                        _FRAME, _FRAME_LAST_ID = _load_frame()
+                else:
+                    _FRAME, _FRAME_LAST_ID = _load_frame()
+                _FRAME_VER = ver
+            _FRAME_KEY = key
+        return _FRAME.copy(deep=False)
+
+
+def frame_version() -> str:
+    """sales_frame()이 마지막으로 읽은 데이터 버전 (version()과 같은 형식)"""
+    return _FRAME_VER
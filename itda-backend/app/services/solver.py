@@ -0,0 +1,154 @@
+# app/services/solver.py
+"""
+경로 풀이 엔진 (열린 경로: 출발지 → 모든 마을 → 임의 종점)
+라우터(/route/*)와 services.optimizer가 같은 규칙으로 풀도록 한 곳에 모음.
+
+전략 (strategy="auto"면 규모/시간 예산으로 선택):
+- exact     : Held–Karp 최적해 (n <= exact_max_n())
+- greedy_ls : 최근접 구성 + 2-opt/Or-opt 1회 (기본)
+- anytime   : 구성 + 지역 탐색 + 국소 교란 반복, time_budget_s 동안 (예산을 준 경우)
+- cluster   : 군집 분할 → 군집별 풀이 → 이어 붙이기 (n >= LARGE_N)
+
+우선순위(priority) 규칙 — 모든 전략 공통:
+- max_stops로 자를 때 우선순위 높은 마을부터 남김 (select_stops)
+- 구성 단계에서 거리 / (0.5 + priority)가 작은 마을을 먼저 선택
+- 목적함수는 항상 총 이동 비용 (exact/지역 탐색 결과는 priority와 무관)
+"""
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+import time
+
+import numpy as np
+
+from .cluster import solve_large
+from .geo import SpatialIndex, travel_minutes
+from .local_search import path_legs
+from .matrix import route_matrix
+from .tsp import exact_max_n, tsp_anytime, tsp_greedy_2opt, tsp_open_path_exact
+
+LARGE_N = int(os.getenv("ITDA_LARGE_N", "500"))  # 이 이상이면 군집 분할
+STRATEGIES = ("exact", "greedy_ls", "anytime", "cluster")
+
+
+# ---------------- 우선순위 ----------------
+def priority_weights(priorities: Sequence[Optional[float]]) -> Optional[np.ndarray]:
+    """
+    0.5 + priority (0~1 클램프) — 행렬 인덱스 0..n (0 = 출발지, 선택에 쓰이지 않음).
+    우선순위가 하나도 없으면 None (순수 거리)
+    """
+    if all(p is None for p in priorities):
+        return None
+    pr = np.array([p or 0.0 for p in priorities], dtype=np.float64)
+    w = 0.5 + np.clip(pr, 0.0, 1.0)
+    return np.concatenate(([w.max() if len(w) else 1.0], w))
+
+
+def select_stops(stops: Sequence, max_stops: Optional[int]) -> List:
+    """max_stops개만 남김 — 우선순위 높은 순, 같으면 입력 순서 (priority 없으면 앞에서 자름)"""
+    stops = list(stops)
+    if not max_stops or max_stops <= 0 or max_stops >= len(stops):
+        return stops
+    ranked = sorted(range(len(stops)), key=lambda i: -(getattr(stops[i], "priority", None) or 0.0))
+    keep = sorted(ranked[:max_stops])
+    return [stops[i] for i in keep]
+
+
+# ---------------- 전략 ----------------
+def choose_strategy(n: int, time_budget_s: Optional[float] = None) -> str:
+    if n <= exact_max_n():
+        return "exact"
+    if n >= LARGE_N:
+        return "cluster"
+    if time_budget_s:
+        return "anytime"
+    return "greedy_ls"
+
+
+def solve(
+    start: Tuple[float, float],
+    lats: Sequence[float],
+    lons: Sequence[float],
+    D: Optional[np.ndarray] = None,
+    weights: Optional[np.ndarray] = None,
+    strategy: str = "auto",
+    time_budget_s: Optional[float] = None,
+    cluster_size: Optional[int] = None,
+    cluster_method: str = "kmeans",
+    parallel: bool = True,
+) -> Dict:
+    """
+    D: (n+1)×(n+1) 비용 행렬 (0 = 출발지). 없으면 Haversine으로 생성
+       (cluster 전략은 None이면 전역 개선 생략)
+    weights: priority_weights() 결과 (없으면 순수 거리)
+    Returns {"order": 1..n, "cost", "legs", "strategy", "solve_ms"}
+            (+ cluster면 "decomposition", "timings_ms")
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    n = len(lats)
+    if strategy == "auto":
+        strategy = choose_strategy(n, time_budget_s)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy: {strategy}")
+    if strategy == "exact" and n > exact_max_n():
+        raise ValueError(f"too many villages for exact strategy: {n} > {exact_max_n()}")
+
+    t0 = time.perf_counter()
+    if strategy == "cluster":
+        res = solve_large(
+            start, lats, lons, D=D, cluster_size=cluster_size, method=cluster_method,
+            parallel=parallel, improve_s=time_budget_s,
+        )
+        out = {"order": res["order"], "cost": res["total_km"], "legs": res["legs_km"]}
+        out["decomposition"] = res["decomposition"]
+        out["timings_ms"] = res["timings_ms"]
+    else:
+        if D is None:
+            D = route_matrix(start, lats, lons)
+        index = None
+        if n > exact_max_n():
+            index = SpatialIndex(np.r_[start[0], lats], np.r_[start[1], lons])
+        if strategy == "exact":
+            cost, order = tsp_open_path_exact(D)
+        elif strategy == "anytime":
+            cost, order, _reason = tsp_anytime(D, index, time_budget_s or 1.0, weights=weights)
+        else:
+            cost, order = tsp_greedy_2opt(D, index, weights=weights, time_limit_s=time_budget_s)
+        out = {"order": order, "cost": cost, "legs": path_legs(D, order)}
+    out["strategy"] = strategy
+    out["solve_ms"] = (time.perf_counter() - t0) * 1e3
+    return out
+
+
+# ---------------- 일정(ETA) ----------------
+def itinerary(
+    stops: Sequence,
+    order: Sequence[int],
+    legs_km: np.ndarray,
+    legs_min: Optional[np.ndarray] = None,
+    now: Optional[datetime] = None,
+    cumulative: bool = True,
+) -> Tuple[List[Dict], float]:
+    """
+    방문 순서별 정류장 항목 + 총 소요(분).
+    legs_min이 없으면 geo.travel_minutes(평균 35km/h)로 추정.
+    cumulative=True면 distance_km는 출발지부터 누적, False면 직전 구간 거리.
+    """
+    now = now or datetime.now()
+    legs_km = np.asarray(legs_km, dtype=np.float64)
+    legs_min = travel_minutes(legs_km) if legs_min is None else np.asarray(legs_min, dtype=np.float64)
+    cum_km = np.cumsum(legs_km)
+    cum_min = np.cumsum(legs_min)
+    ordered = []
+    for pos, idx in enumerate(order):
+        s = stops[idx - 1]
+        ordered.append({
+            "village_id": s.id,
+            "lat": s.lat,
+            "lon": s.lon,
+            "distance_km": round(float(cum_km[pos] if cumulative else legs_km[pos]), 1),
+            "eta": (now + timedelta(minutes=float(cum_min[pos]))).isoformat(),
+        })
+    return ordered, float(legs_min.sum())
@@ -0,0 +1,367 @@
+# app/services/train_scheduler.py
+"""
+수요예측 모델 백그라운드 학습 스케줄러
+- 작업 큐(최대 TRAIN_QUEUE개 대기) → 디스패처 스레드 1개가 순서대로 처리
+- 그룹 학습은 별도 spawn 프로세스 풀: TRAIN_WORKERS개 × 각 TRAIN_THREADS 스레드, nice +TRAIN_NICE
+  → API 요청/경로 계산 풀(workers.py)과 코어를 나눠 씀
+- 모델 저장소(model_store)에 같은 데이터 해시의 모델이 있으면 학습 없이 로드
+- FORECAST_TRAINING=background(기본): 서버 시작 시 전체 그룹 warm-up 작업을 넣고,
+  준비 전 요청은 규칙 기반 예측 (details["fallback"] = "model_training")
+  uvicorn 워커 여러 개면 저장소 디렉터리의 잠금 파일(.warmup.lock)로 warm-up을 한 번에 하나씩
+  → 처음 잡은 워커만 학습하고, 나머지는 잠금이 풀린 뒤 같은 해시의 모델을 저장소에서 로드만 함
+  inline: 기존처럼 첫 요청에서 학습 (스케줄러는 /demand/train 수동 작업에만 사용)
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+
+from . import forecast
+from .forecast import TRAIN_THREADS, _MLForecaster
+from .model_store import get_store
+
+FORECAST_TRAINING = os.getenv("ITDA_FORECAST_TRAINING", "background")  # background | inline
+TRAIN_WORKERS = int(os.getenv("ITDA_TRAIN_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+TRAIN_QUEUE = int(os.getenv("ITDA_TRAIN_QUEUE", "8"))  # 대기 작업 상한 (넘으면 QueueFull)
+TRAIN_NICE = int(os.getenv("ITDA_TRAIN_NICE", "10"))  # 학습 프로세스 우선순위 낮춤
+_JOB_HISTORY = 50  # 조회용으로 남겨 둘 최근 작업 수
+
+
+class QueueFull(Exception):
+    pass
+
+
+# ---------------- 자식 프로세스 ----------------
+def _init_worker(nice: int) -> None:
+    try:
+        os.nice(nice)
+    except (AttributeError, OSError):
+        pass
+
+
+def _fit_task(key: Tuple[int, int], X, y, digest: str, threads: int):
+    """그룹 하나 학습 → 저장소에 기록 (부모는 저장소에서 mmap 로드). 저장 실패 시 모델을 직접 반환"""
+    models, sigma = _MLForecaster.fit_key(key, X, y, n_jobs=threads)
+    try:
+        get_store().save(key, digest, models, sigma)
+        return None
+    except OSError:
+        return models, sigma
+
+
+# ---------------- 작업 ----------------
+@dataclass
+class TrainJob:
+    id: str
+    groups: List[Tuple[int, int]]
+    force: bool = False
+    reason: str = "manual"
+    status: str = "queued"  # queued | running | done | failed | cancelled
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    trained: int = 0
+    loaded: int = 0  # 저장소에서 로드 (학습 생략)
+    skipped: int = 0  # 데이터 부족
+    failed: int = 0
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)  # done/failed/cancelled
+
+    def to_dict(self) -> Dict:
+        done = self.trained + self.loaded + self.skipped + self.failed
+        return {
+            "id": self.id,
+            "status": self.status,
+            "reason": self.reason,
+            "force": self.force,
+            "groups": len(self.groups),
+            "progress": {"done": done, "trained": self.trained, "loaded": self.loaded,
+                         "skipped": self.skipped, "failed": self.failed},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_s": round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None,
+            "error": self.error,
+        }
+
+
+# ---------------- 스케줄러 ----------------
+class TrainScheduler:
+    def __init__(self, ml: _MLForecaster, workers: int = TRAIN_WORKERS, threads: int = TRAIN_THREADS,
+                 queue_size: int = TRAIN_QUEUE, nice: int = TRAIN_NICE):
+        self.ml = ml
+        self.workers = max(1, workers)
+        self.threads = max(1, threads)
+        self.nice = nice
+        self._q: "queue.Queue[Optional[TrainJob]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._jobs: "OrderedDict[str, TrainJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._current: Optional[TrainJob] = None
+
+    # ----- 공개 API -----
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="forecast-train", daemon=True)
+                self._thread.start()
+
+    def submit(self, groups: Optional[List[Tuple[int, int]]] = None, force: bool = False,
+               reason: str = "manual") -> TrainJob:
+        self.start()
+        if groups is None or self.ml.mode == "pooled":
+            groups = self.ml.training_keys()  # 공용 모델은 전체를 한 번에 재학습
+        job = TrainJob(id=uuid.uuid4().hex[:12], groups=list(groups), force=force, reason=reason)
+        try:
+            self._q.put_nowait(job)
+        except queue.Full:
+            raise QueueFull(f"training queue is full ({self._q.maxsize} jobs waiting)")
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > _JOB_HISTORY:
+                old = next(iter(self._jobs.values()))
+                if old.status in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[TrainJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[TrainJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[TrainJob]:
+        """대기 중이면 바로 취소, 실행 중이면 남은 그룹을 건너뛰고 진행 중인 학습만 마무리"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            job.finished.set()
+        return job
+
+    def info(self) -> Dict:
+        groups = self.ml.groups()
+        return {
+            "mode": FORECAST_TRAINING,
+            "model": self.ml.mode,
+            "workers": self.workers,
+            "threads_per_worker": self.threads,
+            "nice": self.nice,
+            "queue": {"waiting": self._q.qsize(), "max": self._q.maxsize},
+            "running": self._current.id if self._current else None,
+            "models_ready": sum(1 for k in groups if self.ml.has_model(k)),
+            "groups": len(groups),
+        }
+
+    def shutdown(self) -> None:
+        for job in self.jobs():
+            job.cancel_event.set()
+        if self._thread is not None:
+            try:
+                self._q.put_nowait(None)
+            except queue.Full:
+                pass
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    # ----- 내부 -----
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker, initargs=(self.nice,),
+                )
+            return self._pool
+
+    def _loop(self) -> None:
+        while True:
+            job = self._q.get()
+            if job is None:
+                return
+            if job.cancel_event.is_set():
+                job.finished.set()
+                continue
+            self._current = job
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                self._run(job)
+                job.status = "cancelled" if job.cancel_event.is_set() else "done"
+            except Exception as e:  # 작업 하나의 실패가 스케줄러를 멈추지 않도록
+                job.status = "failed"
+                job.error = str(e)
+            job.finished_at = time.time()
+            self._current = None
+            job.finished.set()
+
+    def _next_task(self, job: TrainJob, todo) -> Optional[Tuple[Tuple[int, int], object, object, str]]:
+        """저장소에서 바로 로드되거나 데이터가 부족한 그룹은 여기서 처리하고, 학습할 그룹만 반환"""
+        ml = self.ml
+        for key in todo:
+            if job.cancel_event.is_set():
+                return None
+            try:
+                X, y, digest = ml.prepare(key)
+            except ValueError:
+                ml.mark_untrainable(key)
+                job.skipped += 1
+                continue
+            if not job.force and ml.load_stored(key, digest):
+                job.loaded += 1
+                continue
+            return key, X, y, digest
+        return None
+
+    def _finish(self, job: TrainJob, key: Tuple[int, int], digest: str, result) -> None:
+        if result is None:
+            if not self.ml.load_stored(key, digest):
+                raise RuntimeError(f"trained model for {key} missing from store")
+        else:
+            self.ml.install(key, *result)
+        job.trained += 1
+
+    def _run(self, job: TrainJob) -> None:
+        todo = iter(job.groups)
+        inflight: Dict[Future, Tuple[Tuple[int, int], str, Tuple]] = {}
+        try:
+            pool = self._get_pool()
+        except OSError:
+            pool = None
+        while True:
+            while pool is not None and len(inflight) < self.workers:
+                task = self._next_task(job, todo)
+                if task is None:
+                    break
+                key, X, y, digest = task
+                try:
+                    inflight[pool.submit(_fit_task, key, X, y, digest, self.threads)] = (key, digest, (X, y))
+                except (BrokenProcessPool, RuntimeError, OSError):
+                    pool = None
+                    self._serial(job, key, X, y, digest)
+            if not inflight:
+                if pool is None:
+                    # 프로세스 풀을 쓸 수 없는 환경 → 디스패처 스레드에서 직접 (스레드 수 제한은 동일)
+                    task = self._next_task(job, todo)
+                    if task is None:
+                        return
+                    self._serial(job, *task)
+                    continue
+                return
+            done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+            for f in done:
+                key, digest, (X, y) = inflight.pop(f)
+                try:
+                    self._finish(job, key, digest, f.result())
+                except BrokenProcessPool:
+                    with self._lock:
+                        self._pool = None
+                    pool = None
+                    self._serial(job, key, X, y, digest)
+                except Exception:
+                    job.failed += 1
+
+    def _serial(self, job: TrainJob, key, X, y, digest) -> None:
+        try:
+            self._finish(job, key, digest, _fit_task(key, X, y, digest, self.threads))
+        except Exception:
+            job.failed += 1
+
+
+_SCHED: Optional[TrainScheduler] = None
+_SCHED_LOCK = threading.Lock()
+
+
+def get_scheduler() -> Optional[TrainScheduler]:
+    """ML 예측기를 쓸 수 없으면 None"""
+    global _SCHED
+    if _SCHED is None:
+        ml = forecast.get_ml()
+        if ml is None:
+            return None
+        with _SCHED_LOCK:
+            if _SCHED is None:
+                _SCHED = TrainScheduler(ml)
+    return _SCHED
+
+
+def start_background() -> Optional[threading.Thread]:
+    """
+    서버 시작 시 호출 — background 모드면 요청 경로 학습을 끄고,
+    예측기 생성(ML 라이브러리 import + 이력 로드)과 전체 그룹 warm-up 작업 등록은 별도 스레드에서 (기동을 막지 않음)
+    """
+    if FORECAST_TRAINING != "background":
+        return None
+    forecast.set_train_inline(False)
+    t = threading.Thread(target=_warm_up, name="forecast-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def schedule_refit(groups: List[Tuple[int, int]], reason: str) -> Optional[Dict]:
+    """판매 반영 후 전체 재학습이 필요한 그룹을 작업으로 등록 — 예측기가 없거나 대기열이 차면 None (다음 반영/학습 요청 때 다시)"""
+    if not groups:
+        return None
+    sched = get_scheduler()
+    if sched is None:
+        return None
+    try:
+        return sched.submit(list(groups), force=True, reason=reason).to_dict()
+    except QueueFull:
+        return None
+
+
+@contextmanager
+def _store_lock(path: Path) -> Iterator[None]:
+    """프로세스 간 배타 잠금 (fcntl.flock) — fcntl이 없거나 파일을 만들 수 없으면 잠금 없이"""
+    try:
+        import fcntl
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(path, "a+")
+    except (ImportError, OSError):
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _warm_up() -> None:
+    sched = get_scheduler()
+    if sched is None:
+        return
+    # 워커끼리 순서대로 — 먼저 잡은 워커가 학습/저장을 끝낸 뒤에야 다음 워커가 (저장소에서 로드만)
+    with _store_lock(get_store().root / ".warmup.lock"):
+        try:
+            job = sched.submit(reason="startup")
+        except QueueFull:
+            return
+        job.finished.wait()
+
+
+def shutdown() -> None:
+    if _SCHED is not None:
+        _SCHED.shutdown()
@@ -0,0 +1,279 @@
+# app/services/tsp.py
+"""
+열린 경로 TSP 솔버 (start(0) -> 모든 마을 -> 임의 종점)
+- tsp_open_path_exact : 밀집 배열 Held–Karp (예산 안의 n)
+- tsp_greedy_2opt     : 최근접 구성 + 2-opt/Or-opt 지역 탐색 (작은 n은 교란 재탐색 추가)
+- solve_open_path     : n과 예산에 따라 위 둘 중 선택
+- tsp_anytime         : 구성해 → 지역 탐색 → 국소 교란 반복, 더 나은 해마다 콜백 (스트리밍용)
+라우터와 프로세스 풀 워커가 함께 쓰므로 FastAPI/DB 의존성 없이 유지.
+"""
+from __future__ import annotations
+
+import os
+from typing import Callable, List, Optional, Tuple
+import time
+
+import numpy as np
+
+from .geo import SpatialIndex
+from .local_search import FULL_NEIGHBOURHOOD_N, candidate_lists, improve, path_length
+
+
+# 정확해(Held–Karp) 허용 예산 — 환경변수로 배포별 조정
+EXACT_MEM_BUDGET_MB = float(os.getenv("ITDA_EXACT_MEM_MB", "256"))
+EXACT_TIME_BUDGET_MS = float(os.getenv("ITDA_EXACT_TIME_MS", "1000"))
+EXACT_HARD_MAX_N = 24  # parent 테이블 int8, 2^24 상태 이상은 의미 없음
+_HK_NS_PER_STATE_EDGE = 9.0  # 실측: 2^n·n² 회 완화당 약 8~9ns (float64)
+LOCAL_SEARCH_TIME_S = float(os.getenv("ITDA_LS_TIME_S", "2.0"))  # 지역 탐색 안전 상한
+KICK_WINDOW = 30  # 교란(double-bridge) 구간 최대 길이 — 경로 일부만 흔들고 국소 재탐색
+# 작은 n(<= FULL_NEIGHBOURHOOD_N)의 greedy_2opt는 국소 최적 뒤 정점당 이 횟수만큼 교란 + 재탐색
+# (실측: 20~90개 마을에서 3이면 예전 전체 2-opt보다 나쁜 경우 없음, n=90에서 약 0.1s)
+SMALL_KICKS_PER_NODE = int(os.getenv("ITDA_LS_KICKS_PER_NODE", "3"))
+
+
+def held_karp_cost_estimate(n: int) -> Tuple[float, float]:
+    """(예상 메모리 MB, 예상 시간 ms) — cost(float64) + parent(int8) 테이블 + 층별 임시 배열"""
+    states = (1 << n) * n
+    mem_mb = states * (8 + 1) * 1.25 / 1e6
+    time_ms = states * n * _HK_NS_PER_STATE_EDGE / 1e6
+    return mem_mb, time_ms
+
+
+def exact_max_n(
+    mem_budget_mb: Optional[float] = None, time_budget_ms: Optional[float] = None
+) -> int:
+    """메모리/시간 예산 안에서 Held–Karp로 풀 수 있는 최대 마을 수"""
+    mem_budget_mb = EXACT_MEM_BUDGET_MB if mem_budget_mb is None else mem_budget_mb
+    time_budget_ms = EXACT_TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+    best = 1
+    for n in range(2, EXACT_HARD_MAX_N + 1):
+        mem_mb, time_ms = held_karp_cost_estimate(n)
+        if mem_mb > mem_budget_mb or time_ms > time_budget_ms:
+            break
+        best = n
+    return best
+
+
+def tsp_open_path_exact(D: np.ndarray) -> Tuple[float, List[int]]:
+    """
+    Held–Karp DP (open path), 밀집 배열 버전.
+    - Nodes: 1..n (villages), 0 = start only.
+    - Minimize cost: start(0) -> ... -> end(any)
+    Returns (min_cost, order of villages as indices 1..n).
+    NOTE: O(n^2 2^n) 시간, O(n 2^n) 메모리 — 허용 n은 exact_max_n()으로 결정.
+    """
+    D = np.asarray(D, dtype=np.float64)
+    n = D.shape[0] - 1  # number of villages
+    if n == 0:
+        return 0.0, []
+    if n == 1:
+        return float(D[0, 1]), [1]
+    if n > EXACT_HARD_MAX_N:
+        raise ValueError(f"too many villages for exact DP: {n}")
+
+    # cost[j, mask] : start(0)에서 출발, mask(마을 0..n-1 비트) 방문 후 j에서 끝난 최소 비용
+    # parent[j, mask] : 그 직전 마을(0..n-1), 첫 방문이면 -1
+    # (노드 축을 앞에 둬서 층 단위 완화 시 긴 마스크 축으로 벡터 연산)
+    size = 1 << n
+    cost = np.full((n, size), np.inf, dtype=np.float64)
+    parent = np.full((n, size), -1, dtype=np.int8)
+    nodes = np.arange(n)
+    cost[nodes, 1 << nodes] = D[0, 1:]
+
+    # popcount 층별로 마스크 정렬 — 층 s의 상태는 층 s-1 상태만 참조
+    masks = np.arange(size, dtype=np.int64)
+    popcnt = np.zeros(size, dtype=np.int8)
+    for b in range(n):
+        popcnt += ((masks >> b) & 1).astype(np.int8)
+    by_layer = np.argsort(popcnt, kind="stable")
+    bounds = np.searchsorted(popcnt[by_layer], np.arange(n + 2))
+
+    W = D[1:, 1:]
+    for s in range(2, n + 1):
+        prev_masks = by_layer[bounds[s - 1] : bounds[s]]
+        prev_cost = cost[:, prev_masks]  # (n, p)
+        for k in range(n):
+            # k를 아직 방문하지 않은 직전 상태들에서 k로 확장 (노드 축 전체를 한 번에 완화)
+            sel = ((prev_masks >> k) & 1) == 0
+            cand = prev_cost[:, sel]
+            cand += W[:, k][:, None]
+            j = np.argmin(cand, axis=0)
+            nmask = prev_masks[sel] | (1 << k)
+            cost[k, nmask] = np.take_along_axis(cand, j[None, :], axis=0)[0]
+            parent[k, nmask] = j
+
+    full = size - 1
+    # 끝점 선택(열린 경로)
+    end = int(np.argmin(cost[:, full]))
+    best_cost = float(cost[end, full])
+    if not np.isfinite(best_cost):
+        raise ValueError("DP table empty at full mask")
+
+    # 경로 복원
+    order_rev: List[int] = []
+    mask = full
+    j = end
+    while j >= 0:
+        order_rev.append(j + 1)
+        prev = int(parent[j, mask])
+        mask ^= 1 << j
+        j = prev
+
+    order = list(reversed(order_rev))  # indices 1..n
+    return best_cost, order
+
+
+def tsp_greedy_2opt(
+    D: np.ndarray,
+    index: Optional[SpatialIndex] = None,
+    weights: Optional[np.ndarray] = None,
+    time_limit_s: Optional[float] = None,
+    kicks_per_node: Optional[int] = None,
+) -> Tuple[float, List[int]]:
+    """
+    Fallback for 큰 n. Greedy + 2-opt/Or-opt 지역 탐색. Indices in 1..n.
+    index: 출발지(0) + 마을(1..n) 좌표의 SpatialIndex — 있으면 KD-tree로
+           최근접 선택/후보 리스트 생성 (수천 개 정점에서도 O(n log n))
+    weights: 행렬 인덱스별 우선순위 가중치 (구성 단계에서 거리 / weight 최소 선택)
+    kicks_per_node: n <= FULL_NEIGHBOURHOOD_N일 때 교란 횟수/정점 (None이면 SMALL_KICKS_PER_NODE, 0이면 생략)
+    """
+    n = len(D) - 1
+    if n == 0:
+        return 0.0, []
+    kicks = SMALL_KICKS_PER_NODE if kicks_per_node is None else kicks_per_node
+    order, cand = _construct(D, index, weights)
+    # 2-opt + Or-opt (O(1) 델타, 후보 리스트, don't-look bit)
+    limit = LOCAL_SEARCH_TIME_S if time_limit_s is None else time_limit_s
+    deadline = time.perf_counter() + limit
+    cost, order = improve(D, order, time_limit_s=limit, cand=cand)
+    if 8 <= n <= FULL_NEIGHBOURHOOD_N and kicks > 0:
+        # 작은 n은 한 번의 국소 최적이 예전 전체 2-opt보다 나쁠 수 있음 → 고정 횟수 교란으로 보완
+        cost, order = _kicks(D, cost, order, candidate_lists(D, n), kicks * n, deadline)
+    return cost, order
+
+
+def _kicks(
+    D: np.ndarray, cost: float, order: List[int], cand: np.ndarray, rounds: int, deadline: float, seed: int = 0
+) -> Tuple[float, List[int]]:
+    """double-bridge 교란 + 국소 재탐색을 rounds번 (개선 시에만 채택, 시드 고정이라 결과 재현 가능)"""
+    rng = np.random.default_rng(seed)
+    for _ in range(rounds):
+        left = deadline - time.perf_counter()
+        if left <= 0:
+            break
+        kicked, ends = _double_bridge(order, rng)
+        c, kicked = improve(D, kicked, time_limit_s=left, active=ends, cand=cand)
+        if c < cost - 1e-9:
+            cost, order = c, kicked
+    return cost, order
+
+
+def _construct(
+    D: np.ndarray, index: Optional[SpatialIndex] = None, weights: Optional[np.ndarray] = None
+) -> Tuple[List[int], Optional[np.ndarray]]:
+    """최근접 이웃 구성해 (weights가 있으면 거리 / weight) + (index가 있으면) 후보 리스트"""
+    n = len(D) - 1
+    if index is not None:
+        cand = index.neighbor_lists(8) if n > FULL_NEIGHBOURHOOD_N else None  # 작은 n은 improve가 전체 이웃 사용
+        return index.nearest_neighbor_path(0, weights=weights), cand
+    # greedy from start(0)
+    visited = np.zeros(n + 1, dtype=bool)
+    visited[0] = True
+    order = []
+    curr = 0
+    for _ in range(n):
+        row = D[curr] if weights is None else D[curr] / weights
+        row = np.where(visited, np.inf, row)
+        curr = int(np.argmin(row))
+        visited[curr] = True
+        order.append(curr)
+    return order, None
+
+
+def solve_open_path(
+    D: np.ndarray, index: Optional[SpatialIndex] = None, kicks_per_node: Optional[int] = None
+) -> Tuple[float, List[int]]:
+    """정확해는 예산(메모리/시간) 안에서 DP 사용, 실패 시 폴백"""
+    n = len(D) - 1
+    if n <= exact_max_n():
+        try:
+            return tsp_open_path_exact(D)
+        except Exception:
+            return tsp_greedy_2opt(D, kicks_per_node=kicks_per_node)
+    return tsp_greedy_2opt(D, index, kicks_per_node=kicks_per_node)
+
+
+def _double_bridge(order: List[int], rng: np.random.Generator) -> Tuple[List[int], List[int]]:
+    """
+    창(KICK_WINDOW) 안 두 인접 구간 교환: A B C D -> A C B D
+    Returns (새 순서, 바뀐 간선 끝 노드들)
+    """
+    m = len(order)
+    a = int(rng.integers(0, m - 2))
+    b = a + 1 + int(rng.integers(0, min(KICK_WINDOW, m - a - 2)))
+    c = b + 1 + int(rng.integers(0, min(KICK_WINDOW, m - b - 1)))
+    new = order[:a] + order[b:c] + order[a:b] + order[c:]
+    ends = {order[a], order[b - 1], order[b], order[c - 1]}
+    if a > 0:
+        ends.add(order[a - 1])
+    if c < m:
+        ends.add(order[c])
+    return new, sorted(ends)
+
+
+def tsp_anytime(
+    D: np.ndarray,
+    index: Optional[SpatialIndex] = None,
+    time_limit_s: float = 5.0,
+    on_solution: Optional[Callable[[str, float, List[int]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    seed: int = 0,
+    weights: Optional[np.ndarray] = None,
+) -> Tuple[float, List[int], str]:
+    """
+    언제 멈춰도 해가 있는 열린 경로 풀이.
+    1) 예산 안의 n은 Held–Karp 최적해 한 번
+    2) 최근접 구성해 → 2-opt/Or-opt → 남은 시간 동안 국소 double-bridge + 재탐색(개선 시 채택)
+    on_solution(phase, cost, order): "construction" / "improve" / "perturb" 단계에서 더 나은 해마다
+    Returns (cost, order, stop_reason) — "optimal" | "converged" | "time_budget" | "cancelled"
+    """
+    deadline = time.perf_counter() + time_limit_s
+    stop = should_stop or (lambda: False)
+    emit = on_solution or (lambda phase, cost, order: None)
+    n = len(D) - 1
+    if n <= exact_max_n():
+        cost, order = solve_open_path(D)
+        emit("optimal", cost, order)
+        return cost, order, "optimal"
+
+    order, cand = _construct(D, index, weights)
+    best_cost = path_length(D, order)
+    emit("construction", best_cost, order)
+    if cand is None:
+        cand = candidate_lists(D, n if n <= FULL_NEIGHBOURHOOD_N else 8)
+
+    def progress(cost: float, cur: List[int]) -> bool:
+        if cost < best_cost:
+            emit("improve", cost, cur)
+        return stop() or time.perf_counter() > deadline
+
+    cost, order = improve(D, order, time_limit_s=time_limit_s, cand=cand, on_progress=progress)
+    if cost < best_cost:
+        best_cost = cost
+        emit("improve", best_cost, order)
+
+    rng = np.random.default_rng(seed)
+    while n >= 8:
+        if stop():
+            return best_cost, order, "cancelled"
+        left = deadline - time.perf_counter()
+        if left <= 0:
+            return best_cost, order, "time_budget"
+        kicked, ends = _double_bridge(order, rng)
+        cost, kicked = improve(D, kicked, time_limit_s=left, active=ends, cand=cand)
+        if cost < best_cost - 1e-9:
+            best_cost, order = cost, kicked
+            emit("perturb", best_cost, order)
+    if stop():
+        return best_cost, order, "cancelled"
+    return best_cost, order, "converged"
@@ -0,0 +1,41 @@
+# app/services/workers.py
+"""
+CPU 바운드 경로 계산용 공용 프로세스 풀
+- 요청 스레드풀(uvicorn)을 막지 않도록 무거운 계산은 별도 프로세스에서 실행
+- spawn 컨텍스트: 스레드가 도는 서버 프로세스를 fork할 때의 락 교착 위험 회피
+- 풀은 첫 사용 시 만들고 프로세스 종료 시 정리
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import atexit
+import multiprocessing as mp
+import os
+import threading
+
+ROUTE_WORKERS = int(os.getenv("ITDA_ROUTE_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_LOCK = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _LOCK:
+            if _POOL is None:
+                _POOL = ProcessPoolExecutor(
+                    max_workers=ROUTE_WORKERS, mp_context=mp.get_context("spawn")
+                )
+    return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL
+    with _LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+atexit.register(shutdown_pool)
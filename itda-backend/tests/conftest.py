@@ -0,0 +1,14 @@
+# tests/conftest.py
+"""
+테스트 공용 설정 — app 모듈 import 전에 DB/모델/행렬 캐시 경로를 임시 디렉터리로 돌림
+(버전 관리되는 app/itda.db, app/cache를 건드리지 않도록)
+"""
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="itda-test-")
+os.environ.setdefault("ITDA_DB_PATH", os.path.join(_TMP, "itda.db"))
+os.environ.setdefault("ITDA_MODEL_DIR", os.path.join(_TMP, "models"))
+os.environ.setdefault("ITDA_MATRIX_CACHE_DIR", os.path.join(_TMP, "matrix"))
+os.environ.setdefault("ITDA_FORECAST_TRAINING", "inline")
+os.environ.setdefault("ITDA_ROUTE_WORKERS", "1")
@@ -0,0 +1,107 @@
+# tests/test_batch.py
+from app.services import batch
+from app.services.batch import RouteProblem, solve_batch
+
+
+def _problem(n: int) -> RouteProblem:
+    return RouteProblem(
+        start=(37.50, 127.00),
+        ids=list(range(1, n + 1)),
+        lats=[37.50 + 0.01 * i for i in range(n)],
+        lons=[127.00 + 0.013 * ((i * 7) % n) for i in range(n)],
+    )
+
+
+def test_batch_keeps_input_order_and_shares_blocks():
+    out = solve_batch([_problem(5), _problem(5), _problem(7)], parallel=False)
+    assert out["unique_matrices"] == 2
+    assert [sorted(r["order"]) for r in out["results"]] == [[1, 2, 3, 4, 5]] * 2 + [list(range(1, 8))]
+    assert out["results"][0]["shared_matrix"] and not out["results"][2]["shared_matrix"]
+
+
+def test_batch_error_is_per_problem(monkeypatch):
+    real = batch.solve
+
+    def flaky(start, lats, *args, **kwargs):
+        if len(lats) == 6:
+            raise IndexError("bad input")
+        return real(start, lats, *args, **kwargs)
+
+    monkeypatch.setattr(batch, "solve", flaky)
+    out = solve_batch([_problem(5), _problem(6), _problem(4)], parallel=False)
+    assert out["results"][1] == {"error": "bad input"}
+    assert sorted(out["results"][0]["order"]) == [1, 2, 3, 4, 5]
+    assert sorted(out["results"][2]["order"]) == [1, 2, 3, 4]
+
+
+def test_broken_pool_is_reported_and_discarded(monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    class DeadPool:
+        def submit(self, fn, *args):
+            f = Future()
+            f.set_exception(BrokenProcessPool("killed"))
+            return f
+
+    dropped = []
+    monkeypatch.setattr(batch, "ROUTE_WORKERS", 2)
+    monkeypatch.setattr(batch, "get_pool", lambda: DeadPool())
+    monkeypatch.setattr(batch, "shutdown_pool", lambda: dropped.append(True))
+    out = solve_batch([_problem(4), _problem(5)], parallel=True)
+    assert all("worker process died" in r["error"] for r in out["results"])
+    assert dropped
+
+
+def _route_req(n: int, **kw) -> dict:
+    p = _problem(n)
+    return {
+        "villages": [{"id": i, "lat": a, "lon": b} for i, a, b in zip(p.ids, p.lats, p.lons)],
+        "vehicle": {"start_lat": p.start[0], "start_lon": p.start[1]},
+        **kw,
+    }
+
+
+def test_batch_endpoint_honours_strategy_and_rejects_oversized_exact():
+    from fastapi import HTTPException
+    import pytest
+
+    from app.routers.route import BatchRouteReq, optimize_batch
+    from app.services.tsp import exact_max_n
+
+    out = optimize_batch(BatchRouteReq(problems=[
+        _route_req(6, strategy="exact"),
+        _route_req(6, strategy="greedy_ls"),
+        _route_req(6, strategy="anytime", time_budget_s=0.05),
+    ], parallel=False))
+    assert [r["strategy"] for r in out["results"]] == ["exact", "greedy_ls", "anytime"]
+    assert all(r["metric"] == "haversine" for r in out["results"])
+
+    with pytest.raises(HTTPException) as err:
+        optimize_batch(BatchRouteReq(problems=[_route_req(4), _route_req(exact_max_n() + 1, strategy="exact")]))
+    assert err.value.status_code == 422 and "problems[1]" in err.value.detail
+
+
+def test_shared_block_is_sent_once_per_worker_chunk(monkeypatch):
+    from concurrent.futures import Future
+
+    class InlinePool:
+        def __init__(self):
+            self.blocks = []
+
+        def submit(self, fn, *args):
+            self.blocks.append(args[0])
+            f = Future()
+            f.set_result(fn(*args))
+            return f
+
+    pool = InlinePool()
+    monkeypatch.setattr(batch, "ROUTE_WORKERS", 2)
+    monkeypatch.setattr(batch, "get_pool", lambda: pool)
+    problems = [_problem(6) for _ in range(5)] + [_problem(4)]
+    out = solve_batch(problems, parallel=True)
+    assert len(pool.blocks) == 3  # 6개 마을 집합 2묶음 + 4개 마을 집합 1묶음 (문제 수가 아니라)
+    assert [b.shape for b in pool.blocks] == [(6, 6), (6, 6), (4, 4)]
+    serial = solve_batch(problems, parallel=False)
+    assert [r["order"] for r in out["results"]] == [r["order"] for r in serial["results"]]
+    assert all(r["shared_matrix"] for r in out["results"][:5]) and not out["results"][5]["shared_matrix"]
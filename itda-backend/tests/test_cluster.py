@@ -0,0 +1,44 @@
+# tests/test_cluster.py
+import numpy as np
+
+from app.services import cluster
+from app.services.cluster import solve_large
+
+
+def _points(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return (36.40 + rng.random(n) * 0.3).tolist(), (127.30 + rng.random(n) * 0.3).tolist()
+
+
+def test_broken_pool_is_discarded_and_clusters_solved_serially(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    def dead_pool():
+        raise BrokenProcessPool("killed")
+
+    dropped = []
+    monkeypatch.setattr(cluster, "ROUTE_WORKERS", 2)
+    monkeypatch.setattr(cluster, "get_pool", dead_pool)
+    monkeypatch.setattr(cluster, "shutdown_pool", lambda: dropped.append(True))
+    lats, lons = _points(40)
+    out = solve_large((36.5, 127.4), lats, lons, cluster_size=10, improve_s=0.0)
+    assert dropped
+    assert out["decomposition"]["workers"] == 1
+    assert sorted(out["order"]) == list(range(1, 41))
+
+
+def test_mode_large_wins_over_explicit_strategy():
+    from app.routers.route import RouteReq, optimize
+    from app.services.tsp import exact_max_n
+
+    n = exact_max_n() + 6
+    lats, lons = _points(n)
+    body = {
+        "villages": [{"id": i + 1, "lat": a, "lon": b} for i, (a, b) in enumerate(zip(lats, lons))],
+        "vehicle": {"start_lat": 36.5, "start_lon": 127.4},
+        "mode": "large",
+        "cluster_size": 8,
+    }
+    for strategy in ("exact", "greedy_ls", "auto"):
+        out = optimize(RouteReq(**body, strategy=strategy))
+        assert out["strategy"] == "cluster" and out["decomposition"]["clusters"] >= 2
@@ -0,0 +1,59 @@
+# tests/test_fleet.py
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ortools")
+
+from app.services.fleet import FleetStop, FleetVehicle, solve_fleet  # noqa: E402
+
+NOW = datetime(2025, 9, 10, 9, 0)
+
+
+def _stops(n: int, demand: int = 1, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [FleetStop(id=100 + i, lat=36.40 + rng.random() * 0.2, lon=127.30 + rng.random() * 0.2, demand=demand)
+            for i in range(n)]
+
+
+def test_all_stops_served_within_capacity():
+    stops = _stops(12, demand=2)
+    vehicles = [FleetVehicle(id=1, start_lat=36.5, start_lon=127.4, capacity=14),
+                FleetVehicle(id=2, start_lat=36.45, start_lon=127.35, capacity=14)]
+    out = solve_fleet(stops, vehicles, time_limit_s=1.0, now=NOW)
+    assert out["dropped"] == []
+    served = [s["village_id"] for r in out["routes"] for s in r["ordered_stops"]]
+    assert sorted(served) == [s.id for s in stops]
+    for r in out["routes"]:
+        assert r["load"] == sum(s["demand"] for s in r["ordered_stops"]) <= r["capacity"]
+    # 한 차량 용량(14)으로는 24를 다 못 실으니 두 대 모두 사용
+    assert all(r["ordered_stops"] for r in out["routes"])
+    assert out["total_distance_km"] == pytest.approx(sum(r["total_distance_km"] for r in out["routes"]), abs=0.2)
+
+
+def test_over_capacity_stops_are_dropped():
+    stops = _stops(6, demand=3)
+    vehicles = [FleetVehicle(id=1, start_lat=36.5, start_lon=127.4, capacity=9)]
+    out = solve_fleet(stops, vehicles, time_limit_s=1.0, now=NOW)
+    (route,) = out["routes"]
+    assert len(route["ordered_stops"]) == 3 and route["load"] == 9
+    assert len(out["dropped"]) == 3
+    assert set(out["dropped"]).isdisjoint(s["village_id"] for s in route["ordered_stops"])
+
+
+def test_shift_limit_bounds_route_duration():
+    stops = _stops(10)
+    vehicles = [FleetVehicle(id=1, start_lat=36.5, start_lon=127.4, max_shift_min=60.0)]
+    out = solve_fleet(stops, vehicles, time_limit_s=1.0, now=NOW)
+    (route,) = out["routes"]
+    assert route["est_duration_min"] <= 60
+    assert route["capacity"] is None
+    assert out["dropped"]  # 마을당 체류 10분 → 60분 안에 10곳은 불가
+    etas = [datetime.fromisoformat(s["eta"]) for s in route["ordered_stops"]]
+    assert etas == sorted(etas) and all(e >= NOW for e in etas)
+
+
+def test_requires_a_vehicle():
+    with pytest.raises(ValueError):
+        solve_fleet(_stops(2), [])
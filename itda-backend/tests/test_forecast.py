@@ -0,0 +1,61 @@
+# tests/test_forecast.py
+import pytest
+
+from app.bench.forecast_bench import _write_history
+from app.services.forecast import _MLForecaster
+
+
+@pytest.fixture(scope="module")
+def history(tmp_path_factory):
+    base = tmp_path_factory.mktemp("hist")
+    target = _write_history(base, villages=2, products=3, days=40)
+    return base, target
+
+
+@pytest.mark.parametrize("mode", ["per_group", "pooled"])
+def test_predict_one_matches_batch(history, mode):
+    base, target = history
+    ml = _MLForecaster(base, store=None, mode=mode)
+    pairs = ml.groups()
+    batch = ml.predict_batch(pairs, target)
+    assert all(it is not None and it.qty >= 0 and 0 <= it.conf_low <= it.conf_high for it in batch)
+    for (vid, pid), it in zip(pairs[:3], batch):
+        one = ml.predict_one(vid, pid, target)
+        assert (one.village_id, one.product_id) == (vid, pid)
+        assert (one.qty, one.conf_low, one.conf_high) == (it.qty, it.conf_low, it.conf_high)
+
+
+@pytest.mark.parametrize("mode", ["per_group", "pooled"])
+def test_forecast_returns_valid_items_in_both_modes(monkeypatch, mode):
+    from app.services import forecast
+    from app.services.forecast_cache import get_forecast_cache
+
+    ml = _MLForecaster(store=None, mode=mode)  # conftest의 임시 DB (seed 판매 이력)
+    monkeypatch.setattr(forecast, "_ML", ml)
+    get_forecast_cache().invalidate()  # 다른 예측기 인스턴스의 항목과 섞이지 않도록
+    items = forecast.forecast("2025-09-10", [1, 2], [101, 102, 999])
+    assert [(it.village_id, it.product_id) for it in items] == [(v, p) for v in (1, 2) for p in (101, 102, 999)]
+    for it in items:
+        assert it.qty >= 0 and 0 <= it.conf_low <= it.conf_high
+    label = "pooled(" if mode == "pooled" else "ensemble("
+    assert all(it.details["model"].startswith(label) for it in items if it.product_id != 999)
+    get_forecast_cache().invalidate()
+
+
+def test_pooled_encodings_use_only_earlier_days(history):
+    base, _ = history
+    ml = _MLForecaster(base, store=None, mode="pooled")
+    X, _ = ml._pooled_training_data()
+    day = X.index.get_level_values("day")
+    vid = X.index.get_level_values("village_id")
+    first = day.min()
+    # 그 뒤 날짜의 판매량을 바꿔도 앞선 행의 인코딩은 그대로여야 함 (자기 타깃/미래 값이 새지 않음)
+    df = ml._frame.copy()
+    ts_day = df["ts"].to_numpy().astype("datetime64[D]").astype("int64")
+    df.loc[ts_day > first + 10, "qty"] = 10_000
+    ml._set_history(df)
+    X2, _ = ml._pooled_training_data()
+    early = (day <= first + 10) & (vid == vid[0])
+    assert early.any()
+    assert (X2.loc[early, "enc_village"].to_numpy() == X.loc[early, "enc_village"].to_numpy()).all()
+    assert (X2.loc[early, "enc_pair"].to_numpy() == X.loc[early, "enc_pair"].to_numpy()).all()
@@ -0,0 +1,66 @@
+# tests/test_forecast_cache.py
+from app.services import forecast_cache
+from app.services.forecast import ForecastItem
+from app.services.forecast_cache import ForecastCache
+
+
+def _item(q: int = 10) -> ForecastItem:
+    return ForecastItem(1, 101, q, q - 2, q + 2, {"model": "ensemble(rf)"})
+
+
+def _key(i: int):
+    return ("2025-09-10", 1, 100 + i, 1, 1)
+
+
+def test_get_put_returns_independent_copies():
+    cache = ForecastCache(max_entries=10, max_bytes=10**6, ttl_s=60)
+    assert cache.get(_key(0)) is None
+    item = _item()
+    cache.put(_key(0), item)
+    item.details["model"] = "changed"  # 넣은 뒤 고쳐도 캐시는 그대로
+    got = cache.get(_key(0))
+    assert got == _item()
+    got.details["x"] = 1  # 돌려받은 사본을 고쳐도 그대로
+    assert cache.get(_key(0)) == _item()
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["entries"]) == (2, 1, 1)
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ForecastCache(max_entries=3, max_bytes=10**6, ttl_s=60)
+    for i in range(3):
+        cache.put(_key(i), _item(i + 10))
+    cache.get(_key(0))  # 0을 최근 사용으로
+    cache.put(_key(3), _item())
+    assert cache.get(_key(1)) is None and cache.get(_key(0)) is not None
+    assert cache.stats()["evictions"] == 1
+
+    one = ForecastCache(max_entries=10, max_bytes=10**6, ttl_s=60)
+    one.put(_key(0), _item())
+    size = one.stats()["bytes"]
+    small = ForecastCache(max_entries=10, max_bytes=int(size * 2.5), ttl_s=60)
+    for i in range(4):
+        small.put(_key(i), _item())
+    s = small.stats()
+    assert s["entries"] == 2 and s["bytes"] <= s["max_bytes"]
+    assert small.get(_key(3)) is not None and small.get(_key(0)) is None
+
+
+def test_ttl_expiry_and_invalidate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(forecast_cache.time, "monotonic", lambda: now[0])
+    cache = ForecastCache(max_entries=10, max_bytes=10**6, ttl_s=5)
+    cache.put(_key(0), _item())
+    cache.put(_key(1), _item())
+    now[0] += 6
+    assert cache.get(_key(0)) is None
+    assert cache.stats()["expired"] == 1
+    cache.invalidate()
+    s = cache.stats()
+    assert (s["entries"], s["bytes"], s["invalidations"]) == (0, 0, 1)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ForecastCache(max_entries=0)
+    cache.put(_key(0), _item())
+    assert not cache.enabled and cache.get(_key(0)) is None and cache.stats()["entries"] == 0
@@ -0,0 +1,45 @@
+# tests/test_forecast_horizon.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import forecast
+from app.services.forecast import HORIZON_MAX_DAYS, _MLForecaster
+from app.services.forecast_cache import get_forecast_cache
+
+
+@pytest.fixture(params=["per_group", "pooled"])
+def served(request, monkeypatch):
+    monkeypatch.setattr(forecast, "_ML", _MLForecaster(store=None, mode=request.param))  # conftest의 임시 DB
+    get_forecast_cache().invalidate()
+    with TestClient(app) as c:
+        yield c, request.param
+    get_forecast_cache().invalidate()
+
+
+def test_horizon_columns_and_first_day_match_single_forecast(served):
+    client, mode = served
+    body = {"start": "2025-09-10", "days": 5, "villages": [1, 2], "products": [101, 102, 999]}
+    r = client.post("/demand/forecast/horizon", json=body)
+    assert r.status_code == 200
+    out = r.json()
+    assert out["dates"] == [f"2025-09-{d}" for d in range(10, 15)]
+    assert [(x["village_id"], x["product_id"]) for x in out["results"]] == [(v, p) for v in (1, 2) for p in (101, 102, 999)]
+    single = {(it.village_id, it.product_id): it for it in forecast.forecast("2025-09-10", [1, 2], [101, 102, 999])}
+    for x in out["results"]:
+        assert len(x["qty"]) == len(x["conf_low"]) == len(x["conf_high"]) == 5
+        assert all(0 <= lo <= hi for lo, hi in zip(x["conf_low"], x["conf_high"]))
+        it = single[(x["village_id"], x["product_id"])]
+        assert (x["qty"][0], x["conf_low"][0], x["conf_high"][0]) == (it.qty, it.conf_low, it.conf_high)
+        if x["product_id"] == 999 and mode == "per_group":  # 이력 없는 쌍 — 공용 모델은 인코딩 대체값으로 예측
+            assert x["model"] == "rule" and "fallback" in x
+        else:
+            assert x["model"] != "rule" and x["sigma"] >= 0
+
+
+def test_horizon_days_are_validated(served):
+    client, _mode = served
+    body = {"start": "2025-09-10", "days": HORIZON_MAX_DAYS + 1, "villages": [1], "products": [101]}
+    assert client.post("/demand/forecast/horizon", json=body).status_code == 422
+    body["days"] = 0
+    assert client.post("/demand/forecast/horizon", json=body).status_code == 422
@@ -0,0 +1,58 @@
+# tests/test_geo.py
+import numpy as np
+import pytest
+
+from app.services.geo import SpatialIndex
+from app.services.matrix import haversine_matrix, haversine_rows
+
+
+def _index(n: int, seed: int = 0) -> SpatialIndex:
+    rng = np.random.default_rng(seed)
+    return SpatialIndex(36.40 + rng.random(n) * 0.3, 127.30 + rng.random(n) * 0.3)
+
+
+@pytest.mark.parametrize("k", [1, 5, 30, 500])
+def test_knearest_matches_brute_force(k):
+    idx = _index(200)
+    for lat, lon in ((36.5, 127.4), (36.41, 127.59), (36.9, 127.0)):
+        d, i = idx.knearest(lat, lon, k)
+        brute = np.sort(haversine_rows(lat, lon, idx.lats, idx.lons))[: min(k, idx.n)]
+        np.testing.assert_allclose(d, brute, rtol=1e-3)
+        assert len(set(i.tolist())) == len(i)
+        np.testing.assert_allclose(d, haversine_rows(lat, lon, idx.lats[i], idx.lons[i]))
+
+
+@pytest.mark.parametrize("radius", [0.5, 3.0, 10.0])
+def test_within_matches_brute_force(radius):
+    idx = _index(300, seed=1)
+    lat, lon = 36.55, 127.45
+    d, i = idx.within(lat, lon, radius)
+    full = haversine_rows(lat, lon, idx.lats, idx.lons)
+    assert set(i.tolist()) == set(np.flatnonzero(full <= radius).tolist())
+    assert (np.diff(d) >= 0).all()
+
+
+def test_neighbor_lists_match_brute_force():
+    idx = _index(150, seed=2)
+    nb = idx.neighbor_lists(8)
+    assert nb.shape == (150, 8)
+    P = idx.xy
+    for a in range(idx.n):
+        assert a not in nb[a]
+        proj = np.hypot(*(P - P[a]).T)
+        proj[a] = np.inf
+        np.testing.assert_allclose(proj[nb[a]], np.sort(proj)[:8])
+    assert idx.neighbor_lists(500).shape == (150, 149)
+    assert SpatialIndex([36.5], [127.4]).neighbor_lists(8).shape == (1, 0)
+
+
+def test_nearest_neighbor_path_is_greedy():
+    idx = _index(120, seed=3)
+    D = haversine_matrix(idx.lats, idx.lons)
+    path = idx.nearest_neighbor_path(0)
+    assert sorted(path) == list(range(1, 120))
+    left, cur = set(range(1, 120)), 0
+    for nxt in path:
+        assert D[cur, nxt] <= min(D[cur, j] for j in left) * (1 + 1e-3)
+        left.remove(nxt)
+        cur = nxt
@@ -0,0 +1,77 @@
+# tests/test_history_index.py
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.history_index import HistoryIndex
+
+PAIRS = [(1, 101), (1, 102), (2, 101), (3, 103)]
+
+
+@pytest.fixture(scope="module")
+def frame():
+    """그룹별로 날짜를 듬성듬성 (빠진 날 포함), 적재 순서는 뒤섞어서"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for v, p in PAIRS[:3]:
+        days = np.sort(rng.choice(60, size=40, replace=False))
+        for d in days:
+            rows.append((pd.Timestamp("2025-07-01") + pd.Timedelta(days=int(d)), v, p,
+                         float(rng.integers(0, 30)), float(rng.normal(22, 4)), float(rng.integers(0, 3))))
+    df = pd.DataFrame(rows, columns=["day", "village_id", "product_id", "qty", "temp", "rain"])
+    return df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+
+
+def _group(df, v, p):
+    return df[(df.village_id == v) & (df.product_id == p)].sort_values("day", kind="stable")
+
+
+def test_rows_and_order_select_each_group_in_date_order(frame):
+    index = HistoryIndex.from_frame(frame)
+    assert len(index) == len(frame)
+    assert sorted(index.groups()) == sorted(PAIRS[:3])
+    assert (3, 103) not in index and index.count((3, 103)) == 0
+    for v, p in PAIRS[:3]:
+        g = frame.iloc[index.order[index.rows((v, p))]]
+        assert (g.village_id == v).all() and (g.product_id == p).all()
+        assert g["day"].is_monotonic_increasing and len(g) == len(_group(frame, v, p))
+
+
+@pytest.mark.parametrize("first, last", [(0, 59), (10, 16), (55, 80), (-5, -1)])
+def test_window_sums_match_pandas(frame, first, last):
+    index = HistoryIndex.from_frame(frame)
+    base = dt.date(2025, 7, 1).toordinal()
+    total, count = index.window(PAIRS, base + first, base + last)
+    for i, (v, p) in enumerate(PAIRS):
+        g = _group(frame, v, p)
+        d = (g["day"] - pd.Timestamp("2025-07-01")).dt.days
+        sel = g[(d >= first) & (d <= last)]
+        assert total[i] == pytest.approx(sel["qty"].sum())
+        assert count[i] == len(sel)
+
+
+def test_last_days_and_features_match_pandas(frame):
+    index = HistoryIndex.from_frame(frame)
+    last = index.last_days(PAIRS)
+    assert last[-1] == -1
+    for target in (dt.date(2025, 7, 20), dt.date(2025, 8, 29), dt.date(2025, 9, 5)):
+        F = index.features(PAIRS, target)
+        np.testing.assert_allclose(F[-1], [18.0, 0.0, 15.0, 15.0, 15.0])
+        for i, (v, p) in enumerate(PAIRS[:3]):
+            g = _group(frame, v, p)
+            assert last[i] == g["day"].iloc[-1].date().toordinal()
+            t = pd.Timestamp(target)
+            upto = g[g["day"] <= t].tail(14)
+            tail7 = g["qty"].tail(7).mean()
+            by_day = g.set_index("day")["qty"]
+            week = g[(g["day"] > t - pd.Timedelta(days=8)) & (g["day"] <= t - pd.Timedelta(days=1))]
+            expect = [
+                upto["temp"].mean() if len(upto) else 18.0,
+                round(upto["rain"].mean()) if len(upto) else 0.0,
+                by_day.get(t - pd.Timedelta(days=1), g["qty"].iloc[-1]),
+                by_day.get(t - pd.Timedelta(days=7), tail7),
+                week["qty"].mean() if len(week) else tail7,
+            ]
+            np.testing.assert_allclose(F[i], expect, rtol=1e-9)
@@ -0,0 +1,35 @@
+# tests/test_local_search.py
+import numpy as np
+import pytest
+
+from app.services.local_search import improve, path_length
+from app.services.matrix import route_matrix
+
+
+def _instance(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    lats = 36.5 + rng.uniform(0, 0.3, n)
+    lons = 127.3 + rng.uniform(0, 0.3, n)
+    return route_matrix((36.6, 127.4), lats, lons), rng
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_improve_never_worse_than_input(seed):
+    D, rng = _instance(40, seed)
+    start = (rng.permutation(40) + 1).tolist()
+    before = path_length(D, start)
+    cost, order = improve(D, start)
+    assert sorted(order) == list(range(1, 41))
+    assert cost == pytest.approx(path_length(D, order))
+    assert cost <= before + 1e-9
+
+
+def test_improve_with_active_subset_and_time_limit():
+    D, rng = _instance(30, 9)
+    start = (rng.permutation(30) + 1).tolist()
+    before = path_length(D, start)
+    cost, order = improve(D, start, active=start[:5], time_limit_s=0.5)
+    assert sorted(order) == list(range(1, 31))
+    assert cost <= before + 1e-9
+    cost2, order2 = improve(D, order)  # 이미 국소 최적 근처 — 다시 돌려도 나빠지지 않음
+    assert cost2 <= cost + 1e-9 and sorted(order2) == list(range(1, 31))
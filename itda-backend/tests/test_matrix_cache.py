@@ -0,0 +1,62 @@
+# tests/test_matrix_cache.py
+import numpy as np
+
+from app.services.matrix import haversine_matrix, route_matrix
+from app.services.matrix_cache import MatrixCache, attach_start
+
+
+def _villages(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ids = list(range(1000 + seed * n, 1000 + seed * n + n))
+    return ids, (36.40 + rng.random(n) * 0.3).tolist(), (127.30 + rng.random(n) * 0.3).tolist()
+
+
+def test_hit_returns_same_block_in_request_order(tmp_path):
+    cache = MatrixCache(tmp_path, max_bytes=10**8, min_n=4)
+    ids, lats, lons = _villages(20)
+    first = cache.village_block(ids, lats, lons)
+    np.testing.assert_allclose(first, haversine_matrix(lats, lons))
+    # 같은 집합을 다른 순서로 → 캐시 히트, 블록은 새 요청 순서 기준
+    perm = np.random.default_rng(1).permutation(20)
+    again = cache.village_block([ids[i] for i in perm], [lats[i] for i in perm], [lons[i] for i in perm])
+    np.testing.assert_allclose(again, first[np.ix_(perm, perm)])
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["entries"]) == (1, 1, 1)
+
+
+def test_small_sets_and_metrics_are_not_shared(tmp_path):
+    cache = MatrixCache(tmp_path, max_bytes=10**8, min_n=8)
+    ids, lats, lons = _villages(5)
+    cache.village_block(ids, lats, lons)
+    assert cache.stats()["misses"] == 0  # min_n 미만은 캐시를 거치지 않음
+    ids, lats, lons = _villages(10)
+    cache.village_block(ids, lats, lons)
+    road = cache.village_block(ids, lats, lons, metric="road", builder=lambda a, b: np.ones((len(a), len(a))))
+    assert (road == 1.0).all()
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 0
+
+
+def test_lru_eviction_and_restart(tmp_path):
+    one = 10 * 10 * 8 + 128  # (10, 10) float64 .npy 파일 크기 근사
+    cache = MatrixCache(tmp_path, max_bytes=2 * one, min_n=4)
+    sets = [_villages(10, seed=s) for s in range(3)]
+    cache.village_block(*sets[0])
+    cache.village_block(*sets[1])
+    cache.village_block(*sets[0])  # 0을 최근 사용으로
+    cache.village_block(*sets[2])  # 가장 오래된 1을 밀어냄
+    s = cache.stats()
+    assert s["evictions"] == 1 and s["entries"] == 2 and s["bytes"] <= s["max_bytes"]
+    # 재시작: 디스크의 파일로 색인 복원 → 0, 2는 히트, 1은 미스
+    reopened = MatrixCache(tmp_path, max_bytes=2 * one, min_n=4)
+    reopened.village_block(*sets[0])
+    reopened.village_block(*sets[2])
+    assert reopened.stats()["hits"] == 2 and reopened.stats()["misses"] == 0
+    reopened.clear()
+    assert reopened.stats()["entries"] == 0 and not list(tmp_path.glob("*.npy"))
+
+
+def test_attach_start_matches_route_matrix(tmp_path):
+    cache = MatrixCache(tmp_path, max_bytes=10**8, min_n=4)
+    ids, lats, lons = _villages(12)
+    D = attach_start((36.5, 127.4), cache.village_block(ids, lats, lons), lats, lons)
+    np.testing.assert_allclose(D, route_matrix((36.5, 127.4), lats, lons))
@@ -0,0 +1,71 @@
+# tests/test_model_store.py
+import numpy as np
+import pytest
+
+from app.bench.forecast_bench import _write_history
+from app.services.forecast import _MLForecaster
+from app.services.model_store import ModelStore, data_hash
+
+
+def _fitted(with_xgb: bool):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+
+    rng = np.random.default_rng(0)
+    X, y = rng.random((80, 4)), rng.random(80) * 10
+    models = {"hgb": HistGradientBoostingRegressor(max_iter=20).fit(X, y)}
+    if with_xgb:
+        xgb = pytest.importorskip("xgboost")
+        models["xgb"] = xgb.train({"max_depth": 3}, xgb.DMatrix(X, label=y), num_boost_round=10)
+    return models, X
+
+
+def test_data_hash_depends_on_data_shape_and_salt():
+    a = np.arange(12.0)
+    assert data_hash(a) == data_hash(a.copy())
+    assert data_hash(a) != data_hash(a + 1e-9)
+    assert data_hash(a) != data_hash(a.reshape(3, 4))
+    assert data_hash(a, salt="v1") != data_hash(a, salt="v2")
+    assert data_hash(a.astype(np.int64)) == data_hash(a)  # 값이 같으면 dtype과 무관
+
+
+@pytest.mark.parametrize("with_xgb", [False, True])
+def test_save_load_round_trip(tmp_path, with_xgb):
+    store = ModelStore(tmp_path)
+    models, X = _fitted(with_xgb)
+    assert store.load((1, 101), "abc") is None
+    store.save((1, 101), "abc", models, 2.5)
+    loaded, sigma = store.load((1, 101), "abc")
+    assert sigma == 2.5 and set(loaded) == set(models)
+    np.testing.assert_allclose(loaded["hgb"].predict(X), models["hgb"].predict(X))
+    if with_xgb:
+        import xgboost as xgb
+
+        np.testing.assert_allclose(loaded["xgb"].predict(xgb.DMatrix(X)), models["xgb"].predict(xgb.DMatrix(X)))
+    assert store.load((1, 101), "other") is None
+    assert (store.saves, store.loads) == (1, 1)
+
+
+def test_corrupt_file_is_ignored_and_entries_prune(tmp_path):
+    store = ModelStore(tmp_path)
+    models, _ = _fitted(False)
+    store.save((1, 101), "old", models, 1.0)
+    store.save((1, 101), "new", models, 1.0)
+    store.save((2, 102), "new", models, 1.0)
+    store.path((3, 103), "bad").write_bytes(b"not a joblib file")
+    assert store.load((3, 103), "bad") is None
+    keys = {(e["village_id"], e["product_id"], e["data_hash"]) for e in store.entries()}
+    assert keys == {(1, 101, "old"), (1, 101, "new"), (2, 102, "new"), (3, 103, "bad")}
+    assert store.prune([((1, 101), "new"), ((2, 102), "new")]) == 2
+    assert {e["data_hash"] for e in store.entries()} == {"new"}
+
+
+def test_second_forecaster_loads_instead_of_training(tmp_path):
+    target = _write_history(tmp_path, villages=1, products=2, days=40)
+    store = ModelStore(tmp_path / "models")
+    first = _MLForecaster(tmp_path, store=store)
+    a = first.predict_batch(first.groups(), target)
+    assert store.saves == len(first.groups()) and store.loads == 0
+    second = _MLForecaster(tmp_path, store=ModelStore(tmp_path / "models"))
+    b = second.predict_batch(second.groups(), target)
+    assert second._store.saves == 0 and second._store.loads == len(second.groups())
+    assert [(x.qty, x.conf_low, x.conf_high) for x in a] == [(x.qty, x.conf_low, x.conf_high) for x in b]
@@ -0,0 +1,33 @@
+# tests/test_repair.py
+import pytest
+
+from app.routers.route import RepairReq, repair
+
+
+def _stops(n: int):
+    return [{"village_id": i, "lat": 36.60 + 0.01 * i, "lon": 127.40 + 0.007 * ((i * 3) % n)} for i in range(1, n + 1)]
+
+
+def test_repair_insert_and_remove_keep_the_stop_set():
+    route = _stops(12)
+    req = RepairReq(
+        vehicle={"start_lat": 36.59, "start_lon": 127.39},
+        ordered_stops=route,
+        insert=[{"id": 50, "lat": 36.655, "lon": 127.43}, {"id": 51, "lat": 36.62, "lon": 127.45},
+                {"id": 3, "lat": 0.0, "lon": 0.0}],  # 3은 이미 경로에 있음
+        remove=[4, 9, 999],  # 999는 경로에 없음
+    )
+    out = repair(req)
+    ids = [s["village_id"] for s in out["ordered_stops"]]
+    assert sorted(ids) == sorted({s["village_id"] for s in route} - {4, 9} | {50, 51})
+    assert len(ids) == len(set(ids))
+    assert sorted(out["repair"]["inserted"]) == [50, 51]
+    assert sorted(out["repair"]["removed"]) == [4, 9]
+    assert sorted(out["repair"]["ignored"]) == [3, 999]
+    assert out["total_distance_km"] == pytest.approx(out["ordered_stops"][-1]["distance_km"], abs=0.1)  # 누적 거리
+
+
+def test_repair_without_changes_keeps_order():
+    route = _stops(6)
+    out = repair(RepairReq(vehicle={"start_lat": 36.59, "start_lon": 127.39}, ordered_stops=route))
+    assert [s["village_id"] for s in out["ordered_stops"]] == [s["village_id"] for s in route]
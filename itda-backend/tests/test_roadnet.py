@@ -0,0 +1,114 @@
+# tests/test_roadnet.py
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+
+from app.routers.route import RouteReq, optimize
+from app.services import roadnet
+from app.services.matrix_cache import get_cache
+
+FIXTURE = Path(__file__).parent / "data" / "roadnet"  # 4×4 격자, 6→7 일방통행
+
+
+@pytest.fixture
+def net(tmp_path, monkeypatch):
+    root = tmp_path / "roadnet"
+    shutil.copytree(FIXTURE, root)  # load()가 roadnet.npz를 옆에 씀
+    monkeypatch.setattr(roadnet, "ROADNET_DIR", root)
+    monkeypatch.setattr(roadnet, "_NET", None)
+    monkeypatch.setattr(roadnet, "_NET_LOADED", False)
+    return roadnet.get_network()
+
+
+def _points(net, nodes):
+    return [int(i) + 101 for i in nodes], net.lat[nodes].tolist(), net.lon[nodes].tolist()
+
+
+def test_fixture_loads_with_oneway(net):
+    assert net is not None and len(net.lat) == 16
+    assert not net.symmetric
+
+
+@pytest.mark.parametrize("min_n", [0, 1000])  # 캐시 경유 / 바로 계산
+def test_road_matrices_match_full_dijkstra(net, monkeypatch, min_n):
+    monkeypatch.setattr(get_cache(), "min_n", min_n)
+    nodes = np.array([15, 5, 10, 0, 6, 3])  # 입력 순서 ≠ ID 정렬 순서
+    ids, lats, lons = _points(net, nodes)
+    start = (float(net.lat[12]), float(net.lon[12]))
+    full_t = dijkstra(net.g_min, directed=True)
+    full_k = dijkstra(net.g_km, directed=True)
+    every = np.r_[12, nodes]
+
+    for _ in range(2):  # 두 번째는 마을 블록 캐시 적중 → 출발지 행/열만 계산
+        T, K = roadnet.road_route_matrices(start, ids, lats, lons)
+        np.testing.assert_allclose(T, full_t[np.ix_(every, every)], atol=1e-9)
+        np.testing.assert_allclose(K, full_k[np.ix_(every, every)], atol=1e-9)
+    assert T[2, 5] != T[5, 2]  # 5 → 6 일방통행 구간
+
+
+def test_optimize_uses_road_metric(net):
+    nodes = [3, 10, 5, 15]
+    ids, lats, lons = _points(net, np.array(nodes))
+    req = RouteReq(
+        villages=[{"id": i, "lat": a, "lon": b} for i, a, b in zip(ids, lats, lons)],
+        vehicle={"start_lat": float(net.lat[0]), "start_lon": float(net.lon[0])},
+        metric="road",
+    )
+    out = optimize(req)
+    assert out["metric"] == "road"
+    assert sorted(s["village_id"] for s in out["ordered_stops"]) == sorted(ids)
+
+
+def test_batch_road_metric_matches_single(net):
+    from app.routers.route import BatchRouteReq, optimize_batch
+
+    ids, lats, lons = _points(net, np.array([3, 10, 5, 15]))
+    req = RouteReq(
+        villages=[{"id": i, "lat": a, "lon": b} for i, a, b in zip(ids, lats, lons)],
+        vehicle={"start_lat": float(net.lat[0]), "start_lon": float(net.lon[0])},
+        metric="road",
+        strategy="exact",
+    )
+    single = optimize(req)
+    out = optimize_batch(BatchRouteReq(problems=[req], parallel=False))["results"][0]
+    assert out["metric"] == "road" and out["strategy"] == "exact"
+    stops = lambda r: [(s["village_id"], s["distance_km"]) for s in r["ordered_stops"]]  # noqa: E731
+    assert stops(out) == stops(single)
+
+
+def test_road_metric_without_network_is_rejected(tmp_path, monkeypatch):
+    from fastapi import HTTPException
+
+    from app.routers.route import BatchRouteReq, optimize_batch
+
+    monkeypatch.setattr(roadnet, "ROADNET_DIR", tmp_path / "missing")
+    monkeypatch.setattr(roadnet, "_NET", None)
+    monkeypatch.setattr(roadnet, "_NET_LOADED", False)
+    req = RouteReq(
+        villages=[{"id": 1, "lat": 36.61, "lon": 127.51}, {"id": 2, "lat": 36.62, "lon": 127.52}],
+        vehicle={"start_lat": 36.60, "start_lon": 127.50},
+        metric="road",
+    )
+    with pytest.raises(HTTPException) as err:
+        optimize(req)
+    assert err.value.status_code == 422
+    with pytest.raises(HTTPException) as err:
+        optimize_batch(BatchRouteReq(problems=[req.model_copy(update={"metric": "haversine"}), req]))
+    assert err.value.status_code == 422 and err.value.detail.startswith("problems[1]")
+
+
+def test_large_path_with_road_metric_warns(net):
+    ids, lats, lons = _points(net, np.arange(1, 16))
+    req = RouteReq(
+        villages=[{"id": i, "lat": a, "lon": b} for i, a, b in zip(ids, lats, lons)],
+        vehicle={"start_lat": float(net.lat[0]), "start_lon": float(net.lon[0])},
+        metric="road",
+        mode="large",
+        cluster_size=5,
+    )
+    out = optimize(req)
+    assert out["metric"] == "haversine" and "warning" in out
+    assert sorted(s["village_id"] for s in out["ordered_stops"]) == sorted(ids)
@@ -0,0 +1,69 @@
+# tests/test_route_stream.py
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def _req(n: int, budget: float, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "villages": [{"id": 1 + i, "lat": 36.40 + a * 0.3, "lon": 127.30 + b * 0.3}
+                     for i, (a, b) in enumerate(rng.random((n, 2)))],
+        "vehicle": {"start_lat": 36.5, "start_lon": 127.4},
+        "time_budget_s": budget,
+        "min_interval_ms": 0,
+    }
+
+
+def _until_final(ws) -> list:
+    msgs = []
+    while not msgs or msgs[-1]["type"] == "solution":
+        msgs.append(ws.receive_json())
+    return msgs
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def test_stream_sends_improving_solutions_then_final(client):
+    with client.websocket_connect("/route/stream") as ws:
+        ws.send_json(_req(60, budget=0.3))
+        msgs = _until_final(ws)
+    *sols, final = msgs
+    assert sols and sols[0]["phase"] == "construction"
+    assert final["type"] == "final" and final["stop_reason"] in ("time_budget", "converged")
+    costs = [m["total_distance_km"] for m in sols]
+    assert all(b <= a + 0.1 for a, b in zip(costs, costs[1:]))  # 응답 거리는 0.1km 반올림
+    assert final["total_distance_km"] <= costs[0] + 0.1
+    assert sorted(s["village_id"] for s in final["ordered_stops"]) == list(range(1, 61))
+
+
+def test_small_request_is_solved_exactly(client):
+    with client.websocket_connect("/route/stream") as ws:
+        ws.send_json(_req(5, budget=1.0))
+        sol, final = _until_final(ws)
+    assert sol["phase"] == "optimal" and final["stop_reason"] == "optimal"
+    assert [s["village_id"] for s in final["ordered_stops"]] == [s["village_id"] for s in sol["ordered_stops"]]
+
+
+def test_cancel_stops_the_search(client):
+    with client.websocket_connect("/route/stream") as ws:
+        ws.send_json(_req(150, budget=30.0, seed=1))
+        assert ws.receive_json()["phase"] == "construction"
+        ws.send_json({"type": "cancel"})
+        final = _until_final(ws)[-1]
+    assert final["stop_reason"] == "cancelled"
+    assert final["elapsed_ms"] < 10_000
+    assert len(final["ordered_stops"]) == 150
+
+
+def test_invalid_request_gets_error(client):
+    with client.websocket_connect("/route/stream") as ws:
+        ws.send_json({"villages": "nope"})
+        msg = ws.receive_json()
+    assert msg["type"] == "error"
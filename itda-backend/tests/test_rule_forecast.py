@@ -0,0 +1,39 @@
+# tests/test_rule_forecast.py
+import datetime as dt
+
+import numpy as np
+
+from app.services.rule_forecast import WeekdayBaseline
+
+MON = dt.date(2025, 9, 1)
+
+
+def _rows(n_weeks: int, gap_days: int = 7):
+    """월요일마다 (1, 101) 판매 — 수량 10, 20, 30, ..."""
+    days = [(MON + dt.timedelta(days=gap_days * k)).toordinal() for k in range(n_weeks)]
+    return [1] * n_weeks, [101] * n_weeks, days, [10.0 * (k + 1) for k in range(n_weeks)]
+
+
+def test_weekday_weight_halves_per_halflife_in_days():
+    eng = WeekdayBaseline(halflife_weeks=4)
+    v, p, days, qty = _rows(2, gap_days=28)  # 같은 요일 두 건이 4주 간격
+    eng.update(v, p, days, qty)
+    base, _sigma, source = eng.predict([(1, 101)], MON)
+    assert source == ["weekday"]
+    assert np.isclose(base[0], (0.5 * 10 + 1.0 * 20) / 1.5)  # 건수가 아니라 경과 일수로 감쇠
+
+
+def test_incremental_update_matches_one_shot_in_any_order():
+    v, p, days, qty = _rows(6)
+    once = WeekdayBaseline()
+    once.update(v, p, days, qty)
+    inc = WeekdayBaseline()
+    inc.update(v[3:], p[3:], days[3:], qty[3:])
+    inc.update(v[:3], p[:3], days[:3], qty[:3])  # 늦게 들어온 과거 행
+    for target in (MON, MON + dt.timedelta(days=3)):
+        a = once.predict([(1, 101), (2, 202)], target)
+        b = inc.predict([(1, 101), (2, 202)], target)
+        np.testing.assert_allclose(a[0], b[0])
+        np.testing.assert_allclose(a[1], b[1])
+        assert a[2] == b[2]
+    assert once.predict([(2, 202)], MON)[2] == ["default"]
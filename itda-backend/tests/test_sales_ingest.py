@@ -0,0 +1,80 @@
+# tests/test_sales_ingest.py
+"""판매 적재 → 공용 판매 프레임/예측기 색인/예측 캐시가 함께 갱신되는지 (conftest의 임시 DB 사용)"""
+from app.services import forecast, sales_store
+from app.services.forecast_cache import get_forecast_cache
+
+
+def _rows(n: int, day: str = "2025-09-01"):
+    return [{"ts": f"{day}T10:{i:02d}:00", "village_id": 1, "product_id": 101, "qty": 20 + i,
+             "price": 3000, "temp": 21.5, "rain": 0} for i in range(n)]
+
+
+def test_sales_frame_picks_up_new_rows():
+    before = sales_store.sales_frame()
+    ver = sales_store.frame_version()
+    assert sales_store.insert_rows([sales_store.normalize(r) for r in _rows(2)]) == 2
+    after = sales_store.sales_frame()
+    assert len(after) == len(before) + 2
+    assert sales_store.frame_version() != ver
+    assert after["qty"].iloc[-2:].tolist() == [20, 21]
+    assert int(after["sale"].iloc[-1]) == 21 * 3000
+
+
+def test_forecast_cache_hit_then_invalidated_by_ingest():
+    cache = get_forecast_cache()
+    first = forecast.forecast("2025-09-10", [1], [101])[0]
+    hits = cache.hits
+    again = forecast.forecast("2025-09-10", [1], [101])[0]
+    assert cache.hits == hits + 1
+    assert (again.qty, again.conf_low, again.conf_high) == (first.qty, first.conf_low, first.conf_high)
+
+    ml = forecast.get_ml()
+    count = ml._index.count((1, 101))
+    out = forecast.ingest_sales(_rows(3, day="2025-09-09"))
+    assert out["rows"] == 3
+    # 예측기는 공용 프레임을 그대로 색인 (자체 사본 없음)
+    assert len(ml._frame) == len(sales_store.sales_frame())
+    assert ml._index.count((1, 101)) == count + 3
+
+    misses = cache.misses
+    forecast.forecast("2025-09-10", [1], [101])
+    assert cache.misses == misses + 1  # 데이터 버전이 바뀌어 옛 항목은 조회되지 않음
+
+
+def test_demand_ingest_is_an_alias_of_sales_ingest():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    body = {"rows": [{"ts": "2025-09-09T11:00:00", "village_id": 2, "product_id": 102, "qty": 5, "price": 1000}]}
+    n = len(sales_store.sales_frame())
+    with TestClient(app) as client:
+        old = client.post("/demand/ingest", json=body)
+        new = client.post("/sales/ingest", json=body)
+    assert old.status_code == new.status_code == 200
+    assert old.json()["rows"] == new.json()["rows"] == 1
+    assert len(sales_store.sales_frame()) == n + 2
+
+
+def test_forecast_picks_up_rows_written_by_another_worker():
+    import sqlite3
+
+    from app import db
+
+    cache = get_forecast_cache()
+    ml = forecast.get_ml()
+    forecast.forecast("2025-09-10", [2], [102])
+    count = ml._index.count((2, 102))
+    version = ml.data_version
+
+    # 다른 uvicorn 워커의 적재 흉내 — 이 프로세스의 sales_store/예측기를 거치지 않고 DB에 직접
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO sales (ts, village_id, product_id, qty, price, temp, rain) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(f"2025-09-09 12:0{i}:00", 2, 102, 30 + i, 1000, 20.0, 0) for i in range(4)],
+        )
+    misses = cache.misses
+    forecast.forecast("2025-09-10", [2], [102])
+    assert ml._index.count((2, 102)) == count + 4
+    assert ml.data_version != version
+    assert cache.misses == misses + 1  # 새 데이터 버전 → 옛 캐시 항목은 조회되지 않음
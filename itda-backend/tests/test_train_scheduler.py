@@ -0,0 +1,45 @@
+# tests/test_train_scheduler.py
+import threading
+import time
+
+from app.services import train_scheduler
+from app.services.train_scheduler import TrainJob
+
+
+class _FakeScheduler:
+    """submit한 작업을 잠시 뒤 끝냄 — 동시에 실행 중인 warm-up 수를 기록"""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.jobs = 0
+        self._lock = threading.Lock()
+
+    def submit(self, groups=None, force=False, reason="manual"):
+        job = TrainJob(id=reason, groups=[])
+        with self._lock:
+            self.jobs += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+        def finish():
+            time.sleep(0.05)
+            with self._lock:
+                self.running -= 1
+            job.status = "done"
+            job.finished.set()
+
+        threading.Thread(target=finish, daemon=True).start()
+        return job
+
+
+def test_warm_up_runs_one_at_a_time(monkeypatch):
+    fake = _FakeScheduler()
+    monkeypatch.setattr(train_scheduler, "get_scheduler", lambda: fake)
+    threads = [threading.Thread(target=train_scheduler._warm_up) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert fake.jobs == 3
+    assert fake.peak == 1  # 앞 워커의 작업이 끝난 뒤에야 다음 워커가 등록
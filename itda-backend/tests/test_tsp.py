@@ -0,0 +1,66 @@
+# tests/test_tsp.py
+import itertools
+
+import numpy as np
+import pytest
+
+from app.services.geo import SpatialIndex
+from app.services.local_search import path_length
+from app.services.matrix import route_matrix
+from app.services.tsp import tsp_greedy_2opt, tsp_open_path_exact
+
+
+def _brute_force(D: np.ndarray) -> float:
+    n = D.shape[0] - 1
+    return min(path_length(D, list(p)) for p in itertools.permutations(range(1, n + 1)))
+
+
+@pytest.mark.parametrize("n", range(0, 9))
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_exact_matches_brute_force(n, symmetric):
+    rng = np.random.default_rng(100 + n)
+    D = rng.uniform(1.0, 50.0, size=(n + 1, n + 1))
+    if symmetric:
+        D = (D + D.T) / 2
+    np.fill_diagonal(D, 0.0)
+    cost, order = tsp_open_path_exact(D)
+    assert sorted(order) == list(range(1, n + 1))
+    assert cost == pytest.approx(path_length(D, order))
+    assert cost == pytest.approx(_brute_force(D) if n else 0.0)
+
+
+def _old_greedy_two_opt(D: np.ndarray) -> float:
+    """예전 route.tsp_greedy_2opt: 최근접 구성 + 전체 (i, j) 2-opt 스캔을 개선이 없을 때까지"""
+    n = D.shape[0] - 1
+    order, left = [], set(range(1, n + 1))
+    while left:
+        nxt = min(left, key=lambda j: D[order[-1] if order else 0, j])
+        order.append(nxt)
+        left.remove(nxt)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 2):
+            for j in range(i + 2, n):
+                a, b, c = order[i], order[i + 1], order[j]
+                delta = D[a, c] - D[a, b] + (D[b, order[j + 1]] - D[c, order[j + 1]] if j + 1 < n else 0.0)
+                if delta < -1e-9:
+                    order[i + 1 : j + 1] = order[i + 1 : j + 1][::-1]
+                    improved = True
+    return path_length(D, order)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_greedy_2opt_not_worse_than_old_full_2opt(seed):
+    rng = np.random.default_rng(100 + seed)
+    n = 20 + 14 * seed  # 20..90개 마을
+    if seed % 2:
+        centers = rng.random((4, 2)) * 0.3
+        k = rng.integers(0, 4, n)
+        lats, lons = 36.4 + centers[k, 0] + rng.normal(0, 0.02, n), 127.3 + centers[k, 1] + rng.normal(0, 0.02, n)
+    else:
+        lats, lons = 36.4 + rng.random(n) * 0.3, 127.3 + rng.random(n) * 0.3
+    D = route_matrix((36.5, 127.4), lats, lons)
+    cost, order = tsp_greedy_2opt(D, SpatialIndex(np.r_[36.5, lats], np.r_[127.4, lons]))
+    assert sorted(order) == list(range(1, n + 1))
+    assert cost <= _old_greedy_two_opt(D) + 1e-6
@@ -0,0 +1,62 @@
+# tests/test_update_models.py
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("xgboost")
+
+from app.bench.forecast_bench import _write_history  # noqa: E402
+from app.services.forecast import POOLED_KEY, _MLForecaster  # noqa: E402
+
+
+def _rows(key, first: dt.date, qty, days: int = 1) -> pd.DataFrame:
+    return pd.DataFrame([{"ts": pd.Timestamp(first + dt.timedelta(days=k)), "village_id": key[0], "product_id": key[1],
+                          "qty": qty, "temp": 20.0, "rain": 0} for k in range(days)])
+
+
+@pytest.fixture
+def trained(tmp_path):
+    def make(mode: str):
+        target = _write_history(tmp_path, villages=2, products=2, days=40)
+        ml = _MLForecaster(tmp_path, store=None, mode=mode)
+        ml.predict_batch(ml.groups(), target)  # 모든 쌍(또는 공용 모델) 학습
+        return ml, target
+    return make
+
+
+def test_new_days_continue_xgb_only(trained):
+    ml, target = trained("per_group")
+    key, other = (1, 101), (2, 102)
+    before = dict(ml._models[key])
+    ver = ml.cache_version(*key)
+    delta = ml.extend_history(_rows(key, target, 21, days=2))
+    assert delta == {key: (2, target.toordinal() - 1, False)}
+    out = ml.update_models(delta)
+    assert out == {"updated": [key], "refit": {}, "untrained": 0}
+    after = ml._models[key]
+    assert after["xgb"].num_boosted_rounds() > before["xgb"].num_boosted_rounds()
+    assert all(after[m] is before[m] for m in before if m != "xgb")
+    assert ml.cache_version(*key) != ver
+    assert ml._models[other] is not None and ml.predict_one(*key, target + dt.timedelta(days=2)).qty >= 0
+
+
+def test_backfill_drift_and_untrained_are_reported(trained):
+    ml, target = trained("per_group")
+    back = ml.extend_history(_rows((1, 101), target - dt.timedelta(days=45), 15))
+    assert ml.update_models(back)["refit"] == {(1, 101): "backfill"}
+    drift = ml.extend_history(_rows((2, 101), target, 400, days=6))
+    assert ml.update_models(drift)["refit"] == {(2, 101): "drift"}
+    fresh = ml.extend_history(_rows((9, 901), target, 5))
+    assert ml.update_models(fresh) == {"updated": [], "refit": {}, "untrained": 1}
+
+
+def test_pooled_model_is_updated_once(trained):
+    ml, target = trained("pooled")
+    rounds = ml._models[POOLED_KEY]["xgb"].num_boosted_rounds()
+    delta = ml.extend_history(pd.concat([_rows((1, 101), target, 20), _rows((2, 102), target, 25)]))
+    out = ml.update_models(delta)
+    assert out == {"updated": [POOLED_KEY], "refit": {}, "untrained": 0}
+    assert ml._models[POOLED_KEY]["xgb"].num_boosted_rounds() > rounds
+    back = ml.extend_history(_rows((1, 102), target - dt.timedelta(days=45), 15))
+    assert ml.update_models(back)["refit"] == {POOLED_KEY: "backfill"}